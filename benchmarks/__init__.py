@@ -0,0 +1 @@
+"""Benchmarks for the Govee integration."""
@@ -0,0 +1,58 @@
+"""Virtual clock for running the integration faster than real time."""
+from __future__ import annotations
+
+from datetime import datetime, tzinfo
+import time
+from typing import Optional
+
+from homeassistant.util import dt as dt_util
+
+
+class VirtualClock:
+    """Stand-in for the time module that only moves when advanced.
+
+    It starts at the given wall clock time, or the real time, and can stand
+    in for dt_util.now as well so day rollovers follow the virtual time. A
+    clock with a given start runs the same way every time.
+    """
+
+    def __init__(self, start: Optional[float] = None) -> None:
+        """Start the clock."""
+        if start is None:
+            self._monotonic = time.monotonic()
+            self._time = time.time()
+        else:
+            # A fixed origin makes repeated runs round the same way
+            self._monotonic = 1e6
+            self._time = start
+        self.elapsed = 0.0
+
+    def monotonic(self) -> float:
+        """Return the virtual monotonic time."""
+        return self._monotonic + self.elapsed
+
+    def time(self) -> float:
+        """Return the virtual wall clock time."""
+        return self._time + self.elapsed
+
+    def now(self, time_zone: Optional[tzinfo] = None) -> datetime:
+        """Return the virtual time as an aware datetime, like dt_util.now."""
+        return datetime.fromtimestamp(self.time(), time_zone or dt_util.DEFAULT_TIME_ZONE)
+
+    def advance(self, seconds: float) -> None:
+        """Move the clock forward."""
+        self.elapsed += max(seconds, 0)
+
+    def datetime_class(self) -> type[datetime]:
+        """Return a datetime class whose now() follows the virtual time."""
+        clock = self
+
+        class VirtualDatetime(datetime):
+            """Datetime with a virtual now()."""
+
+            @classmethod
+            def now(cls, tz: Optional[tzinfo] = None) -> datetime:
+                """Return the virtual time."""
+                return datetime.fromtimestamp(clock.time(), tz)
+
+        return VirtualDatetime
@@ -0,0 +1,159 @@
+"""Local stand-in for the legacy Govee API with fault injection."""
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+import random
+import threading
+from typing import Any, Optional
+
+from aiohttp import web
+
+from homeassistant.util import dt as dt_util
+
+
+class MockGoveeApi:
+    """Serve /v1/devices, /v1/devices/state and /v1/devices/control.
+
+    Faults are injected per request: a fixed latency, a daily budget with
+    Rate-Limit-* headers and 429s once it is used up, a 429 on every Nth
+    request, and requests that hang for hang_time seconds.
+    """
+
+    def __init__(
+        self,
+        devices: int = 10,
+        latency: float = 0.0,
+        daily_limit: int = 10000,
+        throttle_every: int = 0,
+        timeout_rate: float = 0.0,
+        hang_time: float = 15.0,
+        seed: int = 0,
+    ) -> None:
+        """Initialize the server."""
+        self.devices = [
+            {
+                "device": f"AA:BB:CC:{index >> 16 & 0xFF:02X}:{index >> 8 & 0xFF:02X}:{index & 0xFF:02X}:00:11",
+                "model": "H6159",
+                "deviceName": f"Bench Light {index}",
+                "controllable": True,
+                "retrievable": True,
+                "supportCmds": ["turn", "brightness", "color", "colorTem"],
+            }
+            for index in range(devices)
+        ]
+        self.latency = latency
+        self.daily_limit = daily_limit
+        self.throttle_every = throttle_every
+        self.timeout_rate = timeout_rate
+        self.hang_time = hang_time
+        self.requests: Counter[str] = Counter()
+        self.statuses: Counter[int] = Counter()
+        self._random = random.Random(seed)
+        self._states = {
+            device["device"]: {"powerState": "off", "brightness": 100} for device in self.devices
+        }
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def total_requests(self) -> int:
+        """Return the number of requests served."""
+        return sum(self.requests.values())
+
+    async def async_start(self) -> str:
+        """Start serving on a free local port and return the base URL."""
+        app = web.Application()
+        app.router.add_get("/v1/devices", self._devices)
+        app.router.add_get("/v1/devices/state", self._state)
+        app.router.add_put("/v1/devices/control", self._control)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        return f"http://127.0.0.1:{port}/v1"
+
+    async def async_stop(self) -> None:
+        """Stop serving."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _respond(self, endpoint: str, data: dict[str, Any]) -> web.Response:
+        """Apply the injected faults and answer a request."""
+        self.requests[endpoint] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.timeout_rate and self._random.random() < self.timeout_rate:
+            await asyncio.sleep(self.hang_time)
+
+        remaining = max(self.daily_limit - self.total_requests, 0)
+        next_day = dt_util.start_of_local_day() + dt_util.dt.timedelta(days=1)
+        headers = {
+            "Rate-Limit-Remaining": str(remaining),
+            "Rate-Limit-Reset": str(int(next_day.timestamp())),
+        }
+        throttled = self.throttle_every and self.total_requests % self.throttle_every == 0
+        status = 429 if remaining == 0 or throttled else 200
+        self.statuses[status] += 1
+        if status == 429:
+            return web.json_response({"code": 429, "message": "Too Many Requests"}, status=429, headers=headers)
+        return web.json_response({"code": 200, "message": "Success", "data": data}, headers=headers)
+
+    async def _devices(self, request: web.Request) -> web.Response:
+        """Return the device list."""
+        return await self._respond("devices", {"devices": self.devices})
+
+    async def _state(self, request: web.Request) -> web.Response:
+        """Return the state of a device."""
+        state = self._states.get(request.query.get("device"), {})
+        return await self._respond(
+            "state",
+            {
+                "device": request.query.get("device"),
+                "model": request.query.get("model"),
+                "properties": [{"name": name, "value": value} for name, value in state.items()],
+            },
+        )
+
+    async def _control(self, request: web.Request) -> web.Response:
+        """Apply a control command."""
+        body = await request.json()
+        state = self._states.get(body.get("device"))
+        cmd = body.get("cmd", {})
+        if state is not None:
+            if cmd.get("name") == "turn":
+                state["powerState"] = cmd.get("value")
+            elif cmd.get("name") in ("brightness", "color", "colorTem"):
+                state[cmd["name"]] = cmd.get("value")
+        return await self._respond("control", {})
+
+
+class ThreadedMockGoveeApi:
+    """Run a MockGoveeApi on its own event loop in a background thread.
+
+    Keeping the server off the loop under test means its work does not show
+    up in the loop time measured for the integration.
+    """
+
+    def __init__(self, api: MockGoveeApi) -> None:
+        """Initialize the runner."""
+        self.api = api
+        self.base_url = ""
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+
+    def __enter__(self) -> ThreadedMockGoveeApi:
+        """Start the server thread."""
+        self._thread.start()
+        self.base_url = asyncio.run_coroutine_threadsafe(
+            self.api.async_start(), self._loop
+        ).result()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        """Stop the server thread."""
+        asyncio.run_coroutine_threadsafe(self.api.async_stop(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
@@ -0,0 +1,238 @@
+"""Drive the Govee integration against a local mock API and report its costs.
+
+Run from the repository root:
+
+    python -m benchmarks.run_benchmarks --fleets 10 100 1000 --json results.json
+
+Polling is simulated on a virtual clock so a day of calls takes seconds: the
+clock jumps to each refresh the coordinator schedules and to each moment the
+rate limiter frees a token. Commands run on the real clock against a fresh
+limiter and are timed end to end. Loop time is the CPU time the event loop
+under test spent, the mock server runs on a thread of its own.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from contextlib import ExitStack
+import json
+import logging
+import statistics
+import time
+import tracemalloc
+from typing import Any, Optional
+from unittest.mock import MagicMock, patch
+
+import aiohttp
+from homeassistant.util import dt as dt_util
+
+from custom_components.govee import circuit_breaker, coordinator as coordinator_module, rate_limiter
+from custom_components.govee.api import GoveeApiClient
+from custom_components.govee.coordinator import GoveeDataUpdateCoordinator
+from custom_components.govee.light import GoveeLight
+from custom_components.govee.rate_limiter import SECONDS_PER_DAY, GoveeRateLimiter
+
+from .clock import VirtualClock
+from .mock_server import MockGoveeApi, ThreadedMockGoveeApi
+
+DEFAULT_FLEETS = (10, 100, 1000)
+DEFAULT_SIMULATED_HOURS = 6
+DEFAULT_COMMANDS = 50
+
+
+def _percentile(values: list[float], percent: float) -> float:
+    """Return a percentile of the values, 0 when there are none."""
+    if not values:
+        return 0.0
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[int(percent) - 1]
+
+
+async def _async_drive(
+    task: asyncio.Task, limiter: GoveeRateLimiter, clock: VirtualClock
+) -> Any:
+    """Run a task, jumping the clock forward whenever it waits for tokens."""
+    while not task.done():
+        await asyncio.wait({task}, timeout=0.001)
+        if not task.done() and limiter._waiters:
+            rate = limiter.refill_rate
+            clock.advance(1 / rate if rate > 0 else 60)
+            limiter._process_waiters()
+    return task.result()
+
+
+def _setup(
+    session: aiohttp.ClientSession, base_url: str
+) -> tuple[GoveeRateLimiter, GoveeDataUpdateCoordinator]:
+    """Create the limiter, client and coordinator of one config entry."""
+    hass = MagicMock()
+    limiter = GoveeRateLimiter(hass)
+    client = GoveeApiClient(hass, "bench-api-key", limiter, session=session, base_url=base_url)
+    return limiter, GoveeDataUpdateCoordinator(hass, client)
+
+
+async def async_benchmark_polling(
+    base_url: str, api: MockGoveeApi, simulated_hours: float
+) -> dict[str, Any]:
+    """Poll the fleet for a simulated period and extrapolate to a day."""
+    clock = VirtualClock()
+    with ExitStack() as stack:
+        for module in (rate_limiter, coordinator_module, circuit_breaker):
+            stack.enter_context(patch.object(module, "time", clock))
+        # Day rollovers and the time left today follow the virtual clock too
+        stack.enter_context(patch.object(rate_limiter, "datetime", clock.datetime_class()))
+        stack.enter_context(patch.object(dt_util, "now", clock.now))
+
+        async with aiohttp.ClientSession() as session:
+            limiter, coordinator = _setup(session, base_url)
+            start_requests = api.total_requests
+            loop_start = time.thread_time()
+
+            devices = await _async_drive(
+                asyncio.ensure_future(coordinator.async_fetch_devices()), limiter, clock
+            )
+            coordinator.set_devices(devices)
+            limiter.update_device_count(len(devices))
+
+            refreshes = 0
+            while clock.elapsed < simulated_hours * 3600:
+                coordinator.data = await _async_drive(
+                    asyncio.ensure_future(coordinator._async_update_data()), limiter, clock
+                )
+                refreshes += 1
+                clock.advance(coordinator.update_interval.total_seconds())
+
+            loop_time = time.thread_time() - loop_start
+            if limiter._publish_handle is not None:
+                limiter._publish_handle.cancel()
+            if limiter._wakeup_handle is not None:
+                limiter._wakeup_handle.cancel()
+
+    calls = api.total_requests - start_requests
+    scale = SECONDS_PER_DAY / clock.elapsed
+    return {
+        "calls_per_day": round(calls * scale),
+        "refreshes": refreshes,
+        "loop_ms_per_refresh": round(loop_time * 1000 / max(refreshes, 1), 3),
+    }
+
+
+async def async_benchmark_commands(
+    base_url: str, api: MockGoveeApi, commands: int
+) -> dict[str, Any]:
+    """Send a burst of commands and time each of them."""
+    async with aiohttp.ClientSession() as session:
+        limiter, coordinator = _setup(session, base_url)
+        coordinator.set_devices(api.devices)
+        targets = [api.devices[index % len(api.devices)] for index in range(commands)]
+        latencies: list[float] = []
+        errors = 0
+
+        async def _async_send(index: int, device: dict[str, Any]) -> None:
+            nonlocal errors
+            start = time.perf_counter()
+            try:
+                await coordinator.async_control(
+                    device["device"], device["model"], "turn", "on" if index % 2 else "off"
+                )
+            except Exception:  # noqa: BLE001 - failures are counted, not raised
+                errors += 1
+                return
+            latencies.append(time.perf_counter() - start)
+
+        loop_start = time.thread_time()
+        await asyncio.gather(*(_async_send(index, device) for index, device in enumerate(targets)))
+        loop_time = time.thread_time() - loop_start
+        if limiter._publish_handle is not None:
+            limiter._publish_handle.cancel()
+
+    return {
+        "command_p50_ms": round(_percentile(latencies, 50) * 1000, 2),
+        "command_p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+        "command_errors": errors,
+        "loop_ms_per_command": round(loop_time * 1000 / max(commands, 1), 3),
+    }
+
+
+def benchmark_entities(api: MockGoveeApi) -> dict[str, Any]:
+    """Create a light entity for every device and measure time and memory."""
+    coordinator = MagicMock()
+    entry = MagicMock()
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        lights = [GoveeLight(coordinator, entry, device) for device in api.devices]
+        elapsed = time.perf_counter() - start
+        allocated, _peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "entity_setup_ms": round(elapsed * 1000, 2),
+        "bytes_per_entity": round(allocated / max(len(lights), 1)),
+    }
+
+
+async def async_run_fleet(
+    devices: int,
+    simulated_hours: float = DEFAULT_SIMULATED_HOURS,
+    commands: int = DEFAULT_COMMANDS,
+    **faults: Any,
+) -> dict[str, Any]:
+    """Benchmark one fleet size against its own mock server."""
+    result: dict[str, Any] = {"devices": devices}
+    api = MockGoveeApi(devices=devices, **faults)
+    with ThreadedMockGoveeApi(api) as server:
+        result.update(await async_benchmark_polling(server.base_url, api, simulated_hours))
+        result.update(await async_benchmark_commands(server.base_url, api, commands))
+    result.update(benchmark_entities(api))
+    result["http_429"] = api.statuses[429]
+    return result
+
+
+def _format_table(results: list[dict[str, Any]]) -> str:
+    """Format the results as a plain text table."""
+    columns = list(results[0])
+    widths = [max(len(column), *(len(str(row[column])) for row in results)) for column in columns]
+    lines = ["  ".join(column.rjust(width) for column, width in zip(columns, widths))]
+    lines.extend(
+        "  ".join(str(row[column]).rjust(width) for column, width in zip(columns, widths))
+        for row in results
+    )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Run the benchmarks from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fleets", type=int, nargs="+", default=list(DEFAULT_FLEETS))
+    parser.add_argument("--hours", type=float, default=DEFAULT_SIMULATED_HOURS, help="Simulated hours of polling")
+    parser.add_argument("--commands", type=int, default=DEFAULT_COMMANDS, help="Commands in the burst")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds the server takes per request")
+    parser.add_argument("--throttle-every", type=int, default=0, help="Answer every Nth request with 429")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="Share of requests that hang")
+    parser.add_argument("--json", metavar="FILE", help="Also write the results to a JSON file")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.ERROR)
+    results = [
+        asyncio.run(
+            async_run_fleet(
+                devices,
+                args.hours,
+                args.commands,
+                latency=args.latency,
+                throttle_every=args.throttle_every,
+                timeout_rate=args.timeout_rate,
+            )
+        )
+        for devices in args.fleets
+    ]
+    print(_format_table(results))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
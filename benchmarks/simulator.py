@@ -0,0 +1,299 @@
+"""Simulate days of polling on a virtual clock to check the polling policy.
+
+Run from the repository root:
+
+    python -m benchmarks.simulator --devices 1 50 500 --hours 24 --restart 12
+
+The real GoveeRateLimiter and coordinator poll simulated devices through a
+stand-in for the API client that answers from memory and enforces the daily
+limit like Govee does. Time only moves when the coordinator schedules its
+next refresh or waits for the rate limiter, so a day takes seconds. By
+default the simulation starts in the morning so it crosses midnight,
+--start-hour 0 simulates whole calendar days. Every start comes up like a
+Home Assistant restart with a device cache: the limiter counters are
+restored and the first polls are staggered.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections import Counter
+from contextlib import ExitStack
+from datetime import datetime, timedelta
+import logging
+import random
+from typing import Any, Optional
+from unittest.mock import MagicMock, patch
+
+from homeassistant.helpers.update_coordinator import UpdateFailed
+from homeassistant.util import dt as dt_util
+
+from custom_components.govee import circuit_breaker, coordinator as coordinator_module, rate_limiter
+from custom_components.govee.api import GoveeRateLimitReached
+from custom_components.govee.circuit_breaker import GoveeCircuitBreaker
+from custom_components.govee.coordinator import GoveeDataUpdateCoordinator
+from custom_components.govee.rate_limiter import (
+    DAILY_LIMIT,
+    SAFE_LIMIT,
+    GoveeRateLimiter,
+    RequestPriority,
+)
+
+from .clock import VirtualClock
+
+DEFAULT_FLEETS = (1, 50, 500)
+DEFAULT_HOURS = 24
+DEFAULT_START_HOUR = 6
+ACTIVE_CHANGE_RATE = 1 / 600  # State changes per second of a device in use
+QUIET_CHANGE_RATE = 2 / 86400  # State changes per second of a device left alone
+MAX_IDLE_STEPS = 1000  # Loop iterations without progress before giving up
+
+
+class MemoryStore:
+    """Keep the limiter counters in memory across simulated restarts."""
+
+    def __init__(self) -> None:
+        """Initialize the store."""
+        self.data: Optional[dict[str, Any]] = None
+
+    async def async_load(self) -> Optional[dict[str, Any]]:
+        """Return the saved counters."""
+        return self.data
+
+    def async_delay_save(self, data_func: Any, delay: float) -> None:
+        """Ignore batched saves, restarts save explicitly."""
+
+    async def async_save(self, data: dict[str, Any]) -> None:
+        """Save the counters."""
+        self.data = data
+
+
+class SimulatedGoveeApi:
+    """Answer state reads from simulated devices like the Govee API would.
+
+    Each device changes its state at a fixed rate, a share of them often.
+    Calls are counted per virtual day and answered with 429 once the daily
+    limit is used up.
+    """
+
+    def __init__(
+        self, clock: VirtualClock, devices: int, active_share: float, seed: int
+    ) -> None:
+        """Initialize the simulated API."""
+        rng = random.Random(seed)
+        active = round(devices * active_share)
+        self.devices = [
+            {
+                "device": f"SIM:{index:06d}",
+                "model": "H6159",
+                "deviceName": f"Simulated Light {index}",
+                "retrievable": True,
+                "controllable": True,
+            }
+            for index in range(devices)
+        ]
+        self._rates = [
+            ACTIVE_CHANGE_RATE if index < active else QUIET_CHANGE_RATE
+            for index in range(devices)
+        ]
+        self._phases = [rng.random() for _ in range(devices)]
+        self._index = {device["device"]: index for index, device in enumerate(self.devices)}
+        self._clock = clock
+        self.key_id = "simulated"
+        self.rate_limiter: Optional[GoveeRateLimiter] = None
+        self.circuit_breaker = GoveeCircuitBreaker()
+        self.calls_by_day: Counter[str] = Counter()
+        self.calls_by_minute: Counter[int] = Counter()
+        self.last_call_by_day: dict[str, str] = {}
+        self.throttled = 0
+
+    async def async_get_devices(
+        self, priority: RequestPriority = RequestPriority.DISCOVERY
+    ) -> list[dict[str, Any]]:
+        """Return the device list."""
+        await self._async_call(priority)
+        return self.devices
+
+    async def async_get_state(
+        self,
+        device_id: str,
+        model: str,
+        priority: RequestPriority = RequestPriority.POLL,
+    ) -> dict[str, Any]:
+        """Return the current state of a device."""
+        await self._async_call(priority)
+        index = self._index[device_id]
+        changes = int(self._clock.elapsed * self._rates[index] + self._phases[index])
+        return {"powerState": "on", "brightness": changes % 101}
+
+    async def _async_call(self, priority: RequestPriority) -> None:
+        """Wait for the rate limiter and account for a call."""
+        await self.rate_limiter.acquire(priority=priority)
+        now = self._clock.now()
+        day = now.date().isoformat()
+        self.calls_by_day[day] += 1
+        self.calls_by_minute[int(self._clock.elapsed // 60)] += 1
+        self.last_call_by_day[day] = now.strftime("%H:%M")
+        self.rate_limiter.increment_call_count()
+        next_day = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), now.tzinfo)
+        self.rate_limiter.update_api_limits(
+            max(DAILY_LIMIT - self.calls_by_day[day], 0),
+            datetime.fromtimestamp(next_day.timestamp()),
+        )
+        if self.calls_by_day[day] > DAILY_LIMIT:
+            self.throttled += 1
+            raise GoveeRateLimitReached("Rate limit reached")
+
+
+async def _async_drive(coro: Any, limiter: GoveeRateLimiter, clock: VirtualClock) -> Any:
+    """Run a coroutine, jumping the clock forward whenever it waits for tokens."""
+    task = asyncio.ensure_future(coro)
+    idle = 0
+    while True:
+        await asyncio.sleep(0)
+        if task.done():
+            return task.result()
+        if limiter._waiters:
+            rate = limiter.refill_rate
+            clock.advance(1 / rate if rate > 0 else 60)
+            limiter._process_waiters()
+            idle = 0
+        elif (idle := idle + 1) > MAX_IDLE_STEPS:
+            task.cancel()
+            raise RuntimeError("Simulation stalled outside the rate limiter")
+
+
+def _stop(limiter: GoveeRateLimiter) -> None:
+    """Cancel the timers of a limiter that is shut down."""
+    for handle in (limiter._publish_handle, limiter._wakeup_handle):
+        if handle is not None:
+            handle.cancel()
+
+
+async def _async_start(
+    api: SimulatedGoveeApi, store: MemoryStore, clock: VirtualClock
+) -> GoveeDataUpdateCoordinator:
+    """Start the integration like Home Assistant does after a restart."""
+    hass = MagicMock()
+    limiter = GoveeRateLimiter(hass)
+    limiter._store = store
+    await limiter.async_load()
+    api.rate_limiter = limiter
+    api.circuit_breaker = GoveeCircuitBreaker()
+    coordinator = GoveeDataUpdateCoordinator(hass, api)
+    coordinator.set_devices(await _async_drive(coordinator.async_fetch_devices(), limiter, clock))
+    # The lights come up from the device cache, which spreads their first polls
+    coordinator.stagger_polls()
+    return coordinator
+
+
+async def async_simulate(
+    devices: int,
+    hours: float = DEFAULT_HOURS,
+    restarts: tuple[float, ...] = (),
+    start_hour: int = DEFAULT_START_HOUR,
+    active_share: float = 0.1,
+    seed: int = 0,
+) -> dict[str, Any]:
+    """Simulate polling a fleet and return the calls it made.
+
+    Restarts are given in hours after the start of the simulation. Besides
+    the call counts the result holds the time of the last call of each day
+    and the longest stretch of minutes without any call.
+    """
+    start = datetime(2024, 1, 1, start_hour, tzinfo=dt_util.DEFAULT_TIME_ZONE)
+    clock = VirtualClock(start.timestamp())
+    with ExitStack() as stack:
+        for module in (rate_limiter, coordinator_module, circuit_breaker):
+            stack.enter_context(patch.object(module, "time", clock))
+        stack.enter_context(patch.object(rate_limiter, "datetime", clock.datetime_class()))
+        stack.enter_context(patch.object(dt_util, "now", clock.now))
+
+        api = SimulatedGoveeApi(clock, devices, active_share, seed)
+        store = MemoryStore()
+        coordinator = await _async_start(api, store, clock)
+        pending = sorted(hour * 3600 for hour in restarts)
+        refreshes = 0
+
+        while clock.elapsed < hours * 3600:
+            if pending and clock.elapsed >= pending[0]:
+                pending.pop(0)
+                await store.async_save(coordinator.rate_limiter._data_to_save())
+                _stop(coordinator.rate_limiter)
+                coordinator = await _async_start(api, store, clock)
+
+            try:
+                coordinator.data = await _async_drive(
+                    coordinator._async_update_data(), coordinator.rate_limiter, clock
+                )
+            except UpdateFailed:
+                pass
+            refreshes += 1
+
+            delay = coordinator.update_interval.total_seconds()
+            if pending:
+                delay = min(delay, pending[0] - clock.elapsed)
+            clock.advance(delay)
+
+        _stop(coordinator.rate_limiter)
+
+    minutes = [api.calls_by_minute.get(minute, 0) for minute in range(int(hours * 60) + 1)]
+    hourly = [sum(minutes[minute:minute + 60]) for minute in range(max(len(minutes) - 59, 1))]
+    longest_gap = gap = 0
+    for calls in minutes:
+        gap = 0 if calls else gap + 1
+        longest_gap = max(longest_gap, gap)
+    peak_daily_calls = max(api.calls_by_day.values(), default=0)
+    return {
+        "devices": devices,
+        "total_calls": sum(api.calls_by_day.values()),
+        "calls_by_day": dict(sorted(api.calls_by_day.items())),
+        "peak_calls_per_minute": max(minutes),
+        "peak_calls_per_hour": max(hourly),
+        "last_call_by_day": dict(sorted(api.last_call_by_day.items())),
+        "longest_gap_minutes": longest_gap,
+        "peak_daily_calls": peak_daily_calls,
+        "safe_limit_usage": round(peak_daily_calls / SAFE_LIMIT * 100, 1),
+        "throttled": api.throttled,
+        "refreshes": refreshes,
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Run the simulation from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, nargs="+", default=list(DEFAULT_FLEETS))
+    parser.add_argument("--hours", type=float, default=DEFAULT_HOURS)
+    parser.add_argument(
+        "--restart", type=float, nargs="*", default=[], help="Hours after the start to restart at"
+    )
+    parser.add_argument(
+        "--start-hour", type=int, default=DEFAULT_START_HOUR, help="Hour of the day to start at"
+    )
+    parser.add_argument("--active-share", type=float, default=0.1, help="Share of devices in use")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.ERROR)
+    for devices in args.devices:
+        result = asyncio.run(
+            async_simulate(
+                devices,
+                args.hours,
+                tuple(args.restart),
+                start_hour=args.start_hour,
+                active_share=args.active_share,
+                seed=args.seed,
+            )
+        )
+        print(
+            f"{devices:>5} devices: {result['total_calls']} calls "
+            f"({', '.join(f'{day}: {calls}' for day, calls in result['calls_by_day'].items())}), "
+            f"peak {result['peak_calls_per_minute']}/min {result['peak_calls_per_hour']}/h, "
+            f"longest gap {result['longest_gap_minutes']} min, "
+            f"{result['safe_limit_usage']}% of the safe limit, {result['throttled']} throttled"
+        )
+
+
+if __name__ == "__main__":
+    main()
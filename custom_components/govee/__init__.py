@@ -1,24 +1,39 @@
 """The Govee integration."""
 from __future__ import annotations
 
+from datetime import timedelta
 import os
 import logging
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_API_KEY, Platform
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.util.ssl import get_default_context
 from homeassistant.helpers.typing import ConfigType
 from homeassistant.components import frontend
 
-from .rate_limiter import GoveeRateLimiter
+from .api import GoveeApiClient
+from .const import CONF_EXTRA_API_KEYS, CONF_LAN_CONTROL, CONF_PUSH_UPDATES
+from .coordinator import GoveeDataUpdateCoordinator
+from .device_cache import GoveeDeviceCache
+from .lan import GoveeLanClient
+from .mqtt import GoveeMqttClient
+from .rate_limiter import async_get_rate_limiter, async_release_rate_limiter
+from .services import async_setup_services
+from .websocket_api import async_setup_websocket_api
 
 _LOGGER = logging.getLogger(__name__)
 
 DOMAIN = "govee"
 PLATFORMS: list[Platform] = [Platform.LIGHT, Platform.SENSOR]
+LAN_SCAN_INTERVAL = timedelta(minutes=5)
 
 async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     """Set up the Govee integration."""
+    async_setup_services(hass)
+    async_setup_websocket_api(hass)
+
     # Register custom card
     card_dir = os.path.join(os.path.dirname(__file__), "www")
     if os.path.isdir(card_dir):
@@ -42,15 +57,68 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Govee from a config entry."""
     hass.data.setdefault(DOMAIN, {})
     
-    # Create rate limiter
-    rate_limiter = GoveeRateLimiter(hass)
+    # Each API key gets its own client, and a rate limiter shared with every
+    # other entry using the key, restoring today's usage before any platform
+    # polls. Every request of a key goes through its client and connection pool.
+    api_keys = list(
+        dict.fromkeys([entry.data[CONF_API_KEY], *entry.data.get(CONF_EXTRA_API_KEYS, [])])
+    )
+    rate_limiters = []
+    clients = []
+    for api_key in api_keys:
+        key_limiter = await async_get_rate_limiter(hass, api_key)
+        rate_limiters.append(key_limiter)
+        clients.append(
+            GoveeApiClient(
+                hass,
+                api_key,
+                key_limiter,
+                openapi=entry.data.get(CONF_PUSH_UPDATES, False),
+            )
+        )
+    rate_limiter, client = rate_limiters[0], clients[0]
+
+    # Optionally reach devices with LAN control enabled over the local network
+    lan = None
+    if entry.data.get(CONF_LAN_CONTROL):
+        lan = GoveeLanClient()
+        try:
+            await lan.async_start()
+        except OSError as err:
+            _LOGGER.warning("Govee LAN control unavailable, using the cloud only: %s", str(err))
+            lan = None
+
+    # Create the coordinator that polls device state for this entry
+    coordinator = GoveeDataUpdateCoordinator(hass, client, lan, clients[1:])
+
+    # State changes pushed over MQTT make polling a rare consistency check
+    if entry.data.get(CONF_PUSH_UPDATES):
+        coordinator.push = GoveeMqttClient(
+            entry.data[CONF_API_KEY],
+            coordinator.async_handle_push,
+            ssl_context=get_default_context(),
+        )
+        coordinator.push.start()
     
-    # Store the api key and rate limiter
+    # Store the api key, clients, rate limiters, coordinator and device cache
     hass.data[DOMAIN][entry.entry_id] = {
         "api_key": entry.data[CONF_API_KEY],
-        "rate_limiter": rate_limiter
+        "client": client,
+        "clients": clients,
+        "lan": lan,
+        "rate_limiter": rate_limiter,
+        "rate_limiters": rate_limiters,
+        "api_keys": api_keys,
+        "coordinator": coordinator,
+        "device_cache": GoveeDeviceCache(hass, entry.data[CONF_API_KEY]),
     }
 
+    if lan is not None:
+        entry.async_create_background_task(hass, coordinator.async_scan_lan(), "govee lan scan")
+        entry.async_on_unload(
+            async_track_time_interval(hass, coordinator.async_scan_lan, LAN_SCAN_INTERVAL)
+        )
+
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     return True
 
@@ -58,5 +126,20 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id)
+        entry_data = hass.data[DOMAIN].pop(entry.entry_id)
+        coordinator = entry_data["coordinator"]
+        if coordinator.push is not None:
+            await coordinator.push.async_stop()
+        # Other entries sharing a rate limiter stop counting these devices
+        coordinator.set_devices([])
+        for client in entry_data["clients"]:
+            await client.async_close()
+        if entry_data["lan"] is not None:
+            await entry_data["lan"].async_stop()
+        for api_key in entry_data["api_keys"]:
+            await async_release_rate_limiter(hass, api_key)
     return unload_ok
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the cached device list of a removed config entry."""
+    await GoveeDeviceCache(hass, entry.data[CONF_API_KEY]).async_remove()
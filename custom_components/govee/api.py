@@ -0,0 +1,348 @@
+"""Client for the Govee developer API."""
+from __future__ import annotations
+
+import asyncio
+from contextlib import nullcontext
+from datetime import datetime
+import logging
+import time
+from typing import Any, Optional
+import uuid
+
+import aiohttp
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import SERVER_SOFTWARE
+from homeassistant.util.ssl import get_default_context
+
+from .circuit_breaker import GoveeCircuitBreaker
+from .device_cache import api_key_hash
+from .metrics import STATUS_ERROR, STATUS_TIMEOUT
+from .openapi import (
+    OPENAPI_BASE_URL,
+    capabilities_to_properties,
+    command_to_capability,
+    router_device_to_legacy,
+)
+from .rate_limiter import GoveeRateLimiter, RequestPriority
+
+_LOGGER = logging.getLogger(__name__)
+
+API_BASE_URL = "https://developer-api.govee.com/v1"
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=10, connect=5)
+MAX_CONNECTIONS_PER_HOST = 10  # Govee serves everything from one host
+DNS_CACHE_TTL = 300  # Seconds to cache DNS lookups
+KEEPALIVE_TIMEOUT = 60  # Seconds to keep idle connections open
+CONTROL_THROTTLE_RETRIES = 2  # Resends of a command throttled for its device
+
+
+class GoveeApiError(Exception):
+    """Raised when the Govee API returns an error."""
+
+
+class GoveeAuthError(GoveeApiError):
+    """Raised when the Govee API rejects the API key."""
+
+
+class GoveeRateLimitReached(GoveeApiError):
+    """Raised when the Govee API answers with HTTP 429."""
+
+    def __init__(
+        self,
+        message: str,
+        remaining: Optional[int] = None,
+        reset_time: Optional[datetime] = None,
+    ) -> None:
+        """Initialize the error with the rate limit headers of the response."""
+        super().__init__(message)
+        self.remaining = remaining
+        self.reset_time = reset_time
+
+
+class GoveeCircuitOpen(GoveeApiError):
+    """Raised when a request is held back because the Govee API is failing."""
+
+
+class GoveeApiClient:
+    """Send requests to the Govee API and account for them in the rate limiter.
+
+    Every request waits for the rate limiter, is counted once it reaches the
+    API and feeds the rate limit headers of its response back. With openapi
+    set the client talks to the OpenAPI router instead of the legacy
+    endpoints, and converts its answers to the legacy format.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        api_key: str,
+        rate_limiter: Optional[GoveeRateLimiter] = None,
+        session: Optional[aiohttp.ClientSession] = None,
+        openapi: bool = False,
+        base_url: Optional[str] = None,
+    ) -> None:
+        """Initialize the client.
+
+        Without a session a dedicated one is created on first use and closed
+        by async_close.
+        """
+        self.hass = hass
+        self.rate_limiter = rate_limiter
+        self.openapi = openapi
+        self._base_url = base_url or (OPENAPI_BASE_URL if openapi else API_BASE_URL)
+        self._headers = {"Govee-API-Key": api_key}
+        # Names the API key in device lists and logs without revealing it
+        self.key_id = api_key_hash(api_key)
+        self._session = session
+        self._owns_session = session is None
+        self.circuit_breaker = GoveeCircuitBreaker()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the session, creating the dedicated one if needed."""
+        if self._session is None:
+            connector = aiohttp.TCPConnector(
+                limit_per_host=MAX_CONNECTIONS_PER_HOST,
+                ttl_dns_cache=DNS_CACHE_TTL,
+                keepalive_timeout=KEEPALIVE_TIMEOUT,
+                enable_cleanup_closed=True,
+                ssl=get_default_context(),
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=REQUEST_TIMEOUT,
+                headers={"User-Agent": SERVER_SOFTWARE},
+            )
+        return self._session
+
+    async def async_close(self) -> None:
+        """Close the dedicated session."""
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def async_get_devices(
+        self, priority: RequestPriority = RequestPriority.DISCOVERY
+    ) -> list[dict[str, Any]]:
+        """Fetch the device list."""
+        if self.openapi:
+            data = await self._async_request("GET", "/user/devices", priority)
+            if not isinstance(data, dict) or not isinstance(data.get("data"), list):
+                raise GoveeApiError(f"Invalid response from Govee API: {data}")
+            return [router_device_to_legacy(device) for device in data["data"]]
+
+        data = await self._async_request("GET", "/devices", priority)
+        if not isinstance(data, dict) or "data" not in data or "devices" not in data["data"]:
+            raise GoveeApiError(f"Invalid response from Govee API: {data}")
+        return data["data"]["devices"]
+
+    async def async_get_state(
+        self,
+        device_id: str,
+        model: str,
+        priority: RequestPriority = RequestPriority.POLL,
+    ) -> dict[str, Any] | None:
+        """Fetch the state properties of a device, keyed by property name."""
+        if self.openapi:
+            data = await self._async_request(
+                "POST",
+                "/device/state",
+                priority,
+                json=self._router_body({"sku": model, "device": device_id}),
+            )
+            if (
+                not isinstance(data, dict)
+                or not isinstance(data.get("payload"), dict)
+                or not isinstance(data["payload"].get("capabilities"), list)
+            ):
+                return None
+            return capabilities_to_properties(data["payload"]["capabilities"])
+
+        data = await self._async_request(
+            "GET",
+            "/devices/state",
+            priority,
+            params={"device": device_id, "model": model},
+        )
+        if (
+            not isinstance(data, dict)
+            or not isinstance(data.get("data"), dict)
+            or "properties" not in data["data"]
+        ):
+            return None
+
+        properties: dict[str, Any] = {}
+        for prop in data["data"]["properties"]:
+            if not isinstance(prop, dict) or "name" not in prop:
+                continue
+            properties[prop["name"]] = prop.get("value")
+        return properties
+
+    async def async_control(
+        self,
+        device_id: str,
+        model: str,
+        name: str,
+        value: Any,
+        priority: RequestPriority = RequestPriority.CONTROL,
+        slots: Optional[asyncio.Semaphore] = None,
+    ) -> None:
+        """Send a control command to a device.
+
+        The command waits for the control window of the device. When Govee
+        still throttles the device the command is queued again instead of
+        failing, unless the daily budget is exhausted. Given slots are only
+        held while the request is sent, never while waiting for the window.
+        """
+        if self.openapi:
+            capability = command_to_capability(name, value)
+            if capability is None:
+                raise GoveeApiError(f"Unsupported command: {name}")
+            path = "/device/control"
+            body = self._router_body(
+                {"sku": model, "device": device_id, "capability": capability}
+            )
+        else:
+            path = "/devices/control"
+            body = {
+                "device": device_id,
+                "model": model,
+                "cmd": {
+                    "name": name,
+                    "value": value
+                }
+            }
+
+        for attempt in range(CONTROL_THROTTLE_RETRIES + 1):
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire_device(device_id)
+            try:
+                async with slots or nullcontext():
+                    await self._async_request(
+                        "POST" if self.openapi else "PUT", path, priority, json=body
+                    )
+                return
+            except GoveeRateLimitReached as err:
+                if (
+                    self.rate_limiter is None
+                    or err.remaining == 0
+                    or attempt == CONTROL_THROTTLE_RETRIES
+                ):
+                    raise
+                self.rate_limiter.device_throttled(device_id, err.reset_time)
+
+    @staticmethod
+    def _router_body(payload: dict[str, Any]) -> dict[str, Any]:
+        """Wrap a payload in an OpenAPI request body."""
+        return {"requestId": str(uuid.uuid4()), "payload": payload}
+
+    async def _async_request(
+        self,
+        method: str,
+        path: str,
+        priority: RequestPriority,
+        **kwargs: Any,
+    ) -> Any:
+        """Send a request and return the decoded JSON body.
+
+        Network errors, timeouts and server errors count as failures for the
+        circuit breaker, any other answer shows the API is up.
+        """
+        breaker = self.circuit_breaker
+        if not breaker.allow_request(priority):
+            raise GoveeCircuitOpen(
+                f"Govee API is failing, retrying in {breaker.retry_after:.0f} seconds"
+            )
+
+        try:
+            data = await self._async_send(method, path, priority, **kwargs)
+        except aiohttp.ClientResponseError as err:
+            if err.status >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            raise
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            breaker.record_failure()
+            raise
+        except GoveeApiError:
+            breaker.record_success()
+            raise
+        except BaseException:
+            breaker.release()
+            raise
+        breaker.record_success()
+        return data
+
+    async def _async_send(
+        self,
+        method: str,
+        path: str,
+        priority: RequestPriority,
+        **kwargs: Any,
+    ) -> Any:
+        """Wait for the rate limiter and send a request."""
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire(priority=priority)
+
+        # The last path segment names the endpoint: devices, state or control
+        endpoint = path.rsplit("/", 1)[-1]
+        start = time.monotonic()
+        status: Optional[int | str] = STATUS_ERROR
+        try:
+            async with self._get_session().request(
+                method,
+                f"{self._base_url}{path}",
+                headers=self._headers,
+                timeout=REQUEST_TIMEOUT,
+                **kwargs,
+            ) as response:
+                status = response.status
+                remaining, reset_time = self._record_response(response)
+
+                if response.status == 401:
+                    raise GoveeAuthError("Invalid API key")
+                if response.status == 429:
+                    raise GoveeRateLimitReached(
+                        f"Rate limit reached, resets at {reset_time}", remaining, reset_time
+                    )
+                response.raise_for_status()
+                data = await response.json(content_type=None)
+        except asyncio.TimeoutError:
+            status = STATUS_TIMEOUT
+            raise
+        except asyncio.CancelledError:
+            # Cancelled by the caller, the endpoint did nothing wrong
+            status = None
+            raise
+        finally:
+            if self.rate_limiter is not None and status is not None:
+                self.rate_limiter.record_request(
+                    endpoint, status, (time.monotonic() - start) * 1000
+                )
+
+        if self.openapi and isinstance(data, dict) and data.get("code", 200) != 200:
+            # The router reports errors in the body of a 200 response
+            raise GoveeApiError(f"Govee API error {data.get('code')}: {data.get('msg')}")
+        return data
+
+    def _record_response(
+        self, response: aiohttp.ClientResponse
+    ) -> tuple[Optional[int], Optional[datetime]]:
+        """Count the request and update the limiter with the response headers.
+
+        Returns the remaining calls and reset time the headers announce.
+        """
+        remaining = reset_time = None
+        try:
+            if (value := response.headers.get("Rate-Limit-Remaining")) is not None:
+                remaining = int(value)
+            if (value := response.headers.get("Rate-Limit-Reset")) is not None:
+                reset_time = datetime.fromtimestamp(int(value))
+        except (ValueError, TypeError, OverflowError) as e:
+            _LOGGER.warning("Error updating rate limits: %s", str(e))
+
+        if self.rate_limiter is not None:
+            self.rate_limiter.increment_call_count()
+            if remaining is not None and reset_time is not None:
+                self.rate_limiter.update_api_limits(remaining, reset_time)
+        return remaining, reset_time
@@ -0,0 +1,114 @@
+"""Capabilities of Govee light models, shared by every device of a model."""
+from __future__ import annotations
+
+from typing import Any, Optional
+
+from homeassistant.components.light import ColorMode
+
+from .openapi import INSTANCE_BY_COMMAND
+
+# Color temperature range in Kelvin used when the device list reports none
+DEFAULT_MIN_COLOR_TEMP_KELVIN = 2000
+DEFAULT_MAX_COLOR_TEMP_KELVIN = 9000
+
+_COLOR_TEMP_INSTANCE = INSTANCE_BY_COMMAND["colorTem"][1]
+
+# Interned descriptors keyed by everything they are built from
+_DESCRIPTORS: dict[tuple, ModelCapabilities] = {}
+
+
+class ModelCapabilities:
+    """What a Govee light model supports, built once from the device list.
+
+    Descriptors are interned and shared by all lights of a model, so they
+    must not be modified.
+    """
+
+    __slots__ = (
+        "model",
+        "commands",
+        "color_modes",
+        "color_mode",
+        "min_color_temp_kelvin",
+        "max_color_temp_kelvin",
+        "retrievable",
+        "controllable",
+    )
+
+    def __init__(
+        self,
+        model: str,
+        commands: frozenset[str],
+        color_temp_range: Optional[tuple[int, int]],
+        retrievable: bool,
+        controllable: bool,
+    ) -> None:
+        """Initialize the descriptor."""
+        self.model = model
+        self.commands = commands
+        self.min_color_temp_kelvin, self.max_color_temp_kelvin = color_temp_range or (
+            DEFAULT_MIN_COLOR_TEMP_KELVIN,
+            DEFAULT_MAX_COLOR_TEMP_KELVIN,
+        )
+        self.retrievable = retrievable
+        self.controllable = controllable
+
+        color_modes = set()
+        if "color" in commands:
+            color_modes.add(ColorMode.RGB)
+        if "colorTem" in commands:
+            color_modes.add(ColorMode.COLOR_TEMP)
+        if "brightness" in commands and not color_modes:
+            color_modes.add(ColorMode.BRIGHTNESS)
+        # Without any specific mode the light can only be switched
+        self.color_modes = frozenset(color_modes or {ColorMode.ONOFF})
+        self.color_mode = (
+            ColorMode.RGB if ColorMode.RGB in self.color_modes
+            else ColorMode.COLOR_TEMP if ColorMode.COLOR_TEMP in self.color_modes
+            else ColorMode.BRIGHTNESS if ColorMode.BRIGHTNESS in self.color_modes
+            else ColorMode.ONOFF
+        )
+
+
+def _color_temp_range(device: dict[str, Any]) -> Optional[tuple[int, int]]:
+    """Return the color temperature range a device list entry reports.
+
+    The legacy API lists it under properties, the OpenAPI in the parameters
+    of the color temperature capability.
+    """
+    ranges = []
+    properties = device.get("properties")
+    if isinstance(properties, dict) and isinstance(properties.get("colorTem"), dict):
+        ranges.append(properties["colorTem"].get("range"))
+    for capability in device.get("capabilities") or ():
+        if isinstance(capability, dict) and capability.get("instance") == _COLOR_TEMP_INSTANCE:
+            ranges.append((capability.get("parameters") or {}).get("range"))
+    for value in ranges:
+        if not isinstance(value, dict):
+            continue
+        try:
+            low, high = int(value["min"]), int(value["max"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if 0 < low < high:
+            return low, high
+    return None
+
+
+def model_capabilities(device: dict[str, Any]) -> ModelCapabilities:
+    """Return the shared capability descriptor of a device list entry."""
+    commands = device.get("supportCmds")
+    key = (
+        device.get("model"),
+        tuple(commands) if isinstance(commands, list) else (),
+        _color_temp_range(device),
+        device.get("retrievable") is not False,
+        device.get("controllable") is not False,
+    )
+    descriptor = _DESCRIPTORS.get(key)
+    if descriptor is None:
+        model, commands, color_temp_range, retrievable, controllable = key
+        descriptor = _DESCRIPTORS[key] = ModelCapabilities(
+            model, frozenset(commands), color_temp_range, retrievable, controllable
+        )
+    return descriptor
@@ -0,0 +1,93 @@
+"""Circuit breaker for the Govee cloud API."""
+from __future__ import annotations
+
+import logging
+import time
+
+from .rate_limiter import RequestPriority
+
+_LOGGER = logging.getLogger(__name__)
+
+FAILURE_THRESHOLD = 5  # Consecutive failures, across devices, that open the circuit
+OPEN_TIMEOUT = 30  # Seconds the circuit stays open before the first probe
+MAX_OPEN_TIMEOUT = 600  # Upper bound for the open time after failed probes
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class GoveeCircuitBreaker:
+    """Stop background traffic while the Govee cloud is failing.
+
+    The circuit opens after FAILURE_THRESHOLD consecutive failed requests.
+    While it is open only control commands, which the user asked for, reach
+    the API. Once the open time is over a single probe request is let
+    through: success closes the circuit, failure opens it again for twice as
+    long.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the circuit breaker."""
+        self.state = STATE_CLOSED
+        self._failures = 0
+        self._open_timeout = OPEN_TIMEOUT
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    @property
+    def retry_after(self) -> float:
+        """Return the seconds until background requests may be sent again."""
+        if self.state != STATE_OPEN:
+            return 0
+        return max(0, self._opened_at + self._open_timeout - time.monotonic())
+
+    def allow_request(self, priority: RequestPriority) -> bool:
+        """Return True if a request may be sent now.
+
+        When the open time is over the first caller becomes the probe and
+        must report its outcome through record_success or record_failure.
+        """
+        if priority == RequestPriority.CONTROL or self.state == STATE_CLOSED:
+            return True
+        if self.state == STATE_OPEN and self.retry_after == 0:
+            self.state = STATE_HALF_OPEN
+        if self.state == STATE_HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        """Record a request the API answered."""
+        if self.state != STATE_CLOSED:
+            _LOGGER.info("Govee API is reachable again, resuming requests")
+        self.state = STATE_CLOSED
+        self._failures = 0
+        self._open_timeout = OPEN_TIMEOUT
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        """Record a request that failed because of the API or the network."""
+        self._failures += 1
+        if self.state == STATE_HALF_OPEN:
+            self._open_timeout = min(self._open_timeout * 2, MAX_OPEN_TIMEOUT)
+            self._open()
+        elif self.state == STATE_CLOSED and self._failures >= FAILURE_THRESHOLD:
+            _LOGGER.warning(
+                "Govee API failed %d times in a row, pausing requests for %d seconds",
+                self._failures,
+                self._open_timeout,
+            )
+            self._open()
+
+    def release(self) -> None:
+        """Give up a probe that ended without an outcome."""
+        if self._probe_in_flight and self.state == STATE_HALF_OPEN:
+            self.state = STATE_OPEN
+        self._probe_in_flight = False
+
+    def _open(self) -> None:
+        """Open the circuit."""
+        self.state = STATE_OPEN
+        self._opened_at = time.monotonic()
+        self._probe_in_flight = False
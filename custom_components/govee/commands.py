@@ -0,0 +1,115 @@
+"""Command pipeline for Govee devices."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+import logging
+from typing import Any, Optional
+
+_LOGGER = logging.getLogger(__name__)
+
+COMMAND_DEBOUNCE = 0.5  # Seconds to collect updates before the next send
+
+# Order in which Govee commands are sent within one batch
+COMMAND_ORDER = ("turn", "brightness", "color", "colorTem")
+
+# Commands that replace each other, only the latest one is kept
+EXCLUSIVE_COMMANDS = ({"color", "colorTem"},)
+
+
+def merge_commands(pending: dict[str, Any], commands: dict[str, Any]) -> dict[str, Any]:
+    """Merge new commands into pending ones so the latest of each wins."""
+    if commands.get("turn") == "off":
+        # Nothing queued before a turn off is worth sending
+        return {"turn": "off"}
+
+    merged = dict(pending)
+    if merged.get("turn") == "off":
+        merged["turn"] = "on"
+
+    for name in commands:
+        for group in EXCLUSIVE_COMMANDS:
+            if name in group:
+                for other in group - {name}:
+                    merged.pop(other, None)
+    merged.update(commands)
+    return merged
+
+
+class GoveeCommandPipeline:
+    """Coalesce and sequence the control commands of one device.
+
+    The first command after an idle period is sent right away. Commands
+    submitted while a batch is in flight, or within the debounce window after
+    it, are merged so that the latest value of each command wins and are sent
+    together as the next batch.
+    """
+
+    def __init__(
+        self,
+        send_command: Callable[[str, Any], Awaitable[None]],
+        debounce: float = COMMAND_DEBOUNCE,
+    ) -> None:
+        """Initialize the pipeline."""
+        self._send_command = send_command
+        self._debounce = debounce
+        self._pending: dict[str, Any] = {}
+        self._waiters: list[asyncio.Future] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._last_flush: Optional[float] = None
+
+    @property
+    def idle(self) -> bool:
+        """Return True when no batch is queued or being sent."""
+        return self._flush_handle is None and self._flush_task is None
+
+    async def async_send(self, commands: dict[str, Any]) -> None:
+        """Queue commands and wait until the batch containing them is sent."""
+        if not commands:
+            return
+
+        self._pending = merge_commands(self._pending, commands)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._waiters.append(future)
+
+        if self._flush_handle is None and self._flush_task is None:
+            delay = 0.0
+            if self._last_flush is not None:
+                delay = max(self._last_flush + self._debounce - loop.time(), 0.0)
+            self._flush_handle = loop.call_later(delay, self._start_flush)
+
+        await future
+
+    def _start_flush(self) -> None:
+        """Start sending the pending batch."""
+        self._flush_handle = None
+        self._flush_task = asyncio.get_running_loop().create_task(self._async_flush())
+
+    async def _async_flush(self) -> None:
+        """Send the pending batch in command order."""
+        pending, self._pending = self._pending, {}
+        waiters, self._waiters = self._waiters, []
+        error: Optional[Exception] = None
+
+        try:
+            for name in COMMAND_ORDER:
+                if name in pending:
+                    await self._send_command(name, pending[name])
+        except Exception as err:
+            error = err
+
+        for waiter in waiters:
+            if waiter.done():
+                continue
+            if error is None:
+                waiter.set_result(None)
+            else:
+                waiter.set_exception(error)
+
+        loop = asyncio.get_running_loop()
+        self._last_flush = loop.time()
+        self._flush_task = None
+        if self._waiters:
+            self._flush_handle = loop.call_later(self._debounce, self._start_flush)
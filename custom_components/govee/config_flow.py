@@ -1,6 +1,7 @@
 """Config flow for Govee integration."""
 from __future__ import annotations
 
+import asyncio
 import logging
 from typing import Any
 
@@ -13,6 +14,9 @@ from homeassistant.data_entry_flow import FlowResult
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
 from . import DOMAIN
+from .api import GoveeApiClient, GoveeApiError, GoveeAuthError, GoveeRateLimitReached
+from .const import CONF_EXTRA_API_KEYS, CONF_LAN_CONTROL, CONF_PUSH_UPDATES
+from .device_cache import GoveeDeviceCache
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -28,42 +32,40 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         errors = {}
 
         if user_input is not None:
+            # Extra keys are entered separated by commas or spaces
+            extra_api_keys = [
+                api_key
+                for api_key in user_input.get(CONF_EXTRA_API_KEYS, "").replace(",", " ").split()
+                if api_key != user_input[CONF_API_KEY]
+            ]
+            clients = [
+                GoveeApiClient(
+                    self.hass,
+                    api_key,
+                    session=async_get_clientsession(self.hass),
+                    openapi=user_input.get(CONF_PUSH_UPDATES, False),
+                )
+                for api_key in [user_input[CONF_API_KEY], *extra_api_keys]
+            ]
+            client = clients[0]
             try:
-                # Get the Home Assistant aiohttp client session
-                session = async_get_clientsession(self.hass)
-                
-                # Validate the API key by making a test request
-                headers = {"Govee-API-Key": user_input[CONF_API_KEY]}
-                async with session.get(
-                    "https://developer-api.govee.com/v1/devices",
-                    headers=headers,
-                    timeout=aiohttp.ClientTimeout(total=10)
-                ) as response:
-                    response_text = await response.text()
-                    _LOGGER.debug("Govee API Response: %s", response_text)
-                    
-                    if response.status == 401:
-                        _LOGGER.error("Invalid API key provided")
-                        errors["base"] = "invalid_api_key"
-                    elif response.status == 429:
-                        _LOGGER.error("Rate limit exceeded")
-                        errors["base"] = "rate_limit"
-                    elif response.status != 200:
-                        _LOGGER.error("API error: %s - %s", response.status, response_text)
-                        errors["base"] = "api_error"
-                    else:
-                        # Verify the response contains valid data
-                        data = await response.json()
-                        if "data" not in data or "devices" not in data["data"]:
-                            _LOGGER.error("Unexpected API response format: %s", data)
-                            errors["base"] = "invalid_response"
-                        else:
-                            return self.async_create_entry(
-                                title="Govee",
-                                data=user_input,
-                            )
-                        
-            except aiohttp.ClientTimeout:
+                # Validate the API keys by fetching their device lists
+                devices = await client.async_get_devices()
+                for extra_client in clients[1:]:
+                    await extra_client.async_get_devices()
+            except GoveeAuthError:
+                _LOGGER.error("Invalid API key provided")
+                errors["base"] = "invalid_api_key"
+            except GoveeRateLimitReached:
+                _LOGGER.error("Rate limit exceeded")
+                errors["base"] = "rate_limit"
+            except GoveeApiError as err:
+                _LOGGER.error("Unexpected API response format: %s", str(err))
+                errors["base"] = "invalid_response"
+            except aiohttp.ClientResponseError as err:
+                _LOGGER.error("API error: %s - %s", err.status, err.message)
+                errors["base"] = "api_error"
+            except asyncio.TimeoutError:
                 _LOGGER.error("Timeout connecting to Govee API")
                 errors["base"] = "timeout"
             except aiohttp.ClientError:
@@ -72,12 +74,22 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             except Exception as err:
                 _LOGGER.error("Unknown error occurred: %s", str(err))
                 errors["base"] = "unknown"
+            else:
+                # Seed the device cache so the first setup needs no extra call
+                await GoveeDeviceCache(self.hass, user_input[CONF_API_KEY]).async_save(devices)
+                return self.async_create_entry(
+                    title="Govee",
+                    data={**user_input, CONF_EXTRA_API_KEYS: extra_api_keys},
+                )
 
         return self.async_show_form(
             step_id="user",
             data_schema=vol.Schema(
                 {
                     vol.Required(CONF_API_KEY): str,
+                    vol.Optional(CONF_LAN_CONTROL, default=False): bool,
+                    vol.Optional(CONF_PUSH_UPDATES, default=False): bool,
+                    vol.Optional(CONF_EXTRA_API_KEYS, default=""): str,
                 }
             ),
             errors=errors,
@@ -1,2 +1,5 @@
 """Constants for the Govee integration."""
 DOMAIN = "govee"
+CONF_LAN_CONTROL = "lan_control"
+CONF_PUSH_UPDATES = "push_updates"
+CONF_EXTRA_API_KEYS = "extra_api_keys"
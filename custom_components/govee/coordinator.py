@@ -0,0 +1,526 @@
+"""Data update coordinator for Govee integration."""
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta
+from functools import partial
+import logging
+import random
+import time
+from typing import Any, Callable, Optional, Sequence
+
+import aiohttp
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+
+from .api import (
+    MAX_CONNECTIONS_PER_HOST,
+    GoveeApiClient,
+    GoveeApiError,
+    GoveeCircuitOpen,
+    GoveeRateLimitReached,
+)
+from .capabilities import ModelCapabilities, model_capabilities
+from .commands import COMMAND_ORDER
+from .circuit_breaker import STATE_OPEN
+from .const import DOMAIN
+from .lan import GoveeLanClient, GoveeLanError
+from .mqtt import GoveeMqttClient
+from .openapi import capabilities_to_properties
+from .rate_limiter import RequestPriority
+from .transition import MAX_TRANSITION_STEPS, MIN_STEP_INTERVAL
+
+_LOGGER = logging.getLogger(__name__)
+
+# Seconds the state set by a command is trusted over the cloud state
+COMMAND_TRUST_WINDOW = 10
+
+# Failed polls are retried with jittered exponential backoff
+RETRY_BASE_DELAY = 5
+RETRY_MAX_DELAY = 300
+# Failed retries in a row before a device is marked unavailable
+MAX_POLL_RETRIES = 3
+
+# Seconds between local state queries of a LAN device
+LAN_POLL_INTERVAL = 10
+
+# Seconds between consistency polls of a device while push events arrive
+PUSH_CONSISTENCY_INTERVAL = 30 * 60
+
+# Control commands in flight at once, one per pooled connection
+MAX_PARALLEL_COMMANDS = MAX_CONNECTIONS_PER_HOST
+
+
+class GoveeDataUpdateCoordinator(DataUpdateCoordinator[dict[str, dict[str, Any]]]):
+    """Poll the state of every Govee device of a config entry.
+
+    The coordinator data maps a device id to its state properties, keyed by
+    property name. A failed poll is retried with backoff and the device is
+    only left out once MAX_POLL_RETRIES retries failed as well. Each refresh
+    only polls the cloud devices the rate limiter says are due, and none at
+    all while the circuit breaker of the client is open.
+
+    Devices found on the local network are polled and controlled over the
+    LAN instead, without using cloud quota, and fall back to the cloud when
+    they stop answering. A cloud device that sent a push event is not polled
+    again until PUSH_CONSISTENCY_INTERVAL seconds after its last event.
+
+    With extra clients each device is served by one of the API keys that can
+    see it, balanced by the number of devices each key polls, so every key
+    adds its own daily budget.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        client: GoveeApiClient,
+        lan: Optional[GoveeLanClient] = None,
+        extra_clients: Sequence[GoveeApiClient] = (),
+    ) -> None:
+        """Initialize the coordinator."""
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=DOMAIN,
+            update_interval=timedelta(seconds=client.rate_limiter.polling_interval),
+        )
+        self.client = client
+        self.rate_limiter = client.rate_limiter
+        self.clients = [client, *extra_clients]
+        self._clients_by_key = {client.key_id: client for client in self.clients}
+        self._device_clients: dict[str, GoveeApiClient] = {}
+        self.devices: dict[str, dict[str, Any]] = {}
+        self._capabilities: dict[str, ModelCapabilities] = {}
+        self._trusted_until: dict[str, float] = {}
+        self._verify_unsubs: dict[str, CALLBACK_TYPE] = {}
+        self._failures: dict[str, int] = {}
+        self._retry_at: dict[str, float] = {}
+        self.lan = lan
+        self.lan_devices: dict[str, str] = {}
+        self._lan_polled: dict[str, float] = {}
+        self.push: Optional[GoveeMqttClient] = None
+        self._last_pushed: dict[str, float] = {}
+        self._command_slots = asyncio.Semaphore(MAX_PARALLEL_COMMANDS)
+        self._transition_cancels: dict[str, Callable[[], Any]] = {}
+
+    def set_devices(self, devices: list[dict[str, Any]]) -> None:
+        """Set the devices polled by the coordinator."""
+        self.devices = {device["device"]: device for device in devices}
+        self._capabilities = {
+            device_id: model_capabilities(device) for device_id, device in self.devices.items()
+        }
+        for device_id in set(self._failures) - set(self.devices):
+            self._failures.pop(device_id)
+            self._retry_at.pop(device_id, None)
+        self._update_cloud_devices()
+
+    def _update_cloud_devices(self) -> None:
+        """Assign devices to API keys and hand each limiter the devices it polls.
+
+        A device goes to the key seeing it that polls the fewest devices so
+        far. Devices listed without their keys use the first key.
+        """
+        polled: dict[str, list[str]] = {client.key_id: [] for client in self.clients}
+        self._device_clients = {}
+        for device_id, device in self.devices.items():
+            candidates = [
+                self._clients_by_key[key_id]
+                for key_id in device.get("key_ids", ())
+                if key_id in self._clients_by_key
+            ] or [self.client]
+            client = min(candidates, key=lambda client: len(polled[client.key_id]))
+            self._device_clients[device_id] = client
+            if self._capabilities[device_id].retrievable and device_id not in self.lan_devices:
+                polled[client.key_id].append(device_id)
+        for client in self.clients:
+            client.rate_limiter.update_devices(polled[client.key_id], self)
+
+    def _client_for(self, device_id: str) -> GoveeApiClient:
+        """Return the client whose API key serves a device."""
+        return self._device_clients.get(device_id, self.client)
+
+    def stagger_polls(self) -> None:
+        """Spread the first cloud polls of the devices across a polling interval."""
+        for client in self.clients:
+            client.rate_limiter.stagger_polls(
+                [device_id for device_id, owner in self._device_clients.items() if owner is client]
+            )
+
+    @callback
+    def async_restore_state(self, device_id: str, properties: dict[str, Any]) -> None:
+        """Use the state a device had before a restart until it is polled."""
+        if self.data is None:
+            self.data = {}
+        self.data.setdefault(device_id, properties)
+
+    async def async_scan_lan(self, _now: Optional[datetime] = None) -> None:
+        """Find the devices that can be reached on the local network."""
+        if self.lan is None:
+            return
+        try:
+            found = await self.lan.async_scan()
+        except GoveeLanError as err:
+            _LOGGER.debug("Error scanning for Govee LAN devices: %s", str(err))
+            return
+        if found.keys() - self.lan_devices.keys():
+            _LOGGER.info("Found %d Govee devices on the local network", len(found))
+        self.lan_devices = found
+        self._update_cloud_devices()
+
+    def _drop_lan_device(self, device_id: str, err: Exception) -> None:
+        """Fall back to the cloud for a device that stopped answering."""
+        _LOGGER.debug("Govee LAN device %s not answering, using the cloud: %s", device_id, str(err))
+        self.lan_devices.pop(device_id, None)
+        self._lan_polled.pop(device_id, None)
+        self._update_cloud_devices()
+
+    @callback
+    def async_handle_push(self, message: dict[str, Any]) -> None:
+        """Apply the state carried by a push event."""
+        device_id = message.get("device")
+        if device_id not in self.devices or self.data is None:
+            return
+        properties = capabilities_to_properties(message.get("capabilities") or [])
+        if not properties:
+            # Events such as warnings carry no light state
+            return
+        self.data[device_id] = {**self.data.get(device_id, {}), **properties}
+        self._last_pushed[device_id] = time.monotonic()
+        self._trusted_until.pop(device_id, None)
+        self.async_update_listeners()
+
+    async def async_control(self, device_id: str, model: str, name: str, value: Any) -> None:
+        """Send a control command over the LAN when possible, else the cloud.
+
+        At most MAX_PARALLEL_COMMANDS commands are in flight at once, across
+        all devices of the entry. A command waiting for the control window of
+        its device holds no slot, so it never delays other devices. Devices
+        listed as not controllable are never sent a command.
+        """
+        capabilities = self._capabilities.get(device_id)
+        if capabilities is not None and not capabilities.controllable:
+            raise GoveeApiError(f"Device {device_id} cannot be controlled")
+        if self.lan is not None and (ip := self.lan_devices.get(device_id)) is not None:
+            try:
+                async with self._command_slots:
+                    await self.lan.async_control(ip, name, value)
+                return
+            except GoveeLanError as err:
+                self._drop_lan_device(device_id, err)
+        await self._client_for(device_id).async_control(
+            device_id, model, name, value, slots=self._command_slots
+        )
+
+    async def async_set_many(
+        self, commands: dict[str, dict[str, Any]]
+    ) -> dict[str, Optional[str]]:
+        """Send commands to many devices at once.
+
+        The commands of each device are sent in order while devices are
+        served in parallel. Nothing is sent unless the daily budget can take
+        every cloud command. Returns None for each device whose commands were
+        sent, or the error that stopped them.
+        """
+        results: dict[str, Optional[str]] = {
+            device_id: "Unknown device" for device_id in commands if device_id not in self.devices
+        }
+        results.update(
+            (device_id, "Device cannot be controlled")
+            for device_id in commands
+            if device_id in self.devices and not self._capabilities[device_id].controllable
+        )
+        commands = {
+            device_id: device_commands
+            for device_id, device_commands in commands.items()
+            if device_id not in results and device_commands
+        }
+        cloud_calls: dict[str, int] = {}
+        for device_id, device_commands in commands.items():
+            if device_id not in self.lan_devices:
+                key_id = self._client_for(device_id).key_id
+                cloud_calls[key_id] = cloud_calls.get(key_id, 0) + len(device_commands)
+        for key_id, calls in cloud_calls.items():
+            if not self._clients_by_key[key_id].rate_limiter.has_budget(calls):
+                raise GoveeRateLimitReached(f"Not enough API calls left for {calls} commands")
+
+        async def _async_send(device_id: str, device_commands: dict[str, Any]) -> Optional[str]:
+            model = self.devices[device_id]["model"]
+            if (cancel := self._transition_cancels.get(device_id)) is not None:
+                cancel()
+            try:
+                for name in COMMAND_ORDER:
+                    if name in device_commands:
+                        await self.async_control(device_id, model, name, device_commands[name])
+            except (GoveeApiError, aiohttp.ClientError, asyncio.TimeoutError) as err:
+                return str(err) or type(err).__name__
+            return None
+
+        sent = await asyncio.gather(
+            *(_async_send(device_id, device_commands) for device_id, device_commands in commands.items())
+        )
+        results.update(zip(commands, sent))
+        self._apply_commands(
+            {device_id: commands[device_id] for device_id, error in zip(commands, sent) if error is None}
+        )
+        return results
+
+    @callback
+    def async_register_transition(self, device_id: str, cancel: Callable[[], Any]) -> CALLBACK_TYPE:
+        """Register how to stop the running transition of a device.
+
+        Commands sent around the light entity, such as bulk commands, stop
+        the transition first so its remaining steps do not undo them.
+        """
+        self._transition_cancels[device_id] = cancel
+
+        @callback
+        def _async_unregister() -> None:
+            if self._transition_cancels.get(device_id) is cancel:
+                del self._transition_cancels[device_id]
+
+        return _async_unregister
+
+    def transition_steps(self, device_id: str, duration: float, commands: int) -> int:
+        """Return how many steps a transition of a device may take.
+
+        Steps are at least MIN_STEP_INTERVAL seconds apart and there are at
+        most MAX_TRANSITION_STEPS of them. Over the cloud they also have to
+        fit the control window of the device and the daily budget left for
+        anything but interactive commands, so a fade never eats into the
+        reserve kept for them.
+        """
+        steps = min(MAX_TRANSITION_STEPS, int(duration / MIN_STEP_INTERVAL))
+        if self.lan is not None and device_id in self.lan_devices:
+            return max(steps, 1)
+        commands = max(commands, 1)
+        limiter = self._client_for(device_id).rate_limiter
+        steps = min(steps, limiter.control_capacity(device_id, duration) // commands)
+        while steps > 1 and not limiter.has_budget(steps * commands, RequestPriority.POLL):
+            steps -= 1
+        return max(steps, 1)
+
+    @callback
+    def _apply_commands(self, commands: dict[str, dict[str, Any]]) -> None:
+        """Set the state commanded to devices and trust it until verified."""
+        if self.data is None or not commands:
+            return
+        for device_id, device_commands in commands.items():
+            properties = dict(self.data.get(device_id, {}))
+            properties["powerState"] = device_commands.get("turn", "on")
+            for name in ("brightness", "color", "colorTem"):
+                if name in device_commands:
+                    properties[name] = device_commands[name]
+            self.data[device_id] = properties
+            self._trusted_until.pop(device_id, None)
+
+        # The lights read the new state before the trust windows start
+        self.async_update_listeners()
+        for device_id in commands:
+            self.async_trust_device(device_id)
+
+    def is_trusted(self, device_id: str) -> bool:
+        """Return True while a device keeps the state set by its last command."""
+        return device_id in self._trusted_until
+
+    @callback
+    def async_trust_device(self, device_id: str) -> None:
+        """Keep the optimistic state of a device after a successful command.
+
+        Polls skip the device for COMMAND_TRUST_WINDOW seconds, after which a
+        single verification read replaces the optimistic state. Devices whose
+        state the cloud cannot read are only verified over the LAN.
+        """
+        self._trusted_until[device_id] = time.monotonic() + COMMAND_TRUST_WINDOW
+        if unsub := self._verify_unsubs.pop(device_id, None):
+            unsub()
+        if not self._can_read_state(device_id):
+            return
+        self._verify_unsubs[device_id] = async_call_later(
+            self.hass,
+            COMMAND_TRUST_WINDOW,
+            partial(self._async_verify_device, device_id),
+        )
+
+    def _can_read_state(self, device_id: str) -> bool:
+        """Return True if the state of a device can be read over the LAN or the cloud."""
+        if self.lan is not None and device_id in self.lan_devices:
+            return True
+        capabilities = self._capabilities.get(device_id)
+        return capabilities is None or capabilities.retrievable
+
+    async def _async_verify_device(self, device_id: str, _now: datetime) -> None:
+        """Read the state of a device once its trust window is over."""
+        self._verify_unsubs.pop(device_id, None)
+        if (device := self.devices.get(device_id)) is None:
+            self._trusted_until.pop(device_id, None)
+            return
+
+        if not self._can_read_state(device_id):
+            return
+        try:
+            if self.lan is not None and (ip := self.lan_devices.get(device_id)) is not None:
+                properties = await self.lan.async_get_state(ip)
+            else:
+                properties = await self._client_for(device_id).async_get_state(
+                    device_id, device["model"], RequestPriority.VERIFY
+                )
+        except (GoveeApiError, GoveeLanError, aiohttp.ClientError, asyncio.TimeoutError) as err:
+            # The next regular poll takes over the verification
+            _LOGGER.debug("Error verifying Govee light %s: %s", device["deviceName"], str(err))
+            return
+
+        if properties is None or self.data is None:
+            return
+        self._trusted_until.pop(device_id, None)
+        self.data[device_id] = properties
+        self.async_update_listeners()
+
+    async def async_shutdown(self) -> None:
+        """Cancel pending verification reads."""
+        await super().async_shutdown()
+        for unsub in self._verify_unsubs.values():
+            unsub()
+        self._verify_unsubs.clear()
+
+    async def async_fetch_devices(self) -> list[dict[str, Any]]:
+        """Fetch the device list from the Govee API.
+
+        With several API keys the lists are merged and each device lists the
+        keys that can see it under key_ids.
+        """
+        if len(self.clients) == 1:
+            return await self.client.async_get_devices()
+
+        devices: dict[str, dict[str, Any]] = {}
+        for client in self.clients:
+            for device in await client.async_get_devices():
+                merged = devices.setdefault(device["device"], {**device, "key_ids": []})
+                merged["key_ids"].append(client.key_id)
+        return list(devices.values())
+
+    async def _async_update_data(self) -> dict[str, dict[str, Any]]:
+        """Fetch the state of all devices."""
+        data = {
+            device_id: properties
+            for device_id, properties in (self.data or {}).items()
+            if device_id in self.devices
+        }
+
+        now = time.monotonic()
+        # API keys whose remaining polls would be rejected as well
+        blocked: set[str] = set()
+        for device_id, device in self.devices.items():
+            if self._trusted_until.get(device_id, 0) > now:
+                # Just commanded, the cloud state is likely stale
+                continue
+            if self.lan is not None and (ip := self.lan_devices.get(device_id)) is not None:
+                last_poll = self._lan_polled.get(device_id)
+                if last_poll is not None and now - last_poll < LAN_POLL_INTERVAL:
+                    continue
+                try:
+                    data[device_id] = await self.lan.async_get_state(ip)
+                except GoveeLanError as err:
+                    self._drop_lan_device(device_id, err)
+                else:
+                    self._lan_polled[device_id] = now
+                    self._failures.pop(device_id, None)
+                    self._retry_at.pop(device_id, None)
+                    self._trusted_until.pop(device_id, None)
+                    continue
+            client = self._client_for(device_id)
+            if client.key_id in blocked or not self._capabilities[device_id].retrievable:
+                continue
+            if (
+                self.push is not None
+                and self.push.connected
+                and now - self._last_pushed.get(device_id, -PUSH_CONSISTENCY_INTERVAL)
+                < PUSH_CONSISTENCY_INTERVAL
+            ):
+                # Push events keep the state current, only check it rarely
+                continue
+            if device_id in self._retry_at:
+                if self._retry_at[device_id] > now:
+                    continue
+            elif not client.rate_limiter.is_poll_due(device_id):
+                continue
+            if not client.rate_limiter.has_budget(1, RequestPriority.POLL):
+                # Waiting for the budget would hold up the refresh until midnight
+                _LOGGER.debug("Polling budget used up, skipping remaining state updates")
+                blocked.add(client.key_id)
+                continue
+            try:
+                properties = await client.async_get_state(device_id, device["model"])
+            except (GoveeRateLimitReached, GoveeCircuitOpen) as err:
+                # The rest of the cloud polls of this key would be rejected as well
+                _LOGGER.warning("Skipping remaining state updates: %s", str(err))
+                blocked.add(client.key_id)
+                continue
+            except (GoveeApiError, aiohttp.ClientError, asyncio.TimeoutError) as err:
+                self._schedule_retry(device_id, data, err)
+                continue
+
+            if properties is None:
+                data.pop(device_id, None)
+            else:
+                client.rate_limiter.record_poll(
+                    device_id, device_id in data and data[device_id] != properties
+                )
+                data[device_id] = properties
+                self._trusted_until.pop(device_id, None)
+            self._failures.pop(device_id, None)
+            self._retry_at.pop(device_id, None)
+
+        # Wake up when the next device of a key is due or needs a retry, but
+        # not before the circuit breaker of that key lets requests through
+        now = time.monotonic()
+        delays = []
+        for client in self.clients:
+            delay = client.rate_limiter.next_poll_delay()
+            retries = [
+                retry_at
+                for device_id, retry_at in self._retry_at.items()
+                if self._client_for(device_id) is client
+            ]
+            if retries:
+                delay = min(delay, min(retries) - now)
+            delays.append(max(delay, client.circuit_breaker.retry_after))
+        delay = max(min(delays), 1)
+        if self.lan_devices:
+            delay = min(delay, LAN_POLL_INTERVAL)
+        self.update_interval = timedelta(seconds=delay)
+
+        failing = {
+            client.key_id for client in self.clients if client.circuit_breaker.state == STATE_OPEN
+        }
+        if failing:
+            # Only devices on the LAN or behind a working key are still
+            # known to be reachable
+            data = {
+                device_id: properties
+                for device_id, properties in data.items()
+                if device_id in self.lan_devices
+                or self._client_for(device_id).key_id not in failing
+            }
+            if not data:
+                raise UpdateFailed("Govee API is failing, polling is paused")
+        return data
+
+    def _schedule_retry(
+        self, device_id: str, data: dict[str, dict[str, Any]], err: Exception
+    ) -> None:
+        """Retry a failed poll and drop the device once retries are exhausted."""
+        failures = self._failures.get(device_id, 0) + 1
+        self._failures[device_id] = failures
+        delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** (failures - 1))
+        # Jitter keeps the retries of many devices from arriving together
+        self._retry_at[device_id] = time.monotonic() + random.uniform(delay / 2, delay)
+
+        name = self.devices[device_id].get("deviceName", device_id)
+        if failures <= MAX_POLL_RETRIES:
+            _LOGGER.debug("Error updating Govee light %s, retrying: %s", name, str(err))
+            return
+        if failures == MAX_POLL_RETRIES + 1:
+            _LOGGER.error("Error updating Govee light %s: %s", name, str(err))
+        data.pop(device_id, None)
@@ -0,0 +1,52 @@
+"""Persistent device list cache for Govee integration."""
+from __future__ import annotations
+
+import hashlib
+import logging
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+
+
+def api_key_hash(api_key: str) -> str:
+    """Return a stable identifier for an API key that does not reveal it."""
+    return hashlib.sha256(api_key.encode()).hexdigest()[:16]
+
+
+class GoveeDeviceCache:
+    """Keep the Govee device list of an API key on disk.
+
+    The cache is keyed by API key rather than config entry so the config
+    flow can seed it before the entry exists.
+    """
+
+    def __init__(self, hass: HomeAssistant, api_key: str) -> None:
+        """Initialize the cache."""
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.devices.{api_key_hash(api_key)}"
+        )
+        self.devices: list[dict[str, Any]] = []
+
+    async def async_load(self) -> list[dict[str, Any]]:
+        """Load the cached device list."""
+        data = await self._store.async_load()
+        if isinstance(data, dict) and isinstance(data.get("devices"), list):
+            self.devices = data["devices"]
+        return self.devices
+
+    async def async_save(self, devices: list[dict[str, Any]]) -> None:
+        """Replace the cached device list."""
+        self.devices = devices
+        await self._store.async_save({"devices": devices})
+
+    async def async_remove(self) -> None:
+        """Remove the cached device list."""
+        self.devices = []
+        await self._store.async_remove()
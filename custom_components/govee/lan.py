@@ -0,0 +1,153 @@
+"""Local LAN control of Govee devices over UDP."""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from typing import Any, Optional
+
+_LOGGER = logging.getLogger(__name__)
+
+LAN_MULTICAST_ADDRESS = "239.255.255.250"
+LAN_SCAN_PORT = 4001  # Devices listen for scans on the multicast group
+LAN_LISTEN_PORT = 4002  # Devices answer scans and status queries here
+LAN_COMMAND_PORT = 4003  # Devices accept commands on their own address
+LAN_SCAN_TIMEOUT = 2  # Seconds to collect scan answers
+LAN_REQUEST_TIMEOUT = 1  # Seconds to wait for a status answer
+
+
+class GoveeLanError(Exception):
+    """Raised when a device does not answer on the LAN."""
+
+
+def lan_state_to_properties(data: dict[str, Any]) -> dict[str, Any]:
+    """Convert a devStatus answer to the cloud state properties."""
+    properties: dict[str, Any] = {}
+    if "onOff" in data:
+        properties["powerState"] = "on" if data["onOff"] else "off"
+    if "brightness" in data:
+        properties["brightness"] = data["brightness"]
+    if isinstance(data.get("color"), dict):
+        properties["color"] = data["color"]
+    if data.get("colorTemInKelvin"):
+        properties["colorTem"] = data["colorTemInKelvin"]
+    return properties
+
+
+def command_to_lan_message(name: str, value: Any) -> dict[str, Any]:
+    """Convert a cloud control command to a LAN message."""
+    if name == "turn":
+        return {"cmd": "turn", "data": {"value": 1 if value == "on" else 0}}
+    if name == "brightness":
+        return {"cmd": "brightness", "data": {"value": value}}
+    if name == "color":
+        return {"cmd": "colorwc", "data": {"color": value, "colorTemInKelvin": 0}}
+    if name == "colorTem":
+        return {
+            "cmd": "colorwc",
+            "data": {"color": {"r": 0, "g": 0, "b": 0}, "colorTemInKelvin": value},
+        }
+    raise ValueError(f"Unsupported LAN command: {name}")
+
+
+class GoveeLanClient(asyncio.DatagramProtocol):
+    """Discover, poll and control Govee devices with the local UDP protocol.
+
+    One socket bound to the listen port sends every message and receives
+    the answers, which devices send back to the port the query came from.
+    LAN requests cost no cloud quota.
+    """
+
+    def __init__(
+        self,
+        listen_host: str = "0.0.0.0",
+        listen_port: int = LAN_LISTEN_PORT,
+        scan_address: tuple[str, int] = (LAN_MULTICAST_ADDRESS, LAN_SCAN_PORT),
+        command_port: int = LAN_COMMAND_PORT,
+    ) -> None:
+        """Initialize the client."""
+        self._listen_addr = (listen_host, listen_port)
+        self._scan_address = scan_address
+        self._command_port = command_port
+        self._transport: Optional[asyncio.DatagramTransport] = None
+        self._scan_results: Optional[dict[str, str]] = None
+        self._status_waiters: dict[str, asyncio.Future] = {}
+
+    async def async_start(self) -> None:
+        """Open the UDP socket."""
+        loop = asyncio.get_running_loop()
+        await loop.create_datagram_endpoint(lambda: self, local_addr=self._listen_addr)
+
+    async def async_stop(self) -> None:
+        """Close the UDP socket."""
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        """Keep the transport of the socket."""
+        self._transport = transport
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        """Fail pending status queries when the socket closes."""
+        self._transport = None
+        for future in self._status_waiters.values():
+            if not future.done():
+                future.set_exception(GoveeLanError("LAN socket closed"))
+        self._status_waiters.clear()
+
+    def datagram_received(self, data: bytes, addr: tuple[str, int]) -> None:
+        """Dispatch an answer from a device."""
+        try:
+            message = json.loads(data)["msg"]
+            cmd = message["cmd"]
+            payload = message["data"]
+        except (ValueError, KeyError, TypeError):
+            _LOGGER.debug("Ignoring invalid LAN message from %s: %s", addr[0], data)
+            return
+
+        if cmd == "scan" and self._scan_results is not None:
+            if "device" in payload:
+                self._scan_results[payload["device"]] = payload.get("ip", addr[0])
+        elif cmd == "devStatus":
+            future = self._status_waiters.pop(addr[0], None)
+            if future is not None and not future.done():
+                future.set_result(payload)
+
+    async def async_scan(self, timeout: float = LAN_SCAN_TIMEOUT) -> dict[str, str]:
+        """Return the address of every device answering a scan, by device id."""
+        self._scan_results = {}
+        try:
+            self._send(
+                {"cmd": "scan", "data": {"account_topic": "reserve"}}, self._scan_address
+            )
+            await asyncio.sleep(timeout)
+            return self._scan_results
+        finally:
+            self._scan_results = None
+
+    async def async_get_state(
+        self, ip: str, timeout: float = LAN_REQUEST_TIMEOUT
+    ) -> dict[str, Any]:
+        """Query the state of a device, as cloud state properties."""
+        future = self._status_waiters.get(ip)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._status_waiters[ip] = future
+            self._send({"cmd": "devStatus", "data": {}}, (ip, self._command_port))
+        try:
+            data = await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError as err:
+            self._status_waiters.pop(ip, None)
+            raise GoveeLanError(f"No status answer from {ip}") from err
+        return lan_state_to_properties(data)
+
+    async def async_control(self, ip: str, name: str, value: Any) -> None:
+        """Send a control command to a device."""
+        self._send(command_to_lan_message(name, value), (ip, self._command_port))
+
+    def _send(self, message: dict[str, Any], addr: tuple[str, int]) -> None:
+        """Send a message to an address."""
+        if self._transport is None:
+            raise GoveeLanError("LAN socket is not open")
+        self._transport.sendto(json.dumps({"msg": message}).encode(), addr)
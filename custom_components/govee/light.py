@@ -4,13 +4,13 @@ from __future__ import annotations
 import logging
 import asyncio
 from typing import Any
-from datetime import datetime, timedelta
 
 import aiohttp
 from homeassistant.components.light import (
     ATTR_BRIGHTNESS,
     ATTR_RGB_COLOR,
     ATTR_COLOR_TEMP_KELVIN,
+    ATTR_TRANSITION,
     ColorMode,
     LightEntity,
     LightEntityFeature,
@@ -20,157 +20,207 @@ from homeassistant.util.color import (
     color_temperature_kelvin_to_mired,
     color_temperature_mired_to_kelvin,
 )
-from homeassistant.const import CONF_API_KEY
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.const import STATE_ON, STATE_OFF
+from homeassistant.core import HomeAssistant, State, callback
+from homeassistant.exceptions import PlatformNotReady
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.restore_state import RestoreEntity
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from . import DOMAIN
+from .api import GoveeApiError, GoveeRateLimitReached
+from .capabilities import model_capabilities
+from .commands import GoveeCommandPipeline
+from .coordinator import GoveeDataUpdateCoordinator
+from .device_cache import GoveeDeviceCache
+from .transition import plan_transition
 
 _LOGGER = logging.getLogger(__name__)
 
+
 async def async_setup_entry(
     hass: HomeAssistant,
     entry: ConfigEntry,
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up Govee light devices."""
-    api_key = entry.data[CONF_API_KEY]
-    rate_limiter = hass.data[DOMAIN][entry.entry_id]["rate_limiter"]
-    session = async_get_clientsession(hass)
+    coordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+    device_cache = hass.data[DOMAIN][entry.entry_id]["device_cache"]
+
+    cached_devices = await device_cache.async_load()
+    if cached_devices:
+        # Create entities from the cache right away and refresh in the background
+        _LOGGER.info("Loaded %d Govee devices from cache", len(cached_devices))
+        lights = _async_create_lights(coordinator, entry, cached_devices)
+        # The lights restore their last state, so their first polls can wait
+        coordinator.stagger_polls()
+        async_add_entities(lights)
+        entry.async_create_background_task(
+            hass,
+            _async_refresh_devices(coordinator, entry, device_cache, async_add_entities),
+            "govee device refresh",
+        )
+        return
 
     try:
-        # Get the list of devices from Govee API
-        headers = {"Govee-API-Key": api_key}
-        async with session.get(
-            "https://developer-api.govee.com/v1/devices",
-            headers=headers,
-            timeout=aiohttp.ClientTimeout(total=10)
-        ) as response:
-            if response.status == 429:  # Rate limit reached
-                _LOGGER.warning("Rate limit reached during device setup, will retry later")
-                return
-
-            response.raise_for_status()
-            
-            # Update rate limiter with API response headers
-            remaining = response.headers.get("Rate-Limit-Remaining")
-            reset_time = response.headers.get("Rate-Limit-Reset")
-            if remaining and reset_time:
-                try:
-                    rate_limiter.update_api_limits(
-                        int(remaining),
-                        datetime.fromtimestamp(int(reset_time))
-                    )
-                except (ValueError, TypeError) as e:
-                    _LOGGER.warning("Error updating rate limits: %s", str(e))
-            
-            await rate_limiter.increment_call_count()
-            
-            data = await response.json()
-            if not isinstance(data, dict) or "data" not in data or "devices" not in data["data"]:
-                _LOGGER.error("Invalid response from Govee API: %s", data)
-                return
-                
-            devices = data["data"]["devices"]
-            if not devices:
-                _LOGGER.warning("No devices found in Govee API response")
-                return
-
-            # Update device count in rate limiter
-            await rate_limiter.update_device_count(len(devices))
-            _LOGGER.info("Found %d Govee devices", len(devices))
-
-            # Create light entities for each device
-            lights = []
-            for device in devices:
-                if not all(k in device for k in ["device", "model", "deviceName"]):
-                    _LOGGER.warning("Invalid device info received: %s", device)
-                    continue
-                    
-                light = GoveeLight(hass, entry, device)
-                lights.append(light)
-                _LOGGER.info("Added Govee light: %s", device["deviceName"])
-
-            if lights:
-                async_add_entities(lights)
-                _LOGGER.info("Successfully added %d Govee lights", len(lights))
-            else:
-                _LOGGER.warning("No valid Govee lights found to add")
-
-    except aiohttp.ClientError as err:
-        _LOGGER.error("Error getting devices from Govee API: %s", str(err))
-    except Exception as err:
-        _LOGGER.error("Unexpected error setting up Govee lights: %s", str(err))
-
-class GoveeLight(LightEntity):
+        devices = await coordinator.async_fetch_devices()
+    except GoveeRateLimitReached as err:
+        raise PlatformNotReady("Rate limit reached during device setup") from err
+    except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+        raise PlatformNotReady(f"Error getting devices from Govee API: {err}") from err
+    except GoveeApiError as err:
+        _LOGGER.error(str(err))
+        return
+
+    if not devices:
+        _LOGGER.warning("No devices found in Govee API response")
+        return
+
+    await device_cache.async_save(devices)
+    _LOGGER.info("Found %d Govee devices", len(devices))
+
+    lights = _async_create_lights(coordinator, entry, devices)
+    if lights:
+        # Fetch the initial state so entities start with real values
+        await coordinator.async_refresh()
+        async_add_entities(lights)
+        _LOGGER.info("Successfully added %d Govee lights", len(lights))
+    else:
+        _LOGGER.warning("No valid Govee lights found to add")
+
+
+@callback
+def _async_create_lights(
+    coordinator: GoveeDataUpdateCoordinator,
+    entry: ConfigEntry,
+    devices: list[dict[str, Any]],
+) -> list[GoveeLight]:
+    """Create light entities for the devices not polled yet."""
+    lights = []
+    valid_devices = list(coordinator.devices.values())
+    for device in devices:
+        if not all(k in device for k in ["device", "model", "deviceName"]):
+            _LOGGER.warning("Invalid device info received: %s", device)
+            continue
+        if device["device"] in coordinator.devices:
+            continue
+
+        lights.append(GoveeLight(coordinator, entry, device))
+        valid_devices.append(device)
+        _LOGGER.info("Added Govee light: %s", device["deviceName"])
+
+    coordinator.set_devices(valid_devices)
+    return lights
+
+
+async def _async_refresh_devices(
+    coordinator: GoveeDataUpdateCoordinator,
+    entry: ConfigEntry,
+    device_cache: GoveeDeviceCache,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Poll the cached devices, then sync the cache with the cloud device list."""
+    await coordinator.async_refresh()
+
+    try:
+        devices = await coordinator.async_fetch_devices()
+    except (GoveeApiError, aiohttp.ClientError, asyncio.TimeoutError) as err:
+        _LOGGER.warning("Could not refresh the Govee device list, using cache: %s", str(err))
+        return
+
+    await device_cache.async_save(devices)
+
+    cloud_ids = {device.get("device") for device in devices}
+    for device_id, device in list(coordinator.devices.items()):
+        if device_id not in cloud_ids:
+            # Leave the entity in place, it becomes unavailable
+            _LOGGER.warning("Govee device %s is no longer reported by the cloud", device["deviceName"])
+    coordinator.set_devices(
+        [device for device in devices if device.get("device") in coordinator.devices]
+    )
+
+    lights = _async_create_lights(coordinator, entry, devices)
+    if lights:
+        async_add_entities(lights)
+        _LOGGER.info("Added %d new Govee lights", len(lights))
+        await coordinator.async_refresh()
+
+def _state_to_properties(state: State) -> dict[str, Any] | None:
+    """Convert a restored light state to Govee state properties."""
+    if state.state not in (STATE_ON, STATE_OFF):
+        return None
+    properties: dict[str, Any] = {"powerState": state.state}
+    if (brightness := state.attributes.get(ATTR_BRIGHTNESS)) is not None:
+        properties["brightness"] = round(brightness * 100 / 255)
+    if (rgb := state.attributes.get(ATTR_RGB_COLOR)) is not None:
+        properties["color"] = {"r": rgb[0], "g": rgb[1], "b": rgb[2]}
+    if (kelvin := state.attributes.get(ATTR_COLOR_TEMP_KELVIN)) is not None:
+        properties["colorTem"] = kelvin
+    return properties
+
+
+class GoveeLight(CoordinatorEntity[GoveeDataUpdateCoordinator], LightEntity, RestoreEntity):
     """Representation of a Govee Light."""
 
-    def __init__(self, hass: HomeAssistant, config_entry: ConfigEntry, device_info: dict) -> None:
+    _attr_should_poll = False
+    _attr_assumed_state = False
+    _attr_supported_features = LightEntityFeature.TRANSITION
+
+    def __init__(
+        self,
+        coordinator: GoveeDataUpdateCoordinator,
+        config_entry: ConfigEntry,
+        device_info: dict,
+    ) -> None:
         """Initialize the light."""
-        self.hass = hass
-        self._entry_id = config_entry.entry_id
-        self._api_key = config_entry.data[CONF_API_KEY]
-        self._device = device_info
+        super().__init__(coordinator)
+        self.hass = coordinator.hass
         self._attr_name = device_info["deviceName"]
-        self._attr_unique_id = device_info["device"]
-        self._device_id = device_info["device"]
-        self._model = device_info["model"]
-        self._attr_should_poll = True
-        self._attr_assumed_state = False
-        self._last_update = None
-        self._update_lock = asyncio.Lock()
-        self._update_listeners = []
-        
-        # Set up polling interval (1 minute)
-        self._scan_interval = timedelta(minutes=1)
-        
-        # Minimum time between auto updates (2 seconds)
-        self._min_update_interval = timedelta(seconds=2)
+        self._attr_unique_id = self._device_id = device_info["device"]
+        self._command_pipeline = GoveeCommandPipeline(self._async_send_command)
+
         self._state = None
         self._brightness = None
         self._color = None
         self._color_temp = None
         self._available = True
-        self._attr_should_poll = True
-        
-        # Define color temperature range (in Kelvin)
-        self._attr_min_color_temp_kelvin = 2000  # Warm white
-        self._attr_max_color_temp_kelvin = 9000  # Cool white
-        
-        # Set supported features based on device capabilities
-        self._attr_supported_color_modes = set()
-        
-        # Get device capabilities from supportCmds if available
-        commands = device_info.get("supportCmds", [])
-        if isinstance(commands, list):
-            if "color" in commands:
-                self._attr_supported_color_modes.add(ColorMode.RGB)
-            if "colorTem" in commands:
-                self._attr_supported_color_modes.add(ColorMode.COLOR_TEMP)
-            if "brightness" in commands:
-                if not self._attr_supported_color_modes:
-                    self._attr_supported_color_modes.add(ColorMode.BRIGHTNESS)
-            
-        # If no specific modes are supported, default to ON/OFF
-        if not self._attr_supported_color_modes:
-            self._attr_supported_color_modes = {ColorMode.ONOFF}
-            self._attr_color_mode = ColorMode.ONOFF
-        else:
-            # Set the current color mode based on capabilities
-            self._attr_color_mode = (
-                ColorMode.RGB if ColorMode.RGB in self._attr_supported_color_modes
-                else ColorMode.BRIGHTNESS if ColorMode.BRIGHTNESS in self._attr_supported_color_modes
-                else ColorMode.ONOFF
-            )
-        
-        # Initialize features - using proper color modes instead of deprecated features
-        self._attr_supported_features = 0  # No additional features beyond color modes
+        # State last written to Home Assistant and the writes skipped as unchanged
+        self._written_state: tuple | None = None
+        self.skipped_writes = 0
+        # Sends the remaining steps of a running transition
+        self._transition: asyncio.Task | None = None
+        # Turned off by a fade, the device kept the last brightness of the fade
+        self._faded_out = False
+
+        # Shared by every light of the model, only read from here on
+        self._capabilities = capabilities = model_capabilities(device_info)
+        self._attr_supported_color_modes = capabilities.color_modes
+        self._attr_color_mode = capabilities.color_mode
+        self._attr_min_color_temp_kelvin = capabilities.min_color_temp_kelvin
+        self._attr_max_color_temp_kelvin = capabilities.max_color_temp_kelvin
 
     @property
     def available(self) -> bool:
         """Return if light is available."""
-        return self._available
+        return super().available and self._available
+
+    async def async_added_to_hass(self) -> None:
+        """Apply the state already fetched by the coordinator.
+
+        Until the device is first polled, the state it had before Home
+        Assistant restarted is shown.
+        """
+        await super().async_added_to_hass()
+        if (
+            self._device_id not in (self.coordinator.data or {})
+            and (last_state := await self.async_get_last_state()) is not None
+            and (properties := _state_to_properties(last_state)) is not None
+        ):
+            self.coordinator.async_restore_state(self._device_id, properties)
+        self._update_from_coordinator()
+        self.async_on_remove(
+            self.coordinator.async_register_transition(self._device_id, self._cancel_transition)
+        )
 
     @property
     def is_on(self) -> bool | None:
@@ -194,150 +244,209 @@ class GoveeLight(LightEntity):
 
     async def async_turn_on(self, **kwargs: Any) -> None:
         """Turn on the light."""
-        session = async_get_clientsession(self.hass)
-        headers = {"Govee-API-Key": self._api_key}
-        url = "https://developer-api.govee.com/v1/devices/control"
-        
-        command = {
-            "device": self._device_id,
-            "model": self._model,
-            "cmd": {
-                "name": "turn",
-                "value": "on"
-            }
-        }
+        commands: dict[str, Any] = {}
+        # Skipping unchanged values is only safe when nothing is in flight
+        idle = not self._cancel_transition() and self._command_pipeline.idle
 
-        if ATTR_BRIGHTNESS in kwargs:
-            brightness = int(kwargs[ATTR_BRIGHTNESS] / 255 * 100)
-            command["cmd"] = {
-                "name": "brightness",
-                "value": brightness
-            }
+        if ATTR_BRIGHTNESS in kwargs and (not idle or kwargs[ATTR_BRIGHTNESS] != self._brightness):
+            commands["brightness"] = int(kwargs[ATTR_BRIGHTNESS] / 255 * 100)
 
-        if ATTR_RGB_COLOR in kwargs:
-            command["cmd"] = {
-                "name": "color",
-                "value": {
-                    "r": kwargs[ATTR_RGB_COLOR][0],
-                    "g": kwargs[ATTR_RGB_COLOR][1],
-                    "b": kwargs[ATTR_RGB_COLOR][2]
-                }
+        if ATTR_RGB_COLOR in kwargs and (not idle or tuple(kwargs[ATTR_RGB_COLOR]) != self._color):
+            commands["color"] = {
+                "r": kwargs[ATTR_RGB_COLOR][0],
+                "g": kwargs[ATTR_RGB_COLOR][1],
+                "b": kwargs[ATTR_RGB_COLOR][2]
             }
 
         if ATTR_COLOR_TEMP_KELVIN in kwargs:
             temp_kelvin = kwargs[ATTR_COLOR_TEMP_KELVIN]
-            if self._attr_min_color_temp_kelvin <= temp_kelvin <= self._attr_max_color_temp_kelvin:
-                command["cmd"] = {
-                    "name": "colorTemp",
-                    "value": temp_kelvin
-                }
+            if (
+                self._attr_min_color_temp_kelvin <= temp_kelvin <= self._attr_max_color_temp_kelvin
+                and (not idle or temp_kelvin != self._color_temp)
+            ):
+                commands["colorTem"] = temp_kelvin
+
+        if self._faded_out and "brightness" not in commands and self._brightness:
+            # Undo the dimming of the fade that turned the light off
+            commands["brightness"] = int(self._brightness / 255 * 100)
+
+        # Only power the light on when it is not already on
+        if self._state is not True or not commands:
+            commands["turn"] = "on"
+
+        steps = [commands]
+        if kwargs.get(ATTR_TRANSITION) and ColorMode.ONOFF not in self._attr_supported_color_modes:
+            if self._state is not True and "brightness" not in commands and self._brightness:
+                # Fade in to the brightness the light had
+                commands["brightness"] = int(self._brightness / 255 * 100)
+            steps = self._plan_transition(commands, kwargs[ATTR_TRANSITION])
 
         try:
-            async with session.put(url, headers=headers, json=command) as response:
-                response.raise_for_status()
-                self._state = True
-                if ATTR_BRIGHTNESS in kwargs:
-                    self._brightness = kwargs[ATTR_BRIGHTNESS]
-                if ATTR_RGB_COLOR in kwargs:
-                    self._color = kwargs[ATTR_RGB_COLOR]
-                if ATTR_COLOR_TEMP_KELVIN in kwargs:
-                    self._color_temp = kwargs[ATTR_COLOR_TEMP_KELVIN]
+            await self._command_pipeline.async_send(steps[0])
+            self.coordinator.async_trust_device(self._device_id)
+            self._start_transition(steps[1:], kwargs.get(ATTR_TRANSITION, 0))
+            self._state = True
+            self._faded_out = False
+            if ATTR_BRIGHTNESS in kwargs:
+                self._brightness = kwargs[ATTR_BRIGHTNESS]
+            if ATTR_RGB_COLOR in kwargs:
+                self._color = tuple(kwargs[ATTR_RGB_COLOR])
+            if ATTR_COLOR_TEMP_KELVIN in kwargs:
+                self._color_temp = kwargs[ATTR_COLOR_TEMP_KELVIN]
         except Exception as e:
+            # Availability follows the polls, a failed command leaves it alone
             _LOGGER.error("Error turning on Govee light %s: %s", self._attr_name, str(e))
-            self._available = False
+        self._async_write_state()
 
     async def async_turn_off(self, **kwargs: Any) -> None:
-        """Turn off the light."""
-        session = async_get_clientsession(self.hass)
-        headers = {"Govee-API-Key": self._api_key}
-        url = "https://developer-api.govee.com/v1/devices/control"
-        
-        command = {
-            "device": self._device_id,
-            "model": self._model,
-            "cmd": {
-                "name": "turn",
-                "value": "off"
-            }
-        }
+        """Turn off the light, fading it out first when given a transition."""
+        self._cancel_transition()
+        steps: list[dict[str, Any]] = [{"turn": "off"}]
+        if (
+            kwargs.get(ATTR_TRANSITION)
+            and self._state
+            and self._brightness
+            and ColorMode.ONOFF not in self._attr_supported_color_modes
+        ):
+            # Dim down, the step that would reach zero turns the light off
+            fade = plan_transition(
+                {"brightness": int(self._brightness / 255 * 100)},
+                {"brightness": 0},
+                self.coordinator.transition_steps(self._device_id, kwargs[ATTR_TRANSITION], 1),
+            )
+            steps = fade[:-1] + steps
 
         try:
-            async with session.put(url, headers=headers, json=command) as response:
-                response.raise_for_status()
-                self._state = False
+            await self._command_pipeline.async_send(steps[0])
+            self.coordinator.async_trust_device(self._device_id)
+            self._start_transition(steps[1:], kwargs.get(ATTR_TRANSITION, 0))
+            self._state = False
+            # The brightness from before the fade is restored on the next turn on
+            self._faded_out = len(steps) > 1
         except Exception as e:
             _LOGGER.error("Error turning off Govee light %s: %s", self._attr_name, str(e))
-            self._available = False
+        self._async_write_state()
 
-    async def async_update(self) -> None:
-        """Fetch new state data for this light."""
-        rate_limiter = self.hass.data[DOMAIN][self._entry_id]["rate_limiter"]
-        
-        if not await rate_limiter.can_make_request():
-            _LOGGER.debug("Rate limit reached for %s, skipping update", self._attr_name)
-            return
-            
-        session = async_get_clientsession(self.hass)
-        headers = {"Govee-API-Key": self._api_key}
-        url = f"https://developer-api.govee.com/v1/devices/state?device={self._device_id}&model={self._model}"
+    def _plan_transition(self, target: dict[str, Any], duration: float) -> list[dict[str, Any]]:
+        """Split the commands reaching a target into the steps of a transition.
+
+        The number of steps depends on the budget left for the device, so a
+        fade costs at most MAX_TRANSITION_STEPS steps of commands.
+        """
+        start: dict[str, Any] = {}
+        if self._state is not True:
+            start["brightness"] = 0
+        elif self._brightness is not None:
+            start["brightness"] = int(self._brightness / 255 * 100)
+        if self._color is not None:
+            start["color"] = {"r": self._color[0], "g": self._color[1], "b": self._color[2]}
+        if self._color_temp is not None:
+            start["colorTem"] = self._color_temp
+        faded = sum(name in start for name in target)
+        steps = self.coordinator.transition_steps(self._device_id, duration, faded)
+        return plan_transition(start, target, steps)
 
+    def _start_transition(self, steps: list[dict[str, Any]], duration: float) -> None:
+        """Send the remaining steps of a transition in the background.
+
+        The first step went out right away, the remaining ones are spread so
+        the last of them lands when the transition ends.
+        """
+        if steps:
+            self._transition = self.hass.async_create_background_task(
+                self._async_run_transition(steps, duration / len(steps)),
+                f"govee transition {self._device_id}",
+            )
+
+    def _cancel_transition(self) -> bool:
+        """Stop a running transition, returning True if there was one."""
+        if self._transition is None:
+            return False
+        self._transition.cancel()
+        self._transition = None
+        return True
+
+    async def _async_run_transition(self, steps: list[dict[str, Any]], interval: float) -> None:
+        """Send the steps of a transition an interval apart."""
         try:
-            async with session.get(url, headers=headers) as response:
-                # Update rate limiter with response headers
-                remaining = response.headers.get("Rate-Limit-Remaining")
-                reset_time = response.headers.get("Rate-Limit-Reset")
-                if remaining is not None and reset_time is not None:
-                    rate_limiter.update_api_limits(
-                        int(remaining),
-                        datetime.fromtimestamp(int(reset_time))
-                    )
-                
-                # Handle rate limit response
-                if response.status == 429:
-                    _LOGGER.warning(
-                        "Rate limit reached for %s, next update in %s seconds",
-                        self._attr_name,
-                        reset_time
-                    )
-                    await rate_limiter.increment_call_count()
-                    return
-                
-                response.raise_for_status()
-                await rate_limiter.increment_call_count()
-                
-                data = await response.json()
-                if "data" in data and "properties" in data["data"]:
-                    properties = data["data"]["properties"]
-                    for prop in properties:
-                        if not isinstance(prop, dict) or "name" not in prop:
-                            continue
-                            
-                        prop_name = prop.get("name", "")
-                        prop_value = prop.get("value")
-                        
-                        if prop_name == "powerState":
-                            self._state = prop_value == "on"
-                        elif prop_name == "brightness" and prop_value is not None:
-                            try:
-                                self._brightness = int(float(prop_value) * 255 / 100)
-                            except (ValueError, TypeError):
-                                _LOGGER.warning("Invalid brightness value received: %s", prop_value)
-                        elif prop_name == "color" and isinstance(prop_value, dict):
-                            try:
-                                self._color = (
-                                    prop_value.get("r", 0),
-                                    prop_value.get("g", 0),
-                                    prop_value.get("b", 0)
-                                )
-                            except (ValueError, TypeError):
-                                _LOGGER.warning("Invalid color value received: %s", prop_value)
-                    self._available = True
-                else:
-                    self._available = False
-
-        except aiohttp.ClientError as e:
-            _LOGGER.error("Error updating Govee light %s: %s", self._attr_name, str(e))
-            self._available = False
+            for commands in steps:
+                await asyncio.sleep(interval)
+                await self._command_pipeline.async_send(commands)
+                self.coordinator.async_trust_device(self._device_id)
         except Exception as e:
-            _LOGGER.error("Unexpected error updating Govee light %s: %s", self._attr_name, str(e))
+            _LOGGER.error("Error during transition of Govee light %s: %s", self._attr_name, str(e))
+        finally:
+            if self._transition is asyncio.current_task():
+                self._transition = None
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Stop a running transition."""
+        await super().async_will_remove_from_hass()
+        self._cancel_transition()
+
+    async def _async_send_command(self, name: str, value: Any) -> None:
+        """Send a single control command over the LAN or the Govee API."""
+        await self.coordinator.async_control(
+            self._device_id, self._capabilities.model, name, value
+        )
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator."""
+        self._update_from_coordinator()
+        self._async_write_state()
+
+    def _compact_state(self) -> tuple:
+        """Return everything the written state of the light depends on."""
+        return (self.available, self._state, self._brightness, self._color, self._color_temp)
+
+    @callback
+    def _async_write_state(self) -> None:
+        """Write the state unless it equals the state written last.
+
+        Most polls find a light unchanged, skipping those writes spares the
+        state machine, the event bus and the recorder.
+        """
+        state = self._compact_state()
+        if state == self._written_state:
+            self.skipped_writes += 1
+            return
+        self._written_state = state
+        self.async_write_ha_state()
+
+    def _update_from_coordinator(self) -> None:
+        """Update the local state from the coordinator data."""
+        if self.coordinator.is_trusted(self._device_id):
+            # Keep the optimistic state until the command is verified
+            return
+
+        if not self.coordinator.data or self._device_id not in self.coordinator.data:
             self._available = False
+            return
+
+        properties = self.coordinator.data[self._device_id]
+        if properties.get("powerState") == "on":
+            self._faded_out = False
+        for prop_name, prop_value in properties.items():
+            if prop_name == "powerState":
+                self._state = prop_value == "on"
+            elif prop_name == "brightness" and prop_value is not None and not self._faded_out:
+                try:
+                    self._brightness = int(float(prop_value) * 255 / 100)
+                except (ValueError, TypeError):
+                    _LOGGER.warning("Invalid brightness value received: %s", prop_value)
+            elif prop_name == "color" and isinstance(prop_value, dict):
+                try:
+                    self._color = (
+                        prop_value.get("r", 0),
+                        prop_value.get("g", 0),
+                        prop_value.get("b", 0)
+                    )
+                except (ValueError, TypeError):
+                    _LOGGER.warning("Invalid color value received: %s", prop_value)
+            elif prop_name == "colorTem" and prop_value:
+                try:
+                    self._color_temp = int(prop_value)
+                except (ValueError, TypeError):
+                    _LOGGER.warning("Invalid color temperature received: %s", prop_value)
+        self._available = True
@@ -0,0 +1,103 @@
+"""Latency and status metrics of the Govee API endpoints."""
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import Any
+
+# Upper bounds of the latency buckets in milliseconds, the last one is open
+LATENCY_BUCKETS = (25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# Endpoints named by the last segment of their path
+ENDPOINTS = ("devices", "state", "control")
+
+STATUS_TIMEOUT = "timeout"
+STATUS_ERROR = "error"
+
+
+class LatencyHistogram:
+    """Count latencies in fixed buckets so memory stays constant."""
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self) -> None:
+        """Initialize the histogram."""
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, latency: float) -> None:
+        """Add a latency in milliseconds."""
+        self.counts[bisect_left(LATENCY_BUCKETS, latency)] += 1
+        self.count += 1
+        self.total += latency
+        self.max = max(self.max, latency)
+
+    def percentile(self, percent: float) -> float | None:
+        """Return the upper bound of the bucket holding a percentile.
+
+        Latencies over the last bound are reported as the slowest one seen.
+        """
+        if not self.count:
+            return None
+        rank = self.count * percent / 100
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                break
+        if index < len(LATENCY_BUCKETS):
+            return min(LATENCY_BUCKETS[index], round(self.max, 1))
+        return round(self.max, 1)
+
+
+class EndpointMetrics:
+    """Latency histogram and status counters of one endpoint."""
+
+    __slots__ = ("latency", "statuses")
+
+    def __init__(self) -> None:
+        """Initialize the metrics."""
+        self.latency = LatencyHistogram()
+        self.statuses: dict[str, int] = {}
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the metrics for display."""
+        requests = self.latency.count
+        return {
+            "requests": requests,
+            "p50_ms": self.latency.percentile(50),
+            "p95_ms": self.latency.percentile(95),
+            "p99_ms": self.latency.percentile(99),
+            "mean_ms": round(self.latency.total / requests, 1) if requests else None,
+            "rate_429": round(self.statuses.get("429", 0) / requests, 4) if requests else 0,
+            "timeout_rate": (
+                round(self.statuses.get(STATUS_TIMEOUT, 0) / requests, 4) if requests else 0
+            ),
+            "statuses": dict(self.statuses),
+        }
+
+
+class GoveeApiMetrics:
+    """Collect the metrics of every Govee endpoint a client talks to."""
+
+    def __init__(self) -> None:
+        """Initialize the metrics."""
+        self._endpoints: dict[str, EndpointMetrics] = {}
+
+    def record(self, endpoint: str, status: int | str, latency: float) -> None:
+        """Record a finished request and its latency in milliseconds."""
+        metrics = self._endpoints.get(endpoint)
+        if metrics is None:
+            metrics = self._endpoints[endpoint] = EndpointMetrics()
+        metrics.latency.add(latency)
+        status = str(status)
+        metrics.statuses[status] = metrics.statuses.get(status, 0) + 1
+
+    def reset(self) -> None:
+        """Forget all recorded requests."""
+        self._endpoints.clear()
+
+    def as_dict(self) -> dict[str, dict[str, Any]]:
+        """Return the metrics of each endpoint for display."""
+        return {endpoint: metrics.as_dict() for endpoint, metrics in self._endpoints.items()}
@@ -0,0 +1,202 @@
+"""Minimal MQTT client for Govee OpenAPI push events.
+
+Govee pushes device events to one topic per API key. Only what that needs
+is implemented: MQTT 3.1.1 connect with credentials, a single subscription,
+receiving publishes and keep-alive pings.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import secrets
+import ssl
+import struct
+from typing import Any, Callable, Optional
+
+from .openapi import OPENAPI_MQTT_HOST, OPENAPI_MQTT_PORT
+
+_LOGGER = logging.getLogger(__name__)
+
+KEEPALIVE = 60  # Seconds between pings
+CONNECT_TIMEOUT = 10  # Seconds to wait for the broker to accept the connection
+RECONNECT_DELAY = 5  # Seconds before the first reconnect attempt
+MAX_RECONNECT_DELAY = 300  # Upper bound for the reconnect backoff
+
+CONNECT = 0x10
+CONNACK = 0x20
+PUBLISH = 0x30
+PUBACK = 0x40
+SUBSCRIBE = 0x82
+SUBACK = 0x90
+PINGREQ = 0xC0
+PINGRESP = 0xD0
+DISCONNECT = 0xE0
+
+
+class GoveeMqttError(Exception):
+    """Raised when the MQTT broker refuses the connection."""
+
+
+def _encode_string(value: str) -> bytes:
+    """Encode a length prefixed UTF-8 string."""
+    data = value.encode()
+    return struct.pack("!H", len(data)) + data
+
+
+def _encode_packet(packet_type: int, body: bytes) -> bytes:
+    """Encode a packet with its variable length header."""
+    header = bytearray([packet_type])
+    length = len(body)
+    while True:
+        byte, length = length % 128, length // 128
+        header.append(byte | 0x80 if length else byte)
+        if not length:
+            break
+    return bytes(header) + body
+
+
+class GoveeMqttClient:
+    """Receive the Govee push events of an API key.
+
+    The client keeps reconnecting with backoff until stopped, and hands
+    every decoded message to on_message.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        on_message: Callable[[dict[str, Any]], None],
+        host: str = OPENAPI_MQTT_HOST,
+        port: int = OPENAPI_MQTT_PORT,
+        ssl_context: Optional[ssl.SSLContext | bool] = True,
+    ) -> None:
+        """Initialize the client."""
+        self._api_key = api_key
+        self._on_message = on_message
+        self._host = host
+        self._port = port
+        self._ssl = ssl_context
+        self._topic = f"GA/{api_key}"
+        self._client_id = f"ha-govee-{secrets.token_hex(6)}"
+        self._task: Optional[asyncio.Task] = None
+        self.connected = False
+
+    def start(self) -> None:
+        """Start connecting in the background."""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._async_run())
+
+    async def async_stop(self) -> None:
+        """Disconnect and stop reconnecting."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.connected = False
+
+    async def _async_run(self) -> None:
+        """Stay connected until cancelled."""
+        delay = RECONNECT_DELAY
+        try:
+            while True:
+                try:
+                    await self._async_session()
+                except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, GoveeMqttError) as err:
+                    _LOGGER.debug("Govee MQTT connection lost: %s", str(err))
+                else:
+                    delay = RECONNECT_DELAY
+                self.connected = False
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, MAX_RECONNECT_DELAY)
+        finally:
+            # Polling must not stay suppressed once the task is gone
+            self.connected = False
+
+    async def _async_session(self) -> None:
+        """Connect, subscribe and read messages until the connection drops."""
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(self._host, self._port, ssl=self._ssl or None),
+            CONNECT_TIMEOUT,
+        )
+        pinger: Optional[asyncio.Task] = None
+        try:
+            writer.write(
+                _encode_packet(
+                    CONNECT,
+                    _encode_string("MQTT")
+                    + bytes([4, 0xC2])  # Protocol level, credentials and clean session
+                    + struct.pack("!H", KEEPALIVE)
+                    + _encode_string(self._client_id)
+                    + _encode_string(self._api_key)
+                    + _encode_string(self._api_key),
+                )
+            )
+            packet_type, body = await asyncio.wait_for(self._read_packet(reader), CONNECT_TIMEOUT)
+            if packet_type != CONNACK or len(body) < 2 or body[1] != 0:
+                raise GoveeMqttError(f"Connection refused: {body.hex()}")
+
+            writer.write(
+                _encode_packet(SUBSCRIBE, struct.pack("!H", 1) + _encode_string(self._topic) + b"\x00")
+            )
+            await writer.drain()
+            pinger = asyncio.get_running_loop().create_task(self._async_ping(writer))
+
+            while True:
+                # The broker answers pings, so silence means the link is gone
+                packet_type, body = await asyncio.wait_for(
+                    self._read_packet(reader), KEEPALIVE * 1.5
+                )
+                if packet_type == SUBACK:
+                    self.connected = True
+                    _LOGGER.debug("Subscribed to Govee push events")
+                elif packet_type & 0xF0 == PUBLISH:
+                    self._handle_publish(packet_type, body, writer)
+        finally:
+            if pinger is not None:
+                pinger.cancel()
+            if not writer.is_closing():
+                writer.write(_encode_packet(DISCONNECT, b""))
+            writer.close()
+
+    async def _async_ping(self, writer: asyncio.StreamWriter) -> None:
+        """Keep the connection alive."""
+        while True:
+            await asyncio.sleep(KEEPALIVE / 2)
+            writer.write(_encode_packet(PINGREQ, b""))
+            await writer.drain()
+
+    @staticmethod
+    async def _read_packet(reader: asyncio.StreamReader) -> tuple[int, bytes]:
+        """Read one packet and return its type byte and body."""
+        packet_type = (await reader.readexactly(1))[0]
+        length = 0
+        multiplier = 1
+        while True:
+            byte = (await reader.readexactly(1))[0]
+            length += (byte & 0x7F) * multiplier
+            if not byte & 0x80:
+                break
+            multiplier *= 128
+        return packet_type, await reader.readexactly(length)
+
+    def _handle_publish(self, packet_type: int, body: bytes, writer: asyncio.StreamWriter) -> None:
+        """Acknowledge a publish and hand its payload over.
+
+        A malformed event is logged and dropped, it never ends the session.
+        """
+        try:
+            qos = (packet_type >> 1) & 0x03
+            topic_length = struct.unpack("!H", body[:2])[0]
+            offset = 2 + topic_length
+            if qos:
+                writer.write(_encode_packet(PUBACK, body[offset:offset + 2]))
+                offset += 2
+            message = json.loads(body[offset:])
+            if isinstance(message, dict):
+                self._on_message(message)
+        except Exception:  # noqa: BLE001 - one bad event must not stop push updates
+            _LOGGER.debug("Ignoring invalid Govee push event: %s", body, exc_info=True)
@@ -0,0 +1,87 @@
+"""Translation between the Govee OpenAPI and the legacy device format.
+
+The OpenAPI router describes devices by capabilities. The rest of the
+integration works with the legacy device dicts, state properties and
+control commands, so the client converts at the edge.
+"""
+from __future__ import annotations
+
+from typing import Any, Optional
+
+OPENAPI_BASE_URL = "https://openapi.api.govee.com/router/api/v1"
+OPENAPI_MQTT_HOST = "mqtt.openapi.govee.com"
+OPENAPI_MQTT_PORT = 8883
+
+CAPABILITY_ON_OFF = "devices.capabilities.on_off"
+CAPABILITY_RANGE = "devices.capabilities.range"
+CAPABILITY_COLOR_SETTING = "devices.capabilities.color_setting"
+
+# Capability instance for each legacy command and state property
+INSTANCE_BY_COMMAND = {
+    "turn": (CAPABILITY_ON_OFF, "powerSwitch"),
+    "brightness": (CAPABILITY_RANGE, "brightness"),
+    "color": (CAPABILITY_COLOR_SETTING, "colorRgb"),
+    "colorTem": (CAPABILITY_COLOR_SETTING, "colorTemperatureK"),
+}
+COMMAND_BY_INSTANCE = {
+    instance: command for command, (_, instance) in INSTANCE_BY_COMMAND.items()
+}
+
+
+def router_device_to_legacy(device: dict[str, Any]) -> dict[str, Any]:
+    """Convert an OpenAPI device to a legacy device dict.
+
+    The capabilities are kept so their parameters, such as the color
+    temperature range, stay available.
+    """
+    capabilities = device.get("capabilities") or []
+    return {
+        "device": device["device"],
+        "model": device.get("sku"),
+        "deviceName": device.get("deviceName", device["device"]),
+        "controllable": True,
+        "retrievable": True,
+        "supportCmds": [
+            COMMAND_BY_INSTANCE[capability["instance"]]
+            for capability in capabilities
+            if capability.get("instance") in COMMAND_BY_INSTANCE
+        ],
+        "capabilities": capabilities,
+    }
+
+
+def capabilities_to_properties(capabilities: list[dict[str, Any]]) -> dict[str, Any]:
+    """Convert capability states to legacy state properties."""
+    properties: dict[str, Any] = {}
+    for capability in capabilities:
+        if not isinstance(capability, dict) or not isinstance(capability.get("state"), dict):
+            continue
+        value = capability["state"].get("value")
+        instance = capability.get("instance")
+        if value is None or value == "":
+            continue
+        if instance == "powerSwitch":
+            properties["powerState"] = "on" if value else "off"
+        elif instance == "brightness":
+            properties["brightness"] = value
+        elif instance == "colorRgb":
+            properties["color"] = {
+                "r": (value >> 16) & 0xFF,
+                "g": (value >> 8) & 0xFF,
+                "b": value & 0xFF,
+            }
+        elif instance == "colorTemperatureK" and value:
+            properties["colorTem"] = value
+    return properties
+
+
+def command_to_capability(name: str, value: Any) -> Optional[dict[str, Any]]:
+    """Convert a legacy control command to an OpenAPI capability."""
+    if name not in INSTANCE_BY_COMMAND:
+        return None
+    capability_type, instance = INSTANCE_BY_COMMAND[name]
+    if name == "turn":
+        value = 1 if value == "on" else 0
+    elif name == "color":
+        value = (value["r"] << 16) | (value["g"] << 8) | value["b"]
+    return {"type": capability_type, "instance": instance, "value": value}
@@ -1,16 +1,28 @@
 """Rate limiter for Govee API."""
 from datetime import datetime, timedelta
+from enum import IntEnum
+import heapq
+import itertools
 import logging
-from typing import Optional
+import time
+from types import MappingProxyType
+from typing import Any, Mapping, Optional
 import asyncio
+from collections import deque
 import math
 
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_send
 from homeassistant.helpers.entity import Entity
+from homeassistant.helpers.storage import Store
 from homeassistant.const import STATE_UNKNOWN
 from homeassistant.components.sensor import SensorEntity
 from homeassistant.util import dt as dt_util
 
+from .const import DOMAIN
+from .device_cache import api_key_hash
+from .metrics import GoveeApiMetrics
+
 _LOGGER = logging.getLogger(__name__)
 
 # Constants
@@ -19,28 +31,227 @@ SAFE_LIMIT = 8000  # Target to stay under this limit
 MIN_POLLING_INTERVAL = 10  # Minimum seconds between updates
 MAX_POLLING_INTERVAL = 300  # Maximum seconds between updates
 RATE_LIMIT_BUFFER = 100  # Minimum requests to keep available
+BUCKET_CAPACITY = 100  # Maximum burst of requests
+SECONDS_PER_DAY = 24 * 60 * 60
+MAX_DEVICE_POLLING_INTERVAL = 3600  # Slowest poll of a device that never changes
+CHANGE_RATE_TIME_CONSTANT = 6 * 60 * 60  # Seconds over which state changes are averaged
+BASELINE_CHANGE_RATE = 1 / SECONDS_PER_DAY  # Assumed changes per second of a quiet device
+STORAGE_VERSION = 1
+SAVE_DELAY = 60  # Seconds to batch counter updates before writing them
+PUBLISH_DELAY = 1  # Seconds to batch counter updates before pushing them to sensors
+SIGNAL_USAGE_UPDATED = f"{DOMAIN}_usage_updated_{{}}"
+SIGNAL_RATE_LIMITER_ADDED = f"{DOMAIN}_rate_limiter_added"  # Sent with the key id
+DATA_RATE_LIMITERS = f"{DOMAIN}_rate_limiters"  # hass.data key of the shared limiters
+DEVICE_CONTROL_LIMIT = 10  # Control commands Govee accepts per device and window
+DEVICE_CONTROL_WINDOW = 60  # Seconds of the per-device control window
+CONTROL_LIMIT_MEMORY = 60 * 60  # Seconds a limit learned from a 429 is kept
+
+
+class RequestPriority(IntEnum):
+    """Priority of a Govee API request, lower values are served first."""
+
+    CONTROL = 0  # Interactive commands from users and automations
+    VERIFY = 1  # State reads confirming a command
+    POLL = 2  # Background state polling
+    DISCOVERY = 3  # Device list refreshes
+
+
+# Share of SAFE_LIMIT held back for each class against lower priority ones
+BUDGET_RESERVE = {
+    RequestPriority.CONTROL: 0.15,
+    RequestPriority.VERIFY: 0.05,
+    RequestPriority.POLL: 0.05,
+    RequestPriority.DISCOVERY: 0.0,
+}
+
+# Tokens a class must leave in the bucket so interactive calls never wait
+TOKEN_RESERVE = {
+    RequestPriority.CONTROL: 0,
+    RequestPriority.VERIFY: 2,
+    RequestPriority.POLL: 5,
+    RequestPriority.DISCOVERY: 5,
+}
+
+
+def daily_ceiling(priority: RequestPriority) -> int:
+    """Return how many calls a day may have used before a class must wait."""
+    if priority == RequestPriority.CONTROL:
+        # Interactive calls may use everything but the hard safety buffer
+        return DAILY_LIMIT - RATE_LIMIT_BUFFER
+    reserved = sum(
+        share for other, share in BUDGET_RESERVE.items() if other < priority
+    )
+    return int(SAFE_LIMIT * (1 - reserved))
+
+class DevicePollStats:
+    """Polling history of one device."""
+
+    __slots__ = ("last_poll", "change_score", "score_time")
+
+    def __init__(self) -> None:
+        """Initialize the stats."""
+        self.last_poll: Optional[float] = None
+        self.change_score = 0.0
+        self.score_time = time.monotonic()
+
+    def decay(self, now: float) -> None:
+        """Exponentially decay the change score up to now."""
+        self.change_score *= math.exp(-(now - self.score_time) / CHANGE_RATE_TIME_CONSTANT)
+        self.score_time = now
+
+    def change_rate(self, now: float) -> float:
+        """Return the estimated state changes per second."""
+        self.decay(now)
+        return self.change_score / CHANGE_RATE_TIME_CONSTANT
+
+
+class DeviceControlWindow:
+    """Sliding window of the control commands sent to one device."""
+
+    __slots__ = ("calls", "limit", "blocked_until", "learned_at", "lock")
+
+    def __init__(self, limit: int) -> None:
+        """Initialize the window."""
+        self.calls: deque[float] = deque()
+        self.limit = limit
+        self.blocked_until = 0.0
+        self.learned_at: Optional[float] = None
+        # Commands of a device wait in line in the order they were sent
+        self.lock = asyncio.Lock()
+
+    def delay(self, now: float, window: float) -> float:
+        """Return the seconds until the next command may be sent."""
+        while self.calls and self.calls[0] <= now - window:
+            self.calls.popleft()
+        if self.blocked_until > now:
+            return self.blocked_until - now
+        if len(self.calls) >= self.limit:
+            return self.calls[0] + window - now
+        return 0
+
 
 class GoveeRateLimiter:
     """Rate limiter for Govee API."""
 
-    def __init__(self, hass: HomeAssistant):
-        """Initialize rate limiter."""
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        storage_key: Optional[str] = None,
+        control_limit: int = DEVICE_CONTROL_LIMIT,
+        control_window: float = DEVICE_CONTROL_WINDOW,
+    ):
+        """Initialize rate limiter.
+
+        When a storage key is given the daily counters survive restarts.
+        Control commands to one device are limited to control_limit per
+        control_window seconds on top of the daily budget.
+        """
         self.hass = hass
         self._total_calls = 0
         self._last_reset = dt_util.now()
         self._device_count = 0
-        self._lock = asyncio.Lock()
         self._current_polling_interval = MIN_POLLING_INTERVAL
         self._api_reset_time: Optional[datetime] = None
         self._api_remaining_calls: Optional[int] = None
 
+        # Token bucket state
+        self._tokens = float(BUCKET_CAPACITY)
+        self._last_refill = time.monotonic()
+        self._waiters: list[tuple[int, int, float, asyncio.Future]] = []
+        self._waiter_sequence = itertools.count()
+        self._wakeup_handle: Optional[asyncio.TimerHandle] = None
+        self._calls_by_priority = dict.fromkeys(RequestPriority, 0)
+
+        # Per-device polling schedule
+        self._device_owners: dict[Any, list[str]] = {}
+        self._device_stats: dict[str, DevicePollStats] = {}
+        self._device_intervals: Optional[dict[str, float]] = None
+        self._last_allocation = 0.0
+
+        # Per-device control windows
+        self._control_limit = control_limit
+        self._control_window = control_window
+        self._control_windows: dict[str, DeviceControlWindow] = {}
+
+        # Latency and status of the requests to each endpoint
+        self.metrics = GoveeApiMetrics()
+
+        # Usage snapshot pushed to sensors
+        self.signal_usage_updated = SIGNAL_USAGE_UPDATED.format(storage_key or id(self))
+        self._usage_snapshot: Optional[Mapping[str, Any]] = None
+        self._publish_handle: Optional[asyncio.TimerHandle] = None
+        self._last_call_time: Optional[datetime] = None
+
+        # Persistence
+        self._store: Optional[Store] = None
+        if storage_key is not None:
+            self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.rate_limiter.{storage_key}")
+        self._save_scheduled = False
+
+    async def async_load(self) -> None:
+        """Restore the counters saved before the last restart."""
+        if self._store is None:
+            return
+
+        data = await self._store.async_load()
+        if not isinstance(data, dict):
+            return
+
+        try:
+            last_reset = dt_util.parse_datetime(data["last_reset"])
+            if last_reset is not None and last_reset.date() == dt_util.now().date():
+                self._total_calls = int(data["total_calls"])
+                self._last_reset = last_reset
+
+            if data.get("api_reset_time") is not None:
+                api_reset_time = datetime.fromtimestamp(data["api_reset_time"])
+                if api_reset_time > datetime.now():
+                    self._api_remaining_calls = data.get("api_remaining_calls")
+                    self._api_reset_time = api_reset_time
+
+            # Refill the bucket for the time we were down, not from full
+            elapsed = max(time.time() - data["saved_at"], 0)
+            self._tokens = min(BUCKET_CAPACITY, float(data["tokens"]) + elapsed * self.refill_rate)
+            self._last_refill = time.monotonic()
+        except (KeyError, TypeError, ValueError) as err:
+            _LOGGER.warning("Ignoring invalid stored rate limiter state: %s", str(err))
+
+        self._current_polling_interval = self.calculate_polling_interval()
+
+    async def async_save(self) -> None:
+        """Write the counters to disk now."""
+        if self._store is not None:
+            await self._store.async_save(self._data_to_save())
+
+    @callback
+    def _schedule_save(self) -> None:
+        """Schedule a batched write of the counters."""
+        if self._store is None or self._save_scheduled:
+            return
+        self._save_scheduled = True
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> dict:
+        """Return the counters to persist."""
+        self._save_scheduled = False
+        self._refill()
+        return {
+            "total_calls": self._total_calls,
+            "last_reset": self._last_reset.isoformat(),
+            "api_remaining_calls": self._api_remaining_calls,
+            "api_reset_time": self._api_reset_time.timestamp() if self._api_reset_time else None,
+            "tokens": self._tokens,
+            "saved_at": time.time(),
+        }
+
     @property
     def daily_requests_per_device(self) -> int:
         """Calculate safe number of requests per device per day."""
         if self._device_count == 0:
             return 0
-        # Reserve 20% of SAFE_LIMIT for manual operations and headroom
-        safe_requests = int(SAFE_LIMIT * 0.8)
+        # Polling may only use what is not reserved for commands and verification
+        safe_requests = daily_ceiling(RequestPriority.POLL)
         return safe_requests // self._device_count
 
     def calculate_polling_interval(self) -> int:
@@ -51,96 +262,399 @@ class GoveeRateLimiter:
         # Calculate requests per device per day
         requests_per_device = self.daily_requests_per_device
 
-        # Calculate seconds per day per device
-        seconds_per_day = 24 * 60 * 60
-        
         # Calculate ideal interval
-        ideal_interval = seconds_per_day / requests_per_device if requests_per_device > 0 else MAX_POLLING_INTERVAL
+        ideal_interval = SECONDS_PER_DAY / requests_per_device if requests_per_device > 0 else MAX_POLLING_INTERVAL
 
         # Adjust based on current usage
+        ideal_interval *= self._usage_factor()
+
+        # Ensure interval stays within bounds
+        return max(MIN_POLLING_INTERVAL, min(int(ideal_interval), MAX_POLLING_INTERVAL))
+
+    def _usage_factor(self) -> float:
+        """Return how much to stretch polling based on the projected daily calls."""
         if self._total_calls > 0:
             time_elapsed = (dt_util.now() - self._last_reset).total_seconds()
             current_rate = self._total_calls / time_elapsed if time_elapsed > 0 else 0
-            projected_daily_calls = current_rate * seconds_per_day
+            projected_daily_calls = current_rate * SECONDS_PER_DAY
 
             if projected_daily_calls > SAFE_LIMIT:
                 # Increase interval to slow down
-                ideal_interval *= 1.5
-            elif projected_daily_calls < SAFE_LIMIT * 0.7:
+                return 1.5
+            if projected_daily_calls < SAFE_LIMIT * 0.7:
                 # Room to decrease interval
-                ideal_interval *= 0.8
+                return 0.8
+        return 1.0
 
-        # Ensure interval stays within bounds
-        return max(MIN_POLLING_INTERVAL, min(int(ideal_interval), MAX_POLLING_INTERVAL))
-
-    async def update_device_count(self, count: int) -> None:
+    def update_device_count(self, count: int) -> None:
         """Update the number of devices being managed."""
-        async with self._lock:
-            self._device_count = count
-            self._current_polling_interval = self.calculate_polling_interval()
+        self._device_count = count
+        self._current_polling_interval = self.calculate_polling_interval()
+        self._device_intervals = None
+        self._stats_changed()
+
+    def update_devices(self, device_ids: list[str], owner: Any = None) -> None:
+        """Update the devices whose polling is scheduled by the limiter.
+
+        Every config entry sharing the limiter hands over its own devices as
+        owner. A device polled by several entries is scheduled once, and an
+        empty list releases the owner.
+        """
+        if device_ids:
+            self._device_owners[owner] = device_ids
+        else:
+            self._device_owners.pop(owner, None)
+        self._device_stats = {
+            device_id: self._device_stats.get(device_id) or DevicePollStats()
+            for owned in self._device_owners.values()
+            for device_id in owned
+        }
+        self.update_device_count(len(self._device_stats))
+
+    def stagger_polls(self, device_ids: list[str]) -> None:
+        """Spread the first polls of devices evenly across their polling interval.
+
+        Of n devices never polled, the k-th is first due after k/n of its
+        interval instead of all of them right away.
+        """
+        pending = [
+            device_id
+            for device_id in device_ids
+            if (stats := self._device_stats.get(device_id)) is not None and stats.last_poll is None
+        ]
+        now = time.monotonic()
+        # The first device stays due right away
+        for index, device_id in enumerate(pending[1:], 1):
+            interval = self.device_polling_interval(device_id)
+            # Backdate the last poll so the device is due after its share
+            self._device_stats[device_id].last_poll = now - interval * (1 - index / len(pending))
+
+    def record_poll(self, device_id: str, changed: bool) -> None:
+        """Record a state poll of a device and whether its state changed."""
+        stats = self._device_stats.get(device_id)
+        if stats is None:
+            return
+        now = time.monotonic()
+        stats.decay(now)
+        if changed:
+            stats.change_score += 1
+        stats.last_poll = now
+        # Reallocate on changes, and regularly so quiet periods are noticed
+        if changed or now - self._last_allocation > MAX_POLLING_INTERVAL:
+            self._device_intervals = None
+
+    def device_polling_interval(self, device_id: str) -> float:
+        """Return the seconds between polls of a device."""
+        return self._allocate_intervals().get(device_id, MAX_DEVICE_POLLING_INTERVAL)
+
+    def is_poll_due(self, device_id: str) -> bool:
+        """Return True if a device should be polled now."""
+        stats = self._device_stats.get(device_id)
+        if stats is None or stats.last_poll is None:
+            return True
+        return time.monotonic() - stats.last_poll >= self.device_polling_interval(device_id)
+
+    def next_poll_delay(self) -> float:
+        """Return the seconds until the next device is due for a poll."""
+        if not self._device_stats:
+            return self._current_polling_interval
+        now = time.monotonic()
+        intervals = self._allocate_intervals()
+        delay = min(
+            0 if stats.last_poll is None else stats.last_poll + intervals[device_id] - now
+            for device_id, stats in self._device_stats.items()
+        )
+        return max(MIN_POLLING_INTERVAL, min(delay, MAX_POLLING_INTERVAL))
+
+    def _poll_budget(self) -> float:
+        """Return the state polls per second the rest of the day can afford.
+
+        The rate never exceeds what spreads the POLL ceiling over a whole
+        day, and slows down when calls used so far would exhaust the ceiling
+        before midnight.
+        """
+        self._check_daily_reset()
+        ceiling = daily_ceiling(RequestPriority.POLL)
+        budget = ceiling / SECONDS_PER_DAY / max(self._usage_factor(), 1)
+        next_day = dt_util.start_of_local_day() + timedelta(days=1)
+        seconds_left = (next_day - dt_util.now()).total_seconds()
+        if seconds_left > 0:
+            budget = min(budget, max(ceiling - self._total_calls, 1) / seconds_left)
+        return budget
+
+    def _allocate_intervals(self) -> dict[str, float]:
+        """Split the polling budget across devices by how often they change.
+
+        Poll frequency grows with the square root of a device's change rate,
+        which minimizes the expected staleness for a fixed number of polls.
+        """
+        if self._device_intervals is not None:
+            return self._device_intervals
+
+        now = time.monotonic()
+        budget = self._poll_budget()
+        weights = {
+            device_id: math.sqrt(stats.change_rate(now) + BASELINE_CHANGE_RATE)
+            for device_id, stats in self._device_stats.items()
+        }
+        total_weight = sum(weights.values())
+        # Large fleets cannot all be polled hourly, the slowest interval then
+        # grows until every device polled at it still fits the budget
+        longest = max(MAX_DEVICE_POLLING_INTERVAL, len(weights) / budget)
+        intervals = {
+            device_id: min(max(total_weight / (budget * weight), MIN_POLLING_INTERVAL), longest)
+            for device_id, weight in weights.items()
+        }
+
+        # Raising intervals to the minimum can overspend, stretch all to fit
+        spend = sum(1 / interval for interval in intervals.values())
+        if spend > budget:
+            scale = spend / budget
+            intervals = {
+                device_id: min(interval * scale, longest)
+                for device_id, interval in intervals.items()
+            }
+
+        self._device_intervals = intervals
+        self._last_allocation = now
+        return intervals
 
     def update_api_limits(self, remaining_calls: Optional[int], reset_time: Optional[datetime]) -> None:
         """Update API limits from response headers."""
+        self._refill()
         self._api_remaining_calls = remaining_calls
         self._api_reset_time = reset_time
+        if remaining_calls is not None:
+            # Never hand out more tokens than the API says are left
+            self._tokens = min(self._tokens, max(remaining_calls - RATE_LIMIT_BUFFER, 0))
+        self._schedule_save()
+        self._stats_changed()
 
-    async def increment_call_count(self) -> None:
+    def increment_call_count(self) -> None:
         """Increment the API call counter."""
-        async with self._lock:
-            now = dt_util.now()
-            
-            # Check if we need to reset counters
-            if now.date() > self._last_reset.date():
-                self._total_calls = 0
-                self._last_reset = now
-
-            self._total_calls += 1
-            
-            # Recalculate polling interval every 100 calls
-            if self._total_calls % 100 == 0:
-                self._current_polling_interval = self.calculate_polling_interval()
-
-    async def can_make_request(self) -> bool:
-        """Check if we can make a request."""
-        now = datetime.now()
-        
-        # Always allow the initial request (when last_call_time is None)
-        if self.last_call_time is None:
-            return True
-            
-        # Wait for rate limit reset if we've hit the limit
-        if (
-            self.api_call_count >= self.api_call_limit
-            and self.rate_limit_reset is not None
-            and now < self.rate_limit_reset
-        ):
-            _LOGGER.debug("Rate limit reached. Reset time: %s", self.rate_limit_reset)
+        self._check_daily_reset()
+        self._total_calls += 1
+        self._last_call_time = dt_util.now()
+        self._schedule_save()
+        self._stats_changed()
+
+        # Recalculate polling interval every 100 calls
+        if self._total_calls % 100 == 0:
+            self._current_polling_interval = self.calculate_polling_interval()
+
+    def record_request(self, endpoint: str, status: int | str, latency: float) -> None:
+        """Record the outcome and latency in milliseconds of a request."""
+        self._check_daily_reset()
+        self.metrics.record(endpoint, status, latency)
+        self._stats_changed()
+
+    def _check_daily_reset(self) -> None:
+        """Reset the daily counters on a new day."""
+        now = dt_util.now()
+        if now.date() > self._last_reset.date():
+            self._total_calls = 0
+            self._calls_by_priority = dict.fromkeys(RequestPriority, 0)
+            self.metrics.reset()
+            self._last_reset = now
+            self._stats_changed()
+
+    @property
+    def refill_rate(self) -> float:
+        """Return the number of tokens added to the bucket per second."""
+        rate = SAFE_LIMIT / SECONDS_PER_DAY
+        if self._api_remaining_calls is not None and self._api_reset_time is not None:
+            seconds_to_reset = self._api_reset_time.timestamp() - time.time()
+            if seconds_to_reset > 0:
+                available = max(self._api_remaining_calls - RATE_LIMIT_BUFFER, 0)
+                rate = min(rate, available / seconds_to_reset)
+        return rate
+
+    def _refill(self) -> None:
+        """Add the tokens earned since the last refill."""
+        now = time.monotonic()
+        self._tokens = min(
+            BUCKET_CAPACITY,
+            self._tokens + (now - self._last_refill) * self.refill_rate,
+        )
+        self._last_refill = now
+
+    async def acquire(self, cost: float = 1, priority: int = RequestPriority.POLL) -> None:
+        """Wait until a request of the given cost may be sent.
+
+        Waiters are served by priority first and arrival order second, so a
+        request never overtakes an earlier one of the same priority.
+        """
+        priority = RequestPriority(priority)
+        cost = min(cost, BUCKET_CAPACITY)
+        self._refill()
+        if not self._waiters and self._can_serve(priority, cost):
+            self._serve(priority, cost)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._waiter_sequence), cost, future))
+        self._stats_changed()
+        self._process_waiters()
+        await future
+
+    def has_budget(self, calls: int, priority: int = RequestPriority.CONTROL) -> bool:
+        """Return True if the daily budget can take a number of calls."""
+        self._check_daily_reset()
+        if self._total_calls + calls > daily_ceiling(RequestPriority(priority)):
             return False
-            
-        # If we're within our minimum delay period, wait
-        if self.last_call_time is not None:
-            time_since_last_call = (now - self.last_call_time).total_seconds()
-            if time_since_last_call < self.min_time_between_calls:
-                _LOGGER.debug("Too soon since last call. Need to wait %s more seconds", 
-                    self.min_time_between_calls - time_since_last_call)
-                return False
-                
+        if self._api_remaining_calls is not None:
+            return self._api_remaining_calls - RATE_LIMIT_BUFFER >= calls
         return True
 
+    async def acquire_device(self, device_id: str) -> None:
+        """Wait until a control command may be sent to a device.
+
+        Commands over the per-device limit are queued in order and released
+        as soon as the oldest command leaves the window.
+        """
+        window = self._get_control_window(device_id)
+
+        async with window.lock:
+            now = time.monotonic()
+            if (
+                window.learned_at is not None
+                and now - window.learned_at > CONTROL_LIMIT_MEMORY
+            ):
+                # Forget a limit learned long ago in case the throttle was lifted
+                window.limit = self._control_limit
+                window.learned_at = None
+            while (delay := window.delay(now, self._control_window)) > 0:
+                _LOGGER.debug("Delaying command to %s by %.1f seconds", device_id, delay)
+                await asyncio.sleep(delay)
+                now = time.monotonic()
+            window.calls.append(now)
+
+    def control_capacity(self, device_id: str, duration: float) -> int:
+        """Return how many control commands a device takes over a duration."""
+        window = self._get_control_window(device_id)
+        return int(window.limit * max(duration / self._control_window, 1))
+
+    def device_throttled(self, device_id: str, reset_time: Optional[datetime]) -> None:
+        """Learn from a control command the API rejected for its device.
+
+        The device gets no commands until the reset time and its limit is
+        lowered below the number of commands that were accepted in the window.
+        """
+        window = self._get_control_window(device_id)
+
+        now = time.monotonic()
+        window.delay(now, self._control_window)
+        window.limit = max(1, min(window.limit, len(window.calls) - 1))
+        window.learned_at = now
+        delay = self._control_window
+        if reset_time is not None:
+            delay = min(max(reset_time.timestamp() - time.time(), 1), self._control_window)
+        window.blocked_until = now + delay
+        _LOGGER.warning(
+            "Govee throttled commands to %s, limiting it to %d per %d seconds",
+            device_id,
+            window.limit,
+            self._control_window,
+        )
+
+    def _get_control_window(self, device_id: str) -> DeviceControlWindow:
+        """Return the control window of a device, creating it if needed."""
+        window = self._control_windows.get(device_id)
+        if window is None:
+            window = self._control_windows[device_id] = DeviceControlWindow(self._control_limit)
+        return window
+
+    def _process_waiters(self) -> None:
+        """Release waiters that can be served and schedule the next wakeup."""
+        if self._wakeup_handle is not None:
+            self._wakeup_handle.cancel()
+            self._wakeup_handle = None
+
+        self._refill()
+        while self._waiters:
+            priority, _, cost, future = self._waiters[0]
+            if future.done():
+                # Cancelled while waiting
+                heapq.heappop(self._waiters)
+                continue
+            if not self._can_serve(priority, cost):
+                break
+            heapq.heappop(self._waiters)
+            self._serve(priority, cost)
+            future.set_result(None)
+
+        if not self._waiters:
+            return
+
+        priority, _, cost, _ = self._waiters[0]
+        rate = self.refill_rate
+        if self._total_calls >= daily_ceiling(priority):
+            # Out of budget for this class until the day rolls over
+            next_day = dt_util.start_of_local_day() + timedelta(days=1)
+            delay = max((next_day - dt_util.now()).total_seconds(), 1)
+        elif rate > 0:
+            delay = (cost + TOKEN_RESERVE[priority] - self._tokens) / rate
+        elif self._api_reset_time is not None:
+            delay = max(self._api_reset_time.timestamp() - time.time(), 1)
+        else:
+            delay = MAX_POLLING_INTERVAL
+        self._wakeup_handle = asyncio.get_running_loop().call_later(
+            delay, self._process_waiters
+        )
+
+    def _can_serve(self, priority: RequestPriority, cost: float) -> bool:
+        """Return True if a request of this class may be sent now."""
+        self._check_daily_reset()
+        if self._total_calls >= daily_ceiling(priority):
+            return False
+        return self._tokens - cost >= TOKEN_RESERVE[priority]
+
+    def _serve(self, priority: RequestPriority, cost: float) -> None:
+        """Take the tokens of a request that is about to be sent."""
+        self._tokens -= cost
+        self._calls_by_priority[priority] += 1
+        self._stats_changed()
+
     @property
     def polling_interval(self) -> int:
         """Get current polling interval."""
         return self._current_polling_interval
 
     @property
-    def usage_stats(self) -> dict:
-        """Get current usage statistics."""
+    def usage_stats(self) -> Mapping[str, Any]:
+        """Get current usage statistics.
+
+        The statistics are an immutable snapshot that is only rebuilt after
+        the counters change.
+        """
+        if self._usage_snapshot is None:
+            self._usage_snapshot = MappingProxyType(self._build_usage_stats())
+        return self._usage_snapshot
+
+    @callback
+    def _stats_changed(self) -> None:
+        """Drop the usage snapshot and schedule pushing the new one."""
+        self._usage_snapshot = None
+        if self._publish_handle is None:
+            self._publish_handle = asyncio.get_running_loop().call_later(
+                PUBLISH_DELAY, self._publish_usage
+            )
+
+    @callback
+    def _publish_usage(self) -> None:
+        """Push the usage snapshot to the sensors."""
+        self._publish_handle = None
+        async_dispatcher_send(self.hass, self.signal_usage_updated, self.usage_stats)
+
+    def _build_usage_stats(self) -> dict[str, Any]:
+        """Build the usage statistics."""
         now = dt_util.now()
+        intervals = self._allocate_intervals()
         time_elapsed = (now - self._last_reset).total_seconds()
         projected_daily_calls = 0
         if time_elapsed > 0:
             current_rate = self._total_calls / time_elapsed
-            projected_daily_calls = int(current_rate * 24 * 60 * 60)
+            projected_daily_calls = int(current_rate * SECONDS_PER_DAY)
 
         return {
             "total_calls_today": self._total_calls,
@@ -154,7 +668,18 @@ class GoveeRateLimiter:
             "projected_daily_calls": projected_daily_calls,
             "rate_limit_status": self._get_status(),
             "api_remaining_calls": self._api_remaining_calls,
-            "api_reset_time": self._api_reset_time.isoformat() if self._api_reset_time else None
+            "queued_requests": len(self._waiters),
+            "device_polling_intervals": {
+                "min": round(min(intervals.values())) if intervals else None,
+                "max": round(max(intervals.values())) if intervals else None,
+            },
+            "requests_by_priority": {
+                priority.name.lower(): count
+                for priority, count in self._calls_by_priority.items()
+            },
+            "endpoints": self.metrics.as_dict(),
+            "api_reset_time": self._api_reset_time.isoformat() if self._api_reset_time else None,
+            "last_api_call_time": self._last_call_time.isoformat() if self._last_call_time else None,
         }
 
     def _get_status(self) -> str:
@@ -164,3 +689,49 @@ class GoveeRateLimiter:
         elif self._total_calls >= SAFE_LIMIT * 0.8:
             return "WARNING"
         return "NORMAL"
+
+
+class SharedRateLimiter:
+    """A rate limiter used by every config entry of one API key."""
+
+    __slots__ = ("limiter", "users", "loaded")
+
+    def __init__(self, limiter: GoveeRateLimiter) -> None:
+        """Start restoring the counters of the limiter."""
+        self.limiter = limiter
+        self.users = 0
+        self.loaded = asyncio.get_running_loop().create_task(limiter.async_load())
+
+
+async def async_get_rate_limiter(hass: HomeAssistant, api_key: str) -> GoveeRateLimiter:
+    """Return the rate limiter of an API key, creating it for its first user.
+
+    Entries set up together wait for the same restore of the counters, so
+    they all draw from one budget. A new limiter is announced with
+    SIGNAL_RATE_LIMITER_ADDED once restored. Every call must be matched by a
+    call to async_release_rate_limiter.
+    """
+    limiters: dict[str, SharedRateLimiter] = hass.data.setdefault(DATA_RATE_LIMITERS, {})
+    key_id = api_key_hash(api_key)
+    shared = limiters.get(key_id)
+    created = shared is None
+    if shared is None:
+        shared = limiters[key_id] = SharedRateLimiter(GoveeRateLimiter(hass, key_id))
+    shared.users += 1
+    await asyncio.shield(shared.loaded)
+    if created:
+        async_dispatcher_send(hass, SIGNAL_RATE_LIMITER_ADDED, key_id)
+    return shared.limiter
+
+
+async def async_release_rate_limiter(hass: HomeAssistant, api_key: str) -> None:
+    """Release a rate limiter, saving its counters once its last user is gone."""
+    limiters: dict[str, SharedRateLimiter] = hass.data.get(DATA_RATE_LIMITERS, {})
+    key_id = api_key_hash(api_key)
+    shared = limiters.get(key_id)
+    if shared is None:
+        return
+    shared.users -= 1
+    if shared.users <= 0:
+        limiters.pop(key_id)
+        await shared.limiter.async_save()
@@ -2,8 +2,10 @@
 from __future__ import annotations
 
 from datetime import datetime
+from functools import partial
 import logging
-from typing import Any
+import time
+from typing import Any, Mapping, Optional
 
 from homeassistant.components.sensor import (
     SensorEntity,
@@ -11,151 +13,296 @@ from homeassistant.components.sensor import (
     SensorDeviceClass,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.typing import StateType
-from homeassistant.const import PERCENTAGE
+from homeassistant.const import PERCENTAGE, UnitOfTime
 from homeassistant.util import dt as dt_util
 
 from . import DOMAIN
+from .metrics import ENDPOINTS
 from .rate_limiter import GoveeRateLimiter
 
 _LOGGER = logging.getLogger(__name__)
 
+# Seconds between state writes of a usage sensor, the counters change with
+# every API call and each write is stored by the recorder
+SENSOR_UPDATE_INTERVAL = 30
+
+# Attributes that change with every call or are too large to record
+VOLATILE_ATTRIBUTES = frozenset(
+    {
+        "endpoints",
+        "last_api_call_time",
+        "queued_requests",
+        "requests_by_priority",
+        "device_polling_intervals",
+    }
+)
+
+# Latency attributes that change with every request, the percentiles only
+# move between histogram buckets and stay recorded
+VOLATILE_LATENCY_ATTRIBUTES = frozenset(
+    {"requests", "mean_ms", "rate_429", "timeout_rate", "statuses"}
+)
+
 async def async_setup_entry(
     hass: HomeAssistant,
     entry: ConfigEntry,
     async_add_entities: AddEntitiesCallback,
 ) -> None:
-    """Set up the Govee sensors."""
-    rate_limiter = hass.data[DOMAIN][entry.entry_id]["rate_limiter"]
-    
-    async_add_entities(
-        [
-            GoveeApiRateLimitSensor(rate_limiter),
-            GoveePollingIntervalSensor(rate_limiter),
-            GoveeApiCallsSensor(rate_limiter),
-        ]
+    """Set up the Govee sensors, one set per API key of the entry."""
+    entry_data = hass.data[DOMAIN][entry.entry_id]
+    await er.async_migrate_entries(
+        hass, entry.entry_id, partial(_migrate_unique_id, entry.entry_id)
     )
 
-class GoveeApiRateLimitSensor(SensorEntity):
+    sensors: list[GoveeUsageSensor] = []
+    for index, (client, rate_limiter) in enumerate(
+        zip(entry_data["clients"], entry_data["rate_limiters"])
+    ):
+        # The first key keeps the sensor ids it had before extra keys existed
+        key_id = client.key_id if index else None
+        sensors.extend(
+            [
+                GoveeApiRateLimitSensor(rate_limiter, key_id, entry.entry_id),
+                GoveePollingIntervalSensor(rate_limiter, key_id, entry.entry_id),
+                GoveeApiCallsSensor(rate_limiter, key_id, entry.entry_id),
+                *(
+                    GoveeApiLatencySensor(rate_limiter, endpoint, key_id, entry.entry_id)
+                    for endpoint in ENDPOINTS
+                ),
+            ]
+        )
+    async_add_entities(sensors)
+
+
+@callback
+def _migrate_unique_id(entry_id: str, entity_entry: er.RegistryEntry) -> Optional[dict[str, Any]]:
+    """Scope a sensor unique id from before it carried the entry id."""
+    if entity_entry.domain != "sensor" or entity_entry.unique_id.startswith(f"{entry_id}_"):
+        return None
+    return {"new_unique_id": f"{entry_id}_{entity_entry.unique_id}"}
+
+class GoveeUsageSensor(SensorEntity):
+    """Base class for sensors showing the rate limiter usage snapshot.
+
+    The rate limiter pushes a new snapshot whenever its counters change and
+    the state is only written when the sensor's value actually differs, at
+    most once every SENSOR_UPDATE_INTERVAL seconds.
+    Sensors of an extra API key carry its key id in their id and name. The
+    unique ids also carry the entry id, as entries sharing an API key each
+    get their own sensors.
+    """
+
+    _attr_should_poll = False
+
+    def __init__(
+        self,
+        rate_limiter: GoveeRateLimiter,
+        key_id: Optional[str] = None,
+        entry_id: Optional[str] = None,
+    ) -> None:
+        """Initialize the sensor."""
+        self._rate_limiter = rate_limiter
+        self._key_id = key_id
+        self._entry_id = entry_id
+        self._pending_stats: Optional[Mapping[str, Any]] = None
+        self._write_unsub: Optional[CALLBACK_TYPE] = None
+        self._last_write = -float(SENSOR_UPDATE_INTERVAL)
+        self._update_from_stats(rate_limiter.usage_stats)
+
+    def _set_ids(self, unique_id: str, name: str) -> None:
+        """Set the unique id and name, telling the API keys and entries apart."""
+        if self._key_id is None:
+            self._attr_name = name
+        else:
+            unique_id = f"{unique_id}_{self._key_id}"
+            self._attr_name = f"{name} (key {self._key_id[:6]})"
+        if self._entry_id is not None:
+            unique_id = f"{self._entry_id}_{unique_id}"
+        self._attr_unique_id = unique_id
+
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to usage updates."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                self._rate_limiter.signal_usage_updated,
+                self._handle_usage_update,
+            )
+        )
+        self.async_on_remove(self._cancel_pending_write)
+
+    @callback
+    def _handle_usage_update(self, stats: Mapping[str, Any]) -> None:
+        """Apply a snapshot now, or once the last write is old enough."""
+        self._pending_stats = stats
+        if self._write_unsub is not None:
+            return
+        delay = self._last_write + SENSOR_UPDATE_INTERVAL - time.monotonic()
+        if delay <= 0:
+            self._async_apply_pending()
+        else:
+            self._write_unsub = async_call_later(self.hass, delay, self._async_apply_pending)
+
+    @callback
+    def _async_apply_pending(self, _now: Optional[datetime] = None) -> None:
+        """Write the state if the latest snapshot changes it."""
+        self._write_unsub = None
+        stats, self._pending_stats = self._pending_stats, None
+        if stats is None:
+            return
+        previous = (self._attr_native_value, self._attr_extra_state_attributes)
+        self._update_from_stats(stats)
+        if (self._attr_native_value, self._attr_extra_state_attributes) != previous:
+            self._last_write = time.monotonic()
+            self.async_write_ha_state()
+
+    @callback
+    def _cancel_pending_write(self) -> None:
+        """Drop a scheduled write."""
+        if self._write_unsub is not None:
+            self._write_unsub()
+            self._write_unsub = None
+
+    def _update_from_stats(self, stats: Mapping[str, Any]) -> None:
+        """Update the value and attributes from a usage snapshot.
+
+        Each sensor picks the stats it shows, the base shows none.
+        """
+
+
+def _as_local_isoformat(value: str | None) -> str | None:
+    """Convert an ISO timestamp to local time for display."""
+    if not value:
+        return None
+    try:
+        return dt_util.as_local(datetime.fromisoformat(value)).isoformat()
+    except (ValueError, TypeError):
+        return value
+
+
+class GoveeApiRateLimitSensor(GoveeUsageSensor):
     """Sensor for tracking Govee API rate limit."""
 
+    _unrecorded_attributes = VOLATILE_ATTRIBUTES
+
     _attr_state_class = SensorStateClass.MEASUREMENT
     _attr_native_unit_of_measurement = PERCENTAGE
 
-    def __init__(self, rate_limiter: GoveeRateLimiter) -> None:
+    def __init__(
+        self,
+        rate_limiter: GoveeRateLimiter,
+        key_id: Optional[str] = None,
+        entry_id: Optional[str] = None,
+    ) -> None:
         """Initialize the sensor."""
-        self._rate_limiter = rate_limiter
-        self._attr_unique_id = "govee_api_rate_limit"
-        self._attr_name = "Govee API Rate Limit"
-        self._attr_should_poll = True
-
-    @property
-    def native_value(self) -> StateType:
-        """Return the state of the sensor."""
-        stats = self._rate_limiter.usage_stats
-        return round(stats["usage_percentage"], 2)
-
-    @property
-    def extra_state_attributes(self) -> dict:
-        """Return additional attributes."""
-        return self._rate_limiter.usage_stats
-
-    async def async_update(self) -> None:
-        """Update the sensor."""
-        # The rate limiter maintains its own state
-        pass
-
-class GoveeApiCallsSensor(SensorEntity):
+        super().__init__(rate_limiter, key_id, entry_id)
+        self._set_ids("govee_api_rate_limit", "Govee API Rate Limit")
+
+    def _update_from_stats(self, stats: Mapping[str, Any]) -> None:
+        """Update the value and attributes from a usage snapshot."""
+        self._attr_native_value = round(stats["usage_percentage"], 2)
+        self._attr_extra_state_attributes = dict(stats)
+
+class GoveeApiCallsSensor(GoveeUsageSensor):
     """Sensor for tracking detailed Govee API usage."""
 
     _attr_state_class = SensorStateClass.MEASUREMENT
     _attr_has_entity_name = True
-    _attr_should_poll = True
     _attr_icon = "mdi:api"
+    _unrecorded_attributes = VOLATILE_ATTRIBUTES
 
-    def __init__(self, rate_limiter: GoveeRateLimiter) -> None:
+    def __init__(
+        self,
+        rate_limiter: GoveeRateLimiter,
+        key_id: Optional[str] = None,
+        entry_id: Optional[str] = None,
+    ) -> None:
         """Initialize the sensor."""
-        self._rate_limiter = rate_limiter
-        self._attr_unique_id = "govee_api_calls"
-        self._attr_name = "Govee API Calls"
+        super().__init__(rate_limiter, key_id, entry_id)
+        self._set_ids("govee_api_calls", "Govee API Calls")
         self._attr_native_unit_of_measurement = "calls"
 
-    @property
-    def native_value(self) -> StateType:
-        """Return the total number of API calls made today."""
-        return self._rate_limiter.usage_stats["total_calls_today"]
-
-    @property
-    def extra_state_attributes(self) -> dict[str, Any]:
-        """Return additional attributes."""
-        stats = self._rate_limiter.usage_stats
-        
-        # Format the reset time for better readability
-        reset_time = None
-        if stats.get("api_reset_time"):
-            try:
-                reset_time = dt_util.as_local(
-                    datetime.fromisoformat(stats["api_reset_time"])
-                ).isoformat()
-            except (ValueError, TypeError):
-                reset_time = stats["api_reset_time"]
-
-        # Format the last reset date
-        last_reset = None
-        if stats.get("last_reset_date"):
-            try:
-                last_reset = dt_util.as_local(
-                    datetime.fromisoformat(stats["last_reset_date"])
-                ).isoformat()
-            except (ValueError, TypeError):
-                last_reset = stats["last_reset_date"]
-
-        return {
+    def _update_from_stats(self, stats: Mapping[str, Any]) -> None:
+        """Update the value and attributes from a usage snapshot."""
+        self._attr_native_value = stats["total_calls_today"]
+        self._attr_extra_state_attributes = {
             "total_calls_today": stats["total_calls_today"],
             "remaining_calls": stats["remaining_calls"],
             "usage_percentage": round(stats["usage_percentage"], 2),
             "daily_limit": stats["daily_limit"],
             "device_count": stats["device_count"],
             "adaptive_polling_interval": stats["adaptive_polling_interval"],
-            "last_reset_date": last_reset,
+            "last_reset_date": _as_local_isoformat(stats.get("last_reset_date")),
             "rate_limit_status": stats["rate_limit_status"],
             "api_remaining_calls": stats.get("api_remaining_calls"),
-            "api_reset_time": reset_time,
-            "last_api_call_time": dt_util.now().isoformat()
+            "api_reset_time": _as_local_isoformat(stats.get("api_reset_time")),
+            "last_api_call_time": _as_local_isoformat(stats.get("last_api_call_time")),
+            "endpoints": stats["endpoints"],
         }
 
-class GoveePollingIntervalSensor(SensorEntity):
+class GoveePollingIntervalSensor(GoveeUsageSensor):
     """Sensor for tracking Govee polling interval."""
 
     _attr_state_class = SensorStateClass.MEASUREMENT
     _attr_device_class = SensorDeviceClass.DURATION
     _attr_native_unit_of_measurement = "s"  # seconds
 
-    def __init__(self, rate_limiter: GoveeRateLimiter) -> None:
+    def __init__(
+        self,
+        rate_limiter: GoveeRateLimiter,
+        key_id: Optional[str] = None,
+        entry_id: Optional[str] = None,
+    ) -> None:
         """Initialize the sensor."""
-        self._rate_limiter = rate_limiter
-        self._attr_unique_id = "govee_polling_interval"
-        self._attr_name = "Govee Polling Interval"
-        self._attr_should_poll = True
-
-    @property
-    def native_value(self) -> StateType:
-        """Return the state of the sensor."""
-        return self._rate_limiter.polling_interval
-
-    @property
-    def extra_state_attributes(self) -> dict:
-        """Return additional attributes."""
-        stats = self._rate_limiter.usage_stats
-        return {
+        super().__init__(rate_limiter, key_id, entry_id)
+        self._set_ids("govee_polling_interval", "Govee Polling Interval")
+
+    def _update_from_stats(self, stats: Mapping[str, Any]) -> None:
+        """Update the value and attributes from a usage snapshot."""
+        self._attr_native_value = stats["adaptive_polling_interval"]
+        self._attr_extra_state_attributes = {
             "device_count": stats["device_count"],
             "safe_limit": stats["safe_limit"],
             "adaptive_interval": stats["adaptive_polling_interval"],
         }
 
-    async def async_update(self) -> None:
-        """Update the sensor."""
-        # The rate limiter maintains its own state
-        pass
+class GoveeApiLatencySensor(GoveeUsageSensor):
+    """Sensor for the response times and errors of one Govee endpoint.
+
+    The state is the 95th percentile latency, the attributes hold the other
+    percentiles and the share of throttled and timed out requests.
+    """
+
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+    _attr_icon = "mdi:timer-outline"
+    _unrecorded_attributes = VOLATILE_LATENCY_ATTRIBUTES
+
+    def __init__(
+        self,
+        rate_limiter: GoveeRateLimiter,
+        endpoint: str,
+        key_id: Optional[str] = None,
+        entry_id: Optional[str] = None,
+    ) -> None:
+        """Initialize the sensor."""
+        self._endpoint = endpoint
+        super().__init__(rate_limiter, key_id, entry_id)
+        self._set_ids(f"govee_api_latency_{endpoint}", f"Govee API {endpoint.capitalize()} Latency")
+
+    def _update_from_stats(self, stats: Mapping[str, Any]) -> None:
+        """Update the value and attributes from a usage snapshot."""
+        metrics = stats["endpoints"].get(self._endpoint)
+        if metrics is None:
+            self._attr_native_value = None
+            self._attr_extra_state_attributes = {"requests": 0}
+            return
+        self._attr_native_value = metrics["p95_ms"]
+        self._attr_extra_state_attributes = metrics
@@ -0,0 +1,112 @@
+"""Services for the Govee integration."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.const import ATTR_ENTITY_ID
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
+from homeassistant.helpers import config_validation as cv, entity_registry as er
+
+from .api import GoveeRateLimitReached
+from .commands import merge_commands
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICE_SET_MANY = "set_many"
+ATTR_COMMANDS = "commands"
+ATTR_DEVICE = "device"
+
+COMMAND_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            vol.Exclusive(ATTR_ENTITY_ID, "target"): cv.entity_id,
+            vol.Exclusive(ATTR_DEVICE, "target"): cv.string,
+            vol.Optional("turn"): vol.In(["on", "off"]),
+            vol.Optional("brightness"): vol.All(vol.Coerce(int), vol.Range(min=0, max=100)),
+            vol.Optional("color"): vol.All(
+                vol.ExactSequence((cv.byte, cv.byte, cv.byte)),
+                lambda rgb: {"r": rgb[0], "g": rgb[1], "b": rgb[2]},
+            ),
+            vol.Optional("colorTem"): vol.All(vol.Coerce(int), vol.Range(min=1000, max=10000)),
+        }
+    ),
+    cv.has_at_least_one_key(ATTR_ENTITY_ID, ATTR_DEVICE),
+)
+
+SET_MANY_SCHEMA = vol.Schema(
+    {vol.Required(ATTR_COMMANDS): vol.All(cv.ensure_list, [COMMAND_SCHEMA])}
+)
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the Govee services."""
+
+    async def async_set_many(call: ServiceCall) -> ServiceResponse:
+        """Send commands to many Govee lights with bounded parallelism."""
+        registry = er.async_get(hass)
+        entries = hass.data.get(DOMAIN, {})
+        # Commands per coordinator and device, and the name each target was given
+        batches: dict[str, dict[str, dict[str, Any]]] = {}
+        targets: dict[str, str] = {}
+
+        for item in call.data[ATTR_COMMANDS]:
+            commands = {
+                name: value for name, value in item.items() if name not in (ATTR_ENTITY_ID, ATTR_DEVICE)
+            }
+            if ATTR_ENTITY_ID in item:
+                target = item[ATTR_ENTITY_ID]
+                entity = registry.async_get(target)
+                if entity is None or entity.platform != DOMAIN or entity.config_entry_id not in entries:
+                    raise ServiceValidationError(f"{target} is not a Govee light")
+                entry_id, device_id = entity.config_entry_id, entity.unique_id
+            else:
+                target = device_id = item[ATTR_DEVICE]
+                entry_id = next(
+                    (
+                        entry_id
+                        for entry_id, data in entries.items()
+                        if device_id in data["coordinator"].devices
+                    ),
+                    None,
+                )
+                if entry_id is None:
+                    raise ServiceValidationError(f"Unknown Govee device {device_id}")
+
+            # Later commands for the same device win over earlier ones
+            batch = batches.setdefault(entry_id, {})
+            batch[device_id] = merge_commands(batch.get(device_id, {}), commands)
+            targets[device_id] = target
+
+        try:
+            results = await asyncio.gather(
+                *(
+                    entries[entry_id]["coordinator"].async_set_many(batch)
+                    for entry_id, batch in batches.items()
+                )
+            )
+        except GoveeRateLimitReached as err:
+            raise HomeAssistantError(str(err)) from err
+
+        report = {
+            targets[device_id]: error or "ok"
+            for entry_results in results
+            for device_id, error in entry_results.items()
+        }
+        failed = [target for target, result in report.items() if result != "ok"]
+        if failed:
+            _LOGGER.warning("Govee commands failed for %s", ", ".join(failed))
+        return {"results": report}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SET_MANY,
+        async_set_many,
+        schema=SET_MANY_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
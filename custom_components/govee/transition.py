@@ -0,0 +1,43 @@
+"""Plan light transitions as a few steps the Govee API budget can afford."""
+from __future__ import annotations
+
+from typing import Any
+
+MAX_TRANSITION_STEPS = 10  # Most steps of one transition, whatever its length
+MIN_STEP_INTERVAL = 2  # Seconds between two steps of a transition
+
+
+def _interpolate(start: Any, end: Any, fraction: float) -> Any:
+    """Return the value a fraction of the way from start to end."""
+    if isinstance(end, dict):
+        return {
+            channel: round(start.get(channel, value) + (value - start.get(channel, value)) * fraction)
+            for channel, value in end.items()
+        }
+    return round(start + (end - start) * fraction)
+
+
+def plan_transition(
+    start: dict[str, Any], target: dict[str, Any], steps: int
+) -> list[dict[str, Any]]:
+    """Split the commands reaching a target state into transition steps.
+
+    Commands with a start value are interpolated linearly, the others are
+    sent with the first step. The last step reaches the target. Steps that
+    would not change anything after rounding are left out, so a plan never
+    has more than the given number of steps.
+    """
+    steps = max(steps, 1)
+    plan: list[dict[str, Any]] = []
+    sent = dict(start)
+    for step in range(1, steps + 1):
+        commands = {}
+        for name, value in target.items():
+            if step < steps and name in start:
+                value = _interpolate(start[name], value, step / steps)
+            if name not in sent or sent[name] != value:
+                commands[name] = value
+        if commands:
+            plan.append(commands)
+            sent.update(commands)
+    return plan
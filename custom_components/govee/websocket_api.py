@@ -0,0 +1,80 @@
+"""Websocket API streaming the Govee API usage to the frontend."""
+from __future__ import annotations
+
+from functools import partial
+from typing import Any, Mapping
+
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+
+from .rate_limiter import DATA_RATE_LIMITERS, SIGNAL_RATE_LIMITER_ADDED, SharedRateLimiter
+
+
+@callback
+def async_setup_websocket_api(hass: HomeAssistant) -> None:
+    """Register the Govee websocket commands."""
+    websocket_api.async_register_command(hass, websocket_subscribe_usage)
+
+
+@websocket_api.websocket_command({vol.Required("type"): "govee/usage/subscribe"})
+@callback
+def websocket_subscribe_usage(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """Stream the usage stats of every API key's rate limiter.
+
+    The first event of a key carries its full stats, later events only the
+    stats that changed. Events arrive when the limiter publishes a new
+    snapshot, at most once per publish delay. Keys set up after the
+    subscription, such as all of them while Home Assistant starts, are
+    streamed as soon as their limiter is added.
+    """
+    sent: dict[str, dict[str, Any]] = {}
+    unsubs: dict[str, CALLBACK_TYPE] = {}
+
+    @callback
+    def _async_send(key_id: str, stats: Mapping[str, Any]) -> None:
+        """Send the stats of a key that changed since the last event."""
+        last = sent.get(key_id)
+        if last is None:
+            changes = dict(stats)
+        else:
+            changes = {name: value for name, value in stats.items() if last.get(name) != value}
+            if not changes:
+                return
+        sent[key_id] = dict(stats)
+        connection.send_message(
+            websocket_api.event_message(msg["id"], {"key_id": key_id, "stats": changes})
+        )
+
+    @callback
+    def _async_follow(key_id: str) -> None:
+        """Stream the stats of a key, starting with its current ones."""
+        limiters: dict[str, SharedRateLimiter] = hass.data.get(DATA_RATE_LIMITERS, {})
+        if key_id in unsubs or (shared := limiters.get(key_id)) is None:
+            return
+        unsubs[key_id] = async_dispatcher_connect(
+            hass,
+            shared.limiter.signal_usage_updated,
+            callback(partial(_async_send, key_id)),
+        )
+        _async_send(key_id, shared.limiter.usage_stats)
+
+    unsub_added = async_dispatcher_connect(hass, SIGNAL_RATE_LIMITER_ADDED, _async_follow)
+
+    @callback
+    def _async_unsubscribe() -> None:
+        """Stop streaming."""
+        unsub_added()
+        for unsub in unsubs.values():
+            unsub()
+
+    connection.subscriptions[msg["id"]] = _async_unsubscribe
+    connection.send_result(msg["id"])
+    for key_id in list(hass.data.get(DATA_RATE_LIMITERS, {})):
+        _async_follow(key_id)
@@ -6,20 +6,63 @@ const html = LitElement.prototype.html;
 const css = LitElement.prototype.css;
 
 class GoveeApiMonitorCard extends LitElement {
+  // hass is not a reactive property: it changes with every state in Home
+  // Assistant, the card only renders when the Govee usage stream changes
   static get properties() {
     return {
-      hass: { type: Object },
       config: { type: Object },
-      _api_calls: { type: Number },
-      _usage_percent: { type: Number },
-      _status: { type: String },
-      _device_count: { type: Number },
-      _polling_interval: { type: Number },
-      _last_reset: { type: String },
-      _next_reset: { type: String },
+      _stats: { type: Object },
     };
   }
 
+  constructor() {
+    super();
+    // Usage stats per API key, merged from the deltas of the subscription
+    this._stats = {};
+  }
+
+  set hass(hass) {
+    this._hass = hass;
+    this._subscribe();
+  }
+
+  get hass() {
+    return this._hass;
+  }
+
+  connectedCallback() {
+    super.connectedCallback();
+    this._subscribe();
+  }
+
+  disconnectedCallback() {
+    super.disconnectedCallback();
+    this._unsubscribe();
+  }
+
+  _subscribe() {
+    if (this._unsub || !this._hass || !this.isConnected) {
+      return;
+    }
+    this._unsub = this._hass.connection.subscribeMessage(
+      (event) => {
+        this._stats = {
+          ...this._stats,
+          [event.key_id]: { ...(this._stats[event.key_id] || {}), ...event.stats },
+        };
+      },
+      { type: 'govee/usage/subscribe' }
+    );
+  }
+
+  async _unsubscribe() {
+    const unsub = this._unsub;
+    this._unsub = undefined;
+    if (unsub) {
+      (await unsub)();
+    }
+  }
+
   static get styles() {
     return css`
       :host {
@@ -107,36 +150,63 @@ class GoveeApiMonitorCard extends LitElement {
         color: var(--primary-color);
         margin-right: 8px;
       }
+
+      .endpoints {
+        width: 100%;
+        margin-top: 16px;
+        border-collapse: collapse;
+        font-size: 0.9em;
+      }
+
+      .endpoints th {
+        color: var(--secondary-text-color);
+        font-weight: normal;
+        text-align: right;
+      }
+
+      .endpoints td {
+        text-align: right;
+        padding: 4px 0;
+      }
+
+      .endpoints th:first-child,
+      .endpoints td:first-child {
+        text-align: left;
+      }
     `;
   }
 
   setConfig(config) {
-    if (!config.entity) {
-      throw new Error('Please define an entity');
-    }
+    // key_id picks an API key when several are set up, the first by default.
+    // The start of the key id, as shown in the sensor names, is enough
     this.config = config;
   }
 
   render() {
-    if (!this.hass || !this.config) {
+    if (!this.config) {
       return html``;
     }
 
-    const entity = this.hass.states[this.config.entity];
-    if (!entity) {
+    const keyId = Object.keys(this._stats).find(
+      (id) => !this.config.key_id || id.startsWith(this.config.key_id)
+    );
+    const attrs = this._stats[keyId];
+    if (!attrs) {
       return html`
         <ha-card>
           <div class="header">
-            Entity ${this.config.entity} not found
+            Waiting for Govee API usage
           </div>
         </ha-card>
       `;
     }
 
-    const attrs = entity.attributes;
     const status = attrs.rate_limit_status;
     const statusClass = `status-circle status-${status.toLowerCase()}`;
-    const usage = attrs.usage_percentage;
+    const usage = Math.round(attrs.usage_percentage * 100) / 100;
+    const resetTime = attrs.api_reset_time
+      ? new Date(attrs.api_reset_time).toLocaleString()
+      : '-';
 
     return html`
       <ha-card>
@@ -193,11 +263,44 @@ class GoveeApiMonitorCard extends LitElement {
             <ha-icon icon="mdi:clock-check"></ha-icon>
             Next Reset
           </div>
-          <div class="stat-value">${attrs.api_reset_time}</div>
+          <div class="stat-value">${resetTime}</div>
         </div>
+
+        ${this._renderEndpoints(attrs.endpoints)}
       </ha-card>
     `;
   }
+
+  _renderEndpoints(endpoints) {
+    if (!endpoints || Object.keys(endpoints).length === 0) {
+      return html``;
+    }
+    const ms = (value) => (value === null || value === undefined ? '-' : `${value} ms`);
+    const percent = (value) => `${(value * 100).toFixed(1)}%`;
+
+    return html`
+      <table class="endpoints">
+        <tr>
+          <th>Endpoint</th>
+          <th>p50</th>
+          <th>p95</th>
+          <th>p99</th>
+          <th>429</th>
+          <th>Timeouts</th>
+        </tr>
+        ${Object.entries(endpoints).map(([name, metrics]) => html`
+          <tr>
+            <td>${name}</td>
+            <td>${ms(metrics.p50_ms)}</td>
+            <td>${ms(metrics.p95_ms)}</td>
+            <td>${ms(metrics.p99_ms)}</td>
+            <td>${percent(metrics.rate_429)}</td>
+            <td>${percent(metrics.timeout_rate)}</td>
+          </tr>
+        `)}
+      </table>
+    `;
+  }
 }
 
 customElements.define('govee-api-monitor-card', GoveeApiMonitorCard);
@@ -47,7 +47,38 @@ def mock_api_response():
 def mock_rate_limiter():
     """Create a mock rate limiter."""
     rate_limiter = MagicMock()
-    rate_limiter.can_make_request = AsyncMock(return_value=True)
-    rate_limiter.increment_call_count = AsyncMock()
+    rate_limiter.acquire = AsyncMock()
+    rate_limiter.acquire_device = AsyncMock()
+    rate_limiter.increment_call_count = MagicMock()
     rate_limiter.update_api_limits = MagicMock()
+    rate_limiter.is_poll_due = MagicMock(return_value=True)
+    rate_limiter.next_poll_delay = MagicMock(return_value=60)
     return rate_limiter
+
+@pytest.fixture
+def mock_coordinator():
+    """Create a mock data update coordinator."""
+    coordinator = MagicMock()
+    coordinator.hass = MagicMock()
+    coordinator.rate_limiter = MagicMock()
+    coordinator.rate_limiter.acquire = AsyncMock()
+    coordinator.async_control = AsyncMock()
+    coordinator.data = {}
+    coordinator.last_update_success = True
+    coordinator.is_trusted = MagicMock(return_value=False)
+    return coordinator
+
+@pytest.fixture
+def mock_response():
+    """Return a factory for mocked aiohttp response context managers."""
+    def _factory(status=200, json_data=None, headers=None):
+        response = MagicMock()
+        response.status = status
+        response.headers = headers or {}
+        response.raise_for_status = MagicMock()
+        response.json = AsyncMock(return_value=json_data or {})
+        context = MagicMock()
+        context.__aenter__ = AsyncMock(return_value=response)
+        context.__aexit__ = AsyncMock(return_value=False)
+        return context
+    return _factory
@@ -0,0 +1,121 @@
+"""Tests for the Govee API client."""
+import asyncio
+import pytest
+from unittest.mock import MagicMock
+
+from custom_components.govee.api import (
+    REQUEST_TIMEOUT,
+    GoveeApiClient,
+    GoveeApiError,
+    GoveeAuthError,
+    GoveeRateLimitReached,
+)
+from custom_components.govee.rate_limiter import RequestPriority
+
+@pytest.fixture
+def mock_session():
+    """Create a mock aiohttp session."""
+    return MagicMock()
+
+@pytest.fixture
+def client(mock_rate_limiter, mock_session):
+    """Create a client on top of the mock session."""
+    return GoveeApiClient(MagicMock(), "mock-api-key", mock_rate_limiter, session=mock_session)
+
+async def test_get_devices(client, mock_session, mock_rate_limiter, mock_response, mock_api_response):
+    """Test the device list request is rate limited, counted and timed out."""
+    headers = {"Rate-Limit-Remaining": "9000", "Rate-Limit-Reset": "1629500000"}
+    mock_session.request = MagicMock(
+        return_value=mock_response(json_data=mock_api_response, headers=headers)
+    )
+
+    devices = await client.async_get_devices()
+
+    assert devices == mock_api_response["data"]["devices"]
+    assert mock_rate_limiter.acquire.call_args.kwargs["priority"] == RequestPriority.DISCOVERY
+    mock_rate_limiter.increment_call_count.assert_called_once()
+    assert mock_rate_limiter.update_api_limits.call_args[0][0] == 9000
+    kwargs = mock_session.request.call_args.kwargs
+    assert kwargs["headers"] == {"Govee-API-Key": "mock-api-key"}
+    assert kwargs["timeout"] is REQUEST_TIMEOUT
+
+async def test_get_devices_invalid_payload(client, mock_session, mock_response):
+    """Test an unexpected device list raises an API error."""
+    mock_session.request = MagicMock(return_value=mock_response(json_data={"code": 500}))
+
+    with pytest.raises(GoveeApiError):
+        await client.async_get_devices()
+
+async def test_control_is_counted(client, mock_session, mock_rate_limiter, mock_response):
+    """Test control commands count against the daily budget."""
+    mock_session.request = MagicMock(return_value=mock_response(json_data={"code": 200}))
+
+    await client.async_control("AA:BB:CC:DD:EE:FF:00:11", "H6159", "turn", "on")
+
+    method, url = mock_session.request.call_args[0]
+    assert method == "PUT"
+    assert url.endswith("/devices/control")
+    assert mock_session.request.call_args.kwargs["json"]["cmd"] == {"name": "turn", "value": "on"}
+    assert mock_rate_limiter.acquire.call_args.kwargs["priority"] == RequestPriority.CONTROL
+    mock_rate_limiter.increment_call_count.assert_called_once()
+
+@pytest.mark.parametrize(
+    ("status", "error"),
+    [(401, GoveeAuthError), (429, GoveeRateLimitReached)],
+)
+async def test_error_status(client, mock_session, mock_rate_limiter, mock_response, status, error):
+    """Test error statuses raise and are still accounted for."""
+    headers = {"Rate-Limit-Remaining": "0", "Rate-Limit-Reset": "1629500000"}
+    mock_session.request = MagicMock(return_value=mock_response(status=status, headers=headers))
+
+    with pytest.raises(error):
+        await client.async_get_state("AA:BB:CC:DD:EE:FF:00:11", "H6159")
+
+    mock_rate_limiter.increment_call_count.assert_called_once()
+    mock_rate_limiter.update_api_limits.assert_called_once()
+    endpoint, recorded_status, _ = mock_rate_limiter.record_request.call_args[0]
+    assert (endpoint, recorded_status) == ("state", status)
+
+async def test_timeout_is_recorded(client, mock_session, mock_rate_limiter):
+    """Test a timed out request is recorded for its endpoint."""
+    mock_session.request = MagicMock(side_effect=asyncio.TimeoutError)
+
+    with pytest.raises(asyncio.TimeoutError):
+        await client.async_control("AA:BB:CC:DD:EE:FF:00:11", "H6159", "turn", "on")
+
+    endpoint, status, latency = mock_rate_limiter.record_request.call_args[0]
+    assert (endpoint, status) == ("control", "timeout")
+    assert latency >= 0
+    mock_rate_limiter.increment_call_count.assert_not_called()
+
+async def test_close_keeps_shared_session(client, mock_session):
+    """Test closing the client leaves a shared session open."""
+    await client.async_close()
+
+    mock_session.close.assert_not_called()
+
+async def test_throttled_control_is_resent(client, mock_session, mock_rate_limiter, mock_response):
+    """Test a command throttled for its device is queued again."""
+    headers = {"Rate-Limit-Remaining": "5000", "Rate-Limit-Reset": "1629500000"}
+    mock_session.request = MagicMock(
+        side_effect=[
+            mock_response(status=429, headers=headers),
+            mock_response(json_data={"code": 200}),
+        ]
+    )
+
+    await client.async_control("AA:BB:CC:DD:EE:FF:00:11", "H6159", "turn", "on")
+
+    assert mock_rate_limiter.acquire_device.await_count == 2
+    mock_rate_limiter.device_throttled.assert_called_once()
+    assert mock_rate_limiter.device_throttled.call_args[0][0] == "AA:BB:CC:DD:EE:FF:00:11"
+
+async def test_control_fails_when_daily_budget_is_gone(client, mock_session, mock_rate_limiter, mock_response):
+    """Test a 429 with no calls left is not retried."""
+    headers = {"Rate-Limit-Remaining": "0", "Rate-Limit-Reset": "1629500000"}
+    mock_session.request = MagicMock(return_value=mock_response(status=429, headers=headers))
+
+    with pytest.raises(GoveeRateLimitReached):
+        await client.async_control("AA:BB:CC:DD:EE:FF:00:11", "H6159", "turn", "on")
+
+    mock_rate_limiter.device_throttled.assert_not_called()
@@ -0,0 +1,15 @@
+"""Smoke test for the benchmark harness."""
+from benchmarks.run_benchmarks import async_run_fleet
+
+
+async def test_benchmark_small_fleet():
+    """Test the harness polls and commands a small fleet on the mock API."""
+    result = await async_run_fleet(3, simulated_hours=0.5, commands=6)
+
+    assert result["devices"] == 3
+    assert result["refreshes"] > 1
+    assert 0 < result["calls_per_day"] <= 10000
+    assert result["command_errors"] == 0
+    assert result["command_p50_ms"] <= result["command_p99_ms"]
+    assert result["http_429"] == 0
+    assert result["bytes_per_entity"] > 0
@@ -0,0 +1,76 @@
+"""Tests for the Govee model capability descriptors."""
+from homeassistant.components.light import ColorMode
+
+from custom_components.govee.capabilities import (
+    DEFAULT_MAX_COLOR_TEMP_KELVIN,
+    DEFAULT_MIN_COLOR_TEMP_KELVIN,
+    model_capabilities,
+)
+from custom_components.govee.openapi import router_device_to_legacy
+
+def _device(index, **extra):
+    """Return a device list entry of the H6159 model."""
+    return {
+        "device": f"AA:BB:CC:DD:EE:FF:00:{index:02d}",
+        "model": "H6159",
+        "deviceName": f"Light {index}",
+        "supportCmds": ["turn", "brightness", "color", "colorTem"],
+        **extra,
+    }
+
+def test_devices_of_a_model_share_one_descriptor():
+    """Test the descriptor is built once per model."""
+    first = model_capabilities(_device(1))
+    second = model_capabilities(_device(2))
+
+    assert first is second
+    assert first.color_modes == {ColorMode.RGB, ColorMode.COLOR_TEMP}
+    assert first.color_mode == ColorMode.RGB
+    assert first.retrievable and first.controllable
+    assert (first.min_color_temp_kelvin, first.max_color_temp_kelvin) == (
+        DEFAULT_MIN_COLOR_TEMP_KELVIN,
+        DEFAULT_MAX_COLOR_TEMP_KELVIN,
+    )
+
+def test_color_temp_range_from_device_list():
+    """Test the range reported by the legacy API and the OpenAPI is used."""
+    legacy = model_capabilities(
+        _device(1, properties={"colorTem": {"range": {"min": 2700, "max": 6500}}})
+    )
+    assert (legacy.min_color_temp_kelvin, legacy.max_color_temp_kelvin) == (2700, 6500)
+
+    openapi = model_capabilities(
+        router_device_to_legacy(
+            {
+                "device": "AA:BB:CC:DD:EE:FF:00:02",
+                "sku": "H6008",
+                "capabilities": [
+                    {"type": "devices.capabilities.on_off", "instance": "powerSwitch"},
+                    {
+                        "type": "devices.capabilities.color_setting",
+                        "instance": "colorTemperatureK",
+                        "parameters": {"range": {"min": 2200, "max": 6500, "precision": 1}},
+                    },
+                ],
+            }
+        )
+    )
+    assert openapi.color_modes == {ColorMode.COLOR_TEMP}
+    assert openapi.color_mode == ColorMode.COLOR_TEMP
+    assert (openapi.min_color_temp_kelvin, openapi.max_color_temp_kelvin) == (2200, 6500)
+
+def test_invalid_range_falls_back_to_default():
+    """Test a malformed range is ignored."""
+    capabilities = model_capabilities(
+        _device(1, properties={"colorTem": {"range": {"min": 9000, "max": 2000}}})
+    )
+    assert capabilities.min_color_temp_kelvin == DEFAULT_MIN_COLOR_TEMP_KELVIN
+
+def test_switch_only_model():
+    """Test a model without color commands can only be switched."""
+    capabilities = model_capabilities(
+        {"device": "x", "model": "H5080", "deviceName": "Plug", "supportCmds": ["turn"], "retrievable": False}
+    )
+    assert capabilities.color_modes == {ColorMode.ONOFF}
+    assert capabilities.color_mode == ColorMode.ONOFF
+    assert not capabilities.retrievable
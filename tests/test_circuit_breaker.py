@@ -0,0 +1,65 @@
+"""Tests for the Govee circuit breaker."""
+from custom_components.govee.circuit_breaker import (
+    FAILURE_THRESHOLD,
+    OPEN_TIMEOUT,
+    STATE_CLOSED,
+    STATE_OPEN,
+    GoveeCircuitBreaker,
+)
+from custom_components.govee.rate_limiter import RequestPriority
+
+def _open_breaker():
+    """Return a breaker opened by consecutive failures."""
+    breaker = GoveeCircuitBreaker()
+    for _ in range(FAILURE_THRESHOLD):
+        assert breaker.allow_request(RequestPriority.POLL)
+        breaker.record_failure()
+    return breaker
+
+async def test_opens_after_consecutive_failures():
+    """Test the circuit opens for background traffic only."""
+    breaker = _open_breaker()
+
+    assert breaker.state == STATE_OPEN
+    assert not breaker.allow_request(RequestPriority.POLL)
+    assert not breaker.allow_request(RequestPriority.DISCOVERY)
+    assert breaker.allow_request(RequestPriority.CONTROL)
+    assert breaker.retry_after > 0
+
+async def test_success_resets_failures():
+    """Test an answered request resets the failure count."""
+    breaker = GoveeCircuitBreaker()
+    for _ in range(FAILURE_THRESHOLD - 1):
+        breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert breaker.state == STATE_CLOSED
+
+async def test_half_open_allows_one_probe():
+    """Test a single probe is let through and a failed probe backs off."""
+    breaker = _open_breaker()
+    breaker._opened_at -= OPEN_TIMEOUT
+
+    assert breaker.allow_request(RequestPriority.POLL)
+    assert not breaker.allow_request(RequestPriority.POLL)
+
+    breaker.record_failure()
+    assert breaker.state == STATE_OPEN
+    assert breaker.retry_after > OPEN_TIMEOUT
+
+    breaker._opened_at -= 2 * OPEN_TIMEOUT
+    assert breaker.allow_request(RequestPriority.VERIFY)
+    breaker.record_success()
+    assert breaker.state == STATE_CLOSED
+    assert breaker.allow_request(RequestPriority.POLL)
+
+async def test_released_probe_can_be_retried():
+    """Test a cancelled probe does not leave the circuit stuck."""
+    breaker = _open_breaker()
+    breaker._opened_at -= OPEN_TIMEOUT
+
+    assert breaker.allow_request(RequestPriority.POLL)
+    breaker.release()
+
+    assert breaker.allow_request(RequestPriority.POLL)
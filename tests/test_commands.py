@@ -0,0 +1,72 @@
+"""Tests for the Govee command pipeline."""
+import asyncio
+import pytest
+
+from custom_components.govee.commands import GoveeCommandPipeline
+
+@pytest.fixture
+def sent():
+    """Collect the commands sent by a pipeline."""
+    return []
+
+@pytest.fixture
+def pipeline(sent):
+    """Create a pipeline with a short debounce window."""
+    async def send_command(name, value):
+        sent.append((name, value))
+        await asyncio.sleep(0)
+
+    return GoveeCommandPipeline(send_command, debounce=0.05)
+
+async def test_sends_batch_in_order(pipeline, sent):
+    """Test one call is split into ordered Govee commands."""
+    await pipeline.async_send({"color": {"r": 1, "g": 2, "b": 3}, "brightness": 40, "turn": "on"})
+
+    assert sent == [("turn", "on"), ("brightness", 40), ("color", {"r": 1, "g": 2, "b": 3})]
+    assert pipeline.idle
+
+async def test_debounce_latest_value_wins(pipeline, sent):
+    """Test a burst of slider updates costs two calls."""
+    tasks = []
+    for value in range(1, 21):
+        tasks.append(asyncio.ensure_future(pipeline.async_send({"brightness": value})))
+        await asyncio.sleep(0.001)
+    await asyncio.gather(*tasks)
+
+    assert sent == [("brightness", 1), ("brightness", 20)]
+
+async def test_turn_off_drops_pending(pipeline, sent):
+    """Test a turn off replaces queued commands."""
+    first = asyncio.ensure_future(pipeline.async_send({"brightness": 10}))
+    await asyncio.sleep(0.001)
+    await asyncio.gather(
+        first,
+        pipeline.async_send({"brightness": 50, "colorTem": 3000}),
+        pipeline.async_send({"turn": "off"}),
+    )
+
+    assert sent == [("brightness", 10), ("turn", "off")]
+
+async def test_color_replaces_color_temperature(pipeline, sent):
+    """Test color and color temperature replace each other."""
+    await asyncio.gather(
+        pipeline.async_send({"turn": "on"}),
+        pipeline.async_send({"colorTem": 3000}),
+        pipeline.async_send({"color": {"r": 255, "g": 0, "b": 0}}),
+    )
+
+    assert sent == [("turn", "on"), ("color", {"r": 255, "g": 0, "b": 0})]
+
+async def test_error_is_raised_to_every_caller(sent):
+    """Test a failed batch fails every call merged into it."""
+    async def send_command(name, value):
+        raise ValueError("boom")
+
+    pipeline = GoveeCommandPipeline(send_command, debounce=0.05)
+    results = await asyncio.gather(
+        pipeline.async_send({"turn": "on"}),
+        pipeline.async_send({"brightness": 10}),
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(result, ValueError) for result in results)
@@ -0,0 +1,419 @@
+"""Tests for the Govee data update coordinator."""
+import asyncio
+from datetime import timedelta
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import aiohttp
+
+from homeassistant.helpers.update_coordinator import UpdateFailed
+
+from custom_components.govee import coordinator as coordinator_module
+from custom_components.govee.api import GoveeApiClient, GoveeApiError, GoveeRateLimitReached
+from custom_components.govee.circuit_breaker import FAILURE_THRESHOLD, OPEN_TIMEOUT
+from custom_components.govee.coordinator import MAX_POLL_RETRIES, GoveeDataUpdateCoordinator
+from custom_components.govee.rate_limiter import GoveeRateLimiter, RequestPriority, daily_ceiling
+from custom_components.govee.transition import MAX_TRANSITION_STEPS
+
+DEVICES = [
+    {
+        "device": "AA:BB:CC:DD:EE:FF:00:11",
+        "model": "H6159",
+        "deviceName": "Mock Light 1",
+        "retrievable": True,
+    },
+    {
+        "device": "AA:BB:CC:DD:EE:FF:00:22",
+        "model": "H6159",
+        "deviceName": "Mock Light 2",
+        "retrievable": True,
+    },
+]
+
+STATE_RESPONSE = {
+    "data": {
+        "properties": [
+            {"name": "powerState", "value": "on"},
+            {"name": "brightness", "value": 50},
+        ]
+    }
+}
+
+@pytest.fixture
+def mock_session():
+    """Create a mock aiohttp session."""
+    return MagicMock()
+
+@pytest.fixture
+def coordinator(mock_rate_limiter, mock_session):
+    """Create a coordinator polling two devices."""
+    mock_rate_limiter.polling_interval = 60
+    client = GoveeApiClient(MagicMock(), "mock-api-key", mock_rate_limiter, session=mock_session)
+    coordinator = GoveeDataUpdateCoordinator(MagicMock(), client)
+    coordinator.set_devices(DEVICES)
+    return coordinator
+
+async def test_update_fetches_all_devices(coordinator, mock_session, mock_rate_limiter, mock_response):
+    """Test one refresh polls every device and follows the limiter schedule."""
+    mock_rate_limiter.next_poll_delay.return_value = 120
+
+    mock_session.request = MagicMock(
+        side_effect=lambda *args, **kwargs: mock_response(json_data=STATE_RESPONSE)
+    )
+    data = await coordinator._async_update_data()
+
+    assert data["AA:BB:CC:DD:EE:FF:00:11"] == {"powerState": "on", "brightness": 50}
+    assert "AA:BB:CC:DD:EE:FF:00:22" in data
+    assert mock_rate_limiter.increment_call_count.call_count == 2
+    assert mock_rate_limiter.acquire.await_count == 2
+    assert coordinator.update_interval == timedelta(seconds=120)
+    mock_rate_limiter.record_poll.assert_called_with("AA:BB:CC:DD:EE:FF:00:22", False)
+
+async def test_update_skips_devices_not_due(coordinator, mock_session, mock_rate_limiter, mock_response):
+    """Test only devices the limiter says are due get polled."""
+    mock_rate_limiter.is_poll_due.side_effect = lambda device_id: device_id.endswith("22")
+
+    mock_session.request = MagicMock(
+        side_effect=lambda *args, **kwargs: mock_response(json_data=STATE_RESPONSE)
+    )
+    await coordinator._async_update_data()
+
+    assert mock_session.request.call_count == 1
+
+async def test_rate_limit_handling(coordinator, mock_session, mock_rate_limiter, mock_response):
+    """Test a 429 updates the limiter and stops the cycle."""
+    headers = {
+        "Rate-Limit-Remaining": "0",
+        "Rate-Limit-Reset": "1629500000"
+    }
+
+    mock_session.request = MagicMock(
+        return_value=mock_response(status=429, headers=headers)
+    )
+    data = await coordinator._async_update_data()
+
+    mock_rate_limiter.update_api_limits.assert_called_once()
+    assert mock_session.request.call_count == 1
+    assert data == {}
+
+async def test_failed_poll_retries_before_dropping_device(coordinator, mock_session):
+    """Test a failing device keeps its state until its retries are exhausted."""
+    device_id = "AA:BB:CC:DD:EE:FF:00:11"
+    coordinator.set_devices(DEVICES[:1])
+    coordinator.data = {device_id: {"powerState": "on"}}
+    mock_session.request = MagicMock(side_effect=aiohttp.ClientError("boom"))
+
+    for attempt in range(1, MAX_POLL_RETRIES + 1):
+        coordinator.data = await coordinator._async_update_data()
+        assert coordinator.data == {device_id: {"powerState": "on"}}
+        assert mock_session.request.call_count == attempt
+
+        # The retry waits for its backoff
+        await coordinator._async_update_data()
+        assert mock_session.request.call_count == attempt
+        coordinator._retry_at[device_id] = 0
+
+    assert await coordinator._async_update_data() == {}
+
+async def test_circuit_breaker_pauses_polling(coordinator, mock_session, mock_response):
+    """Test a cloud outage stops polling and is probed with a single request."""
+    mock_session.request = MagicMock(side_effect=aiohttp.ClientError("boom"))
+
+    with pytest.raises(UpdateFailed):
+        for _ in range(FAILURE_THRESHOLD):
+            await coordinator._async_update_data()
+            coordinator._retry_at.clear()
+    assert mock_session.request.call_count == FAILURE_THRESHOLD
+    assert coordinator.update_interval >= timedelta(seconds=OPEN_TIMEOUT - 1)
+
+    # Nothing is sent while the circuit is open
+    coordinator._retry_at.clear()
+    with pytest.raises(UpdateFailed):
+        await coordinator._async_update_data()
+    assert mock_session.request.call_count == FAILURE_THRESHOLD
+
+    # Once the open time is over one probe closes the circuit again
+    coordinator.client.circuit_breaker._opened_at -= OPEN_TIMEOUT
+    mock_session.request = MagicMock(
+        side_effect=lambda *args, **kwargs: mock_response(json_data=STATE_RESPONSE)
+    )
+    data = await coordinator._async_update_data()
+    assert len(data) == 2
+
+async def test_trusted_device_skips_poll(coordinator, mock_session, mock_response):
+    """Test a device is not polled right after a command."""
+    coordinator.async_trust_device("AA:BB:CC:DD:EE:FF:00:11")
+
+    mock_session.request = MagicMock(
+        side_effect=lambda *args, **kwargs: mock_response(json_data=STATE_RESPONSE)
+    )
+    data = await coordinator._async_update_data()
+
+    polled = [call.kwargs["params"]["device"] for call in mock_session.request.call_args_list]
+    assert polled == ["AA:BB:CC:DD:EE:FF:00:22"]
+    assert "AA:BB:CC:DD:EE:FF:00:11" not in data
+    assert coordinator.is_trusted("AA:BB:CC:DD:EE:FF:00:11")
+
+async def test_verification_read_replaces_optimistic_state(coordinator, mock_session, mock_rate_limiter, mock_response):
+    """Test the delayed verification read ends the trust window."""
+    coordinator.data = {}
+    coordinator.async_update_listeners = MagicMock()
+    coordinator.async_trust_device("AA:BB:CC:DD:EE:FF:00:11")
+
+    mock_session.request = MagicMock(
+        return_value=mock_response(json_data=STATE_RESPONSE)
+    )
+    await coordinator._async_verify_device("AA:BB:CC:DD:EE:FF:00:11", None)
+
+    assert not coordinator.is_trusted("AA:BB:CC:DD:EE:FF:00:11")
+    assert coordinator.data["AA:BB:CC:DD:EE:FF:00:11"]["powerState"] == "on"
+    assert mock_rate_limiter.acquire.call_args.kwargs["priority"] == RequestPriority.VERIFY
+    coordinator.async_update_listeners.assert_called_once()
+
+async def test_set_many_bounded_parallel(coordinator, mock_rate_limiter):
+    """Test bulk commands run per device in order with bounded parallelism."""
+    devices = [
+        {"device": f"AA:BB:CC:DD:EE:FF:00:{index:02d}", "model": "H6159", "deviceName": f"Light {index}"}
+        for index in range(6)
+    ]
+    coordinator.set_devices(devices)
+    coordinator.data = {}
+    coordinator.async_update_listeners = MagicMock()
+    coordinator._command_slots = asyncio.Semaphore(2)
+    mock_rate_limiter.has_budget.return_value = True
+    in_flight = []
+    sent = []
+
+    async def request(method, path, priority, json):
+        device_id = json["device"]
+        in_flight.append(device_id)
+        assert len(in_flight) <= 2
+        await asyncio.sleep(0.01)
+        in_flight.remove(device_id)
+        sent.append((device_id, json["cmd"]["name"]))
+        if device_id.endswith("05"):
+            raise GoveeApiError("boom")
+
+    coordinator.client._async_request = request
+    results = await coordinator.async_set_many(
+        {device["device"]: {"brightness": 50, "turn": "on"} for device in devices}
+    )
+
+    assert results["AA:BB:CC:DD:EE:FF:00:00"] is None
+    assert results["AA:BB:CC:DD:EE:FF:00:05"] == "boom"
+    assert [name for device_id, name in sent if device_id.endswith("00")] == ["turn", "brightness"]
+    assert coordinator.data["AA:BB:CC:DD:EE:FF:00:00"] == {"powerState": "on", "brightness": 50}
+    assert "AA:BB:CC:DD:EE:FF:00:05" not in coordinator.data
+    assert coordinator.is_trusted("AA:BB:CC:DD:EE:FF:00:00")
+    coordinator.async_update_listeners.assert_called_once()
+
+async def test_throttled_device_does_not_hold_command_slots(coordinator, mock_rate_limiter):
+    """Test commands waiting for a device's control window leave the slots free."""
+    coordinator._command_slots = asyncio.Semaphore(1)
+    window_open = asyncio.Event()
+    sent = []
+
+    async def acquire_device(device_id):
+        if device_id == DEVICES[0]["device"]:
+            await window_open.wait()
+
+    async def request(method, path, priority, json):
+        sent.append(json["device"])
+
+    mock_rate_limiter.acquire_device = acquire_device
+    coordinator.client._async_request = request
+    queued = [
+        asyncio.ensure_future(coordinator.async_control(DEVICES[0]["device"], "H6159", "turn", "on"))
+        for _ in range(3)
+    ]
+    await asyncio.sleep(0)
+
+    await asyncio.wait_for(
+        coordinator.async_control(DEVICES[1]["device"], "H6159", "turn", "on"), 1
+    )
+    assert sent == [DEVICES[1]["device"]]
+
+    window_open.set()
+    await asyncio.gather(*queued)
+    assert sent.count(DEVICES[0]["device"]) == 3
+
+async def test_set_many_stops_running_transitions(coordinator, mock_rate_limiter):
+    """Test bulk commands stop the transition of a light before it is switched."""
+    coordinator.data = {}
+    coordinator.async_update_listeners = MagicMock()
+    coordinator.client.async_control = AsyncMock()
+    mock_rate_limiter.has_budget.return_value = True
+    cancel = MagicMock()
+    unregister = coordinator.async_register_transition(DEVICES[0]["device"], cancel)
+
+    await coordinator.async_set_many({DEVICES[0]["device"]: {"turn": "off"}})
+    cancel.assert_called_once()
+
+    unregister()
+    await coordinator.async_set_many({DEVICES[0]["device"]: {"turn": "on"}})
+    cancel.assert_called_once()
+
+async def test_set_many_checks_budget_first(coordinator, mock_rate_limiter):
+    """Test nothing is sent when the daily budget cannot take every command."""
+    mock_rate_limiter.has_budget.return_value = False
+    coordinator.client.async_control = AsyncMock()
+
+    with pytest.raises(GoveeRateLimitReached):
+        await coordinator.async_set_many(
+            {"AA:BB:CC:DD:EE:FF:00:11": {"turn": "on"}, "AA:BB:CC:DD:EE:FF:00:22": {"turn": "on"}}
+        )
+
+    mock_rate_limiter.has_budget.assert_called_once_with(2)
+    coordinator.client.async_control.assert_not_called()
+
+async def test_device_flags_limit_polls_and_commands(coordinator, mock_session, mock_rate_limiter, mock_response):
+    """Test devices are only polled and controlled as the device list allows."""
+    coordinator.set_devices(
+        [
+            {**DEVICES[0], "controllable": False},
+            {**DEVICES[1], "retrievable": False},
+        ]
+    )
+    coordinator.data = {}
+    coordinator.async_update_listeners = MagicMock()
+    mock_session.request = MagicMock(
+        side_effect=lambda *args, **kwargs: mock_response(json_data=STATE_RESPONSE)
+    )
+    mock_rate_limiter.has_budget.return_value = True
+    coordinator.client.async_control = AsyncMock()
+
+    data = await coordinator._async_update_data()
+    assert list(data) == [DEVICES[0]["device"]]
+    assert mock_session.request.call_count == 1
+
+    results = await coordinator.async_set_many(
+        {DEVICES[0]["device"]: {"turn": "on"}, DEVICES[1]["device"]: {"turn": "on"}}
+    )
+    assert results == {DEVICES[0]["device"]: "Device cannot be controlled", DEVICES[1]["device"]: None}
+    mock_rate_limiter.has_budget.assert_called_with(1)
+    with pytest.raises(GoveeApiError):
+        await coordinator.async_control(DEVICES[0]["device"], "H6159", "turn", "on")
+    coordinator.client.async_control.assert_awaited_once_with(
+        DEVICES[1]["device"], "H6159", "turn", "on", slots=coordinator._command_slots
+    )
+
+    # Commands are only verified by reading devices whose state can be read
+    with patch.object(coordinator_module, "async_call_later") as call_later:
+        coordinator.async_trust_device(DEVICES[1]["device"])
+        call_later.assert_not_called()
+        coordinator.async_trust_device(DEVICES[0]["device"])
+        call_later.assert_called_once()
+    await coordinator._async_verify_device(DEVICES[1]["device"], None)
+    assert mock_session.request.call_count == 1
+
+def _limiter():
+    """Create a mock rate limiter for an extra API key."""
+    rate_limiter = MagicMock()
+    rate_limiter.acquire = AsyncMock()
+    rate_limiter.is_poll_due = MagicMock(return_value=True)
+    rate_limiter.next_poll_delay = MagicMock(return_value=60)
+    return rate_limiter
+
+async def test_devices_are_sharded_across_api_keys(mock_rate_limiter, mock_session, mock_response):
+    """Test each device is polled through one of the keys that can see it."""
+    mock_rate_limiter.polling_interval = 60
+    first = GoveeApiClient(MagicMock(), "first-key", mock_rate_limiter, session=mock_session)
+    second = GoveeApiClient(MagicMock(), "second-key", _limiter(), session=mock_session)
+    coordinator = GoveeDataUpdateCoordinator(MagicMock(), first, extra_clients=[second])
+
+    listed = {
+        "first-key": [DEVICES[0], DEVICES[1]],
+        "second-key": [DEVICES[1], {**DEVICES[0], "device": "AA:BB:CC:DD:EE:FF:00:33"}],
+    }
+    mock_session.request = MagicMock(
+        side_effect=lambda method, url, headers, **kwargs: mock_response(
+            json_data={"data": {"devices": listed[headers["Govee-API-Key"]]}}
+            if url.endswith("/devices")
+            else STATE_RESPONSE
+        )
+    )
+    devices = await coordinator.async_fetch_devices()
+    assert [device["key_ids"] for device in devices] == [
+        [first.key_id],
+        [first.key_id, second.key_id],
+        [second.key_id],
+    ]
+
+    coordinator.set_devices(devices)
+    mock_rate_limiter.update_devices.assert_called_with(["AA:BB:CC:DD:EE:FF:00:11"], coordinator)
+    second.rate_limiter.update_devices.assert_called_with(
+        ["AA:BB:CC:DD:EE:FF:00:22", "AA:BB:CC:DD:EE:FF:00:33"], coordinator
+    )
+
+    mock_session.request.reset_mock()
+    data = await coordinator._async_update_data()
+    assert len(data) == 3
+    keys = {
+        call.kwargs["params"]["device"]: call.kwargs["headers"]["Govee-API-Key"]
+        for call in mock_session.request.call_args_list
+    }
+    assert keys == {
+        "AA:BB:CC:DD:EE:FF:00:11": "first-key",
+        "AA:BB:CC:DD:EE:FF:00:22": "second-key",
+        "AA:BB:CC:DD:EE:FF:00:33": "second-key",
+    }
+
+async def test_rate_limited_key_does_not_block_others(mock_rate_limiter, mock_session, mock_response):
+    """Test a key out of budget only skips the devices it serves."""
+    mock_rate_limiter.polling_interval = 60
+    first = GoveeApiClient(MagicMock(), "first-key", mock_rate_limiter, session=mock_session)
+    second = GoveeApiClient(MagicMock(), "second-key", _limiter(), session=mock_session)
+    coordinator = GoveeDataUpdateCoordinator(MagicMock(), first, extra_clients=[second])
+    coordinator.set_devices(
+        [{**DEVICES[0], "key_ids": [first.key_id]}, {**DEVICES[1], "key_ids": [second.key_id]}]
+    )
+
+    mock_session.request = MagicMock(
+        side_effect=lambda method, url, headers, **kwargs: mock_response(
+            status=429 if headers["Govee-API-Key"] == "first-key" else 200,
+            json_data=STATE_RESPONSE,
+        )
+    )
+    data = await coordinator._async_update_data()
+
+    assert list(data) == ["AA:BB:CC:DD:EE:FF:00:22"]
+
+async def test_transition_steps_follow_budget(mock_session):
+    """Test transitions get fewer steps as the budget runs out."""
+    limiter = GoveeRateLimiter(MagicMock())
+    client = GoveeApiClient(MagicMock(), "mock-api-key", limiter, session=mock_session)
+    coordinator = GoveeDataUpdateCoordinator(MagicMock(), client)
+    coordinator.set_devices(DEVICES)
+    device_id = DEVICES[0]["device"]
+
+    # A sunrise is capped however long it takes
+    assert coordinator.transition_steps(device_id, 1800, 1) == MAX_TRANSITION_STEPS
+    # Short fades keep their steps apart
+    assert coordinator.transition_steps(device_id, 6, 1) == 3
+    # The control window of the device bounds the commands
+    assert coordinator.transition_steps(device_id, 60, 3) == 3
+
+    limiter._total_calls = daily_ceiling(RequestPriority.POLL) - 4
+    assert coordinator.transition_steps(device_id, 1800, 1) == 4
+    assert coordinator.transition_steps(device_id, 1800, 2) == 2
+    limiter._total_calls = daily_ceiling(RequestPriority.POLL)
+    assert coordinator.transition_steps(device_id, 1800, 1) == 1
+
+    # LAN commands cost no quota
+    coordinator.lan = MagicMock()
+    coordinator.lan_devices = {device_id: "192.168.1.10"}
+    assert coordinator.transition_steps(device_id, 1800, 1) == MAX_TRANSITION_STEPS
+
+async def test_refresh_skips_polls_without_budget(mock_session):
+    """Test a used up polling budget skips polls instead of waiting for midnight."""
+    limiter = GoveeRateLimiter(MagicMock())
+    limiter._total_calls = daily_ceiling(RequestPriority.POLL)
+    client = GoveeApiClient(MagicMock(), "mock-api-key", limiter, session=mock_session)
+    coordinator = GoveeDataUpdateCoordinator(MagicMock(), client)
+    coordinator.set_devices(DEVICES)
+
+    data = await asyncio.wait_for(coordinator._async_update_data(), 1)
+
+    assert data == {}
+    mock_session.request.assert_not_called()
+    limiter._publish_handle.cancel()
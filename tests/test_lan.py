@@ -0,0 +1,142 @@
+"""Tests for the Govee LAN client against a local stand-in device."""
+import asyncio
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from custom_components.govee.api import GoveeApiClient
+from custom_components.govee.coordinator import GoveeDataUpdateCoordinator
+from custom_components.govee.lan import GoveeLanClient, GoveeLanError
+
+DEVICE_ID = "AA:BB:CC:DD:EE:FF:00:11"
+
+
+class StandInDevice(asyncio.DatagramProtocol):
+    """Answer scans, status queries and commands like a Govee device."""
+
+    def __init__(self):
+        """Initialize the device state."""
+        self.transport = None
+        self.silent = False
+        self.state = {
+            "onOff": 1,
+            "brightness": 40,
+            "color": {"r": 255, "g": 0, "b": 0},
+            "colorTemInKelvin": 0,
+        }
+        self.commands = []
+
+    def connection_made(self, transport):
+        """Keep the transport."""
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        """Answer a message."""
+        if self.silent:
+            return
+        message = json.loads(data)["msg"]
+        if message["cmd"] == "scan":
+            self._reply({"cmd": "scan", "data": {"ip": "127.0.0.1", "device": DEVICE_ID, "sku": "H6159"}}, addr)
+        elif message["cmd"] == "devStatus":
+            self._reply({"cmd": "devStatus", "data": self.state}, addr)
+        else:
+            self.commands.append(message)
+            if message["cmd"] == "turn":
+                self.state["onOff"] = message["data"]["value"]
+            elif message["cmd"] == "brightness":
+                self.state["brightness"] = message["data"]["value"]
+            elif message["cmd"] == "colorwc":
+                self.state["color"] = message["data"]["color"]
+                self.state["colorTemInKelvin"] = message["data"]["colorTemInKelvin"]
+
+    def _reply(self, message, addr):
+        """Send a message back to the querying socket."""
+        self.transport.sendto(json.dumps({"msg": message}).encode(), addr)
+
+
+@pytest.fixture
+async def device():
+    """Run a stand-in device on a local port."""
+    loop = asyncio.get_running_loop()
+    transport, protocol = await loop.create_datagram_endpoint(
+        StandInDevice, local_addr=("127.0.0.1", 0)
+    )
+    yield protocol
+    transport.close()
+
+@pytest.fixture
+async def lan(device):
+    """Create a LAN client talking to the stand-in device."""
+    port = device.transport.get_extra_info("sockname")[1]
+    client = GoveeLanClient(
+        listen_host="127.0.0.1",
+        listen_port=0,
+        scan_address=("127.0.0.1", port),
+        command_port=port,
+    )
+    await client.async_start()
+    yield client
+    await client.async_stop()
+
+async def test_scan(lan):
+    """Test a scan finds the device and its address."""
+    assert await lan.async_scan(timeout=0.1) == {DEVICE_ID: "127.0.0.1"}
+
+async def test_get_state(lan):
+    """Test a status answer is converted to cloud properties."""
+    state = await lan.async_get_state("127.0.0.1")
+
+    assert state == {"powerState": "on", "brightness": 40, "color": {"r": 255, "g": 0, "b": 0}}
+
+async def test_control(lan, device):
+    """Test commands are translated to the LAN protocol."""
+    await lan.async_control("127.0.0.1", "turn", "off")
+    await lan.async_control("127.0.0.1", "brightness", 75)
+    await lan.async_control("127.0.0.1", "colorTem", 3000)
+
+    state = await lan.async_get_state("127.0.0.1")
+    assert state == {
+        "powerState": "off",
+        "brightness": 75,
+        "color": {"r": 0, "g": 0, "b": 0},
+        "colorTem": 3000,
+    }
+    assert [command["cmd"] for command in device.commands] == ["turn", "brightness", "colorwc"]
+
+async def test_silent_device_raises(lan, device):
+    """Test a device that does not answer raises a LAN error."""
+    device.silent = True
+
+    with pytest.raises(GoveeLanError):
+        await lan.async_get_state("127.0.0.1", timeout=0.05)
+
+async def test_coordinator_prefers_lan(lan, device, mock_rate_limiter, mock_response):
+    """Test LAN devices are polled and controlled without cloud calls."""
+    mock_rate_limiter.polling_interval = 60
+    client = GoveeApiClient(MagicMock(), "mock-api-key", mock_rate_limiter, session=MagicMock())
+    client.async_control = AsyncMock()
+    coordinator = GoveeDataUpdateCoordinator(MagicMock(), client, lan)
+    coordinator.set_devices([{"device": DEVICE_ID, "model": "H6159", "deviceName": "Mock Light 1"}])
+    lan.async_scan = AsyncMock(return_value={DEVICE_ID: "127.0.0.1"})
+    await coordinator.async_scan_lan()
+
+    data = await coordinator._async_update_data()
+    await coordinator.async_control(DEVICE_ID, "H6159", "turn", "off")
+
+    assert data[DEVICE_ID]["powerState"] == "on"
+    assert mock_rate_limiter.update_devices.call_args[0][0] == []
+    client.async_control.assert_not_called()
+    client._session.request.assert_not_called()
+
+    # A device that stops answering falls back to the cloud
+    lan.async_get_state = AsyncMock(side_effect=GoveeLanError("No status answer"))
+    client._session.request = MagicMock(
+        return_value=mock_response(
+            json_data={"data": {"properties": [{"name": "powerState", "value": "off"}]}}
+        )
+    )
+    coordinator._lan_polled.clear()
+    data = await coordinator._async_update_data()
+    assert data[DEVICE_ID] == {"powerState": "off"}
+    assert DEVICE_ID not in coordinator.lan_devices
+    assert mock_rate_limiter.update_devices.call_args[0][0] == [DEVICE_ID]
@@ -1,16 +1,26 @@
 """Tests for the Govee light platform."""
+import asyncio
 import pytest
-from unittest.mock import AsyncMock, MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock
+
+import aiohttp
 from homeassistant.components.light import (
     ATTR_BRIGHTNESS,
     ATTR_RGB_COLOR,
     ColorMode,
+    LightEntityFeature,
+)
+from homeassistant.core import State
+from homeassistant.exceptions import PlatformNotReady
+from custom_components.govee.api import GoveeRateLimitReached
+from custom_components.govee.light import (
+    GoveeLight,
+    _async_refresh_devices,
+    async_setup_entry,
 )
-from custom_components.govee.light import GoveeLight, async_setup_entry
 
-async def test_light_init(mock_config_entry, mock_rate_limiter):
+async def test_light_init(mock_config_entry, mock_coordinator):
     """Test light initialization."""
-    hass = MagicMock()
     device_info = {
         "device": "AA:BB:CC:DD:EE:FF:00:11",
         "model": "H6159",
@@ -19,17 +29,17 @@ async def test_light_init(mock_config_entry, mock_rate_limiter):
         "retrievable": True,
         "supportCmds": ["turn", "brightness", "color"]
     }
-    
-    light = GoveeLight(hass, mock_config_entry, device_info)
-    
+
+    light = GoveeLight(mock_coordinator, mock_config_entry, device_info)
+
     assert light.unique_id == "AA:BB:CC:DD:EE:FF:00:11"
     assert light.name == "Test Light"
     assert ColorMode.RGB in light.supported_color_modes
-    assert light.supported_features == 0
+    assert light.supported_features == LightEntityFeature.TRANSITION
+    assert light.should_poll is False
 
-async def test_light_turn_on(mock_config_entry, mock_rate_limiter):
+async def test_light_turn_on(mock_config_entry, mock_coordinator):
     """Test light turn on."""
-    hass = MagicMock()
     device_info = {
         "device": "AA:BB:CC:DD:EE:FF:00:11",
         "model": "H6159",
@@ -38,24 +48,61 @@ async def test_light_turn_on(mock_config_entry, mock_rate_limiter):
         "retrievable": True,
         "supportCmds": ["turn", "brightness", "color"]
     }
-    
-    with patch("homeassistant.helpers.aiohttp_client.async_get_clientsession") as mock_session:
-        mock_response = MagicMock()
-        mock_response.status = 200
-        mock_response.raise_for_status = MagicMock()
-        mock_response.json = AsyncMock(return_value={"code": 200})
-        
-        mock_session.return_value.put = AsyncMock(return_value=mock_response)
-        
-        light = GoveeLight(hass, mock_config_entry, device_info)
-        await light.async_turn_on(brightness=255, rgb_color=(255, 0, 0))
-        
-        assert light.brightness == 255
-        assert light.rgb_color == (255, 0, 0)
-
-async def test_light_turn_off(mock_config_entry, mock_rate_limiter):
+
+    light = GoveeLight(mock_coordinator, mock_config_entry, device_info)
+    light.async_write_ha_state = MagicMock()
+    await light.async_turn_on(brightness=255, rgb_color=(255, 0, 0))
+
+    assert light.brightness == 255
+    assert light.rgb_color == (255, 0, 0)
+    light.async_write_ha_state.assert_called_once()
+
+    # Every attribute is sent, in order, after powering the light on
+    sent = [call.args[2] for call in mock_coordinator.async_control.call_args_list]
+    assert sent == ["turn", "brightness", "color"]
+
+async def test_light_turn_on_skips_unchanged(mock_config_entry, mock_coordinator):
+    """Test turning on a light that is already on only sends what changed."""
+    device_info = {
+        "device": "AA:BB:CC:DD:EE:FF:00:11",
+        "model": "H6159",
+        "deviceName": "Test Light",
+        "supportCmds": ["turn", "brightness", "color", "colorTem"]
+    }
+
+    light = GoveeLight(mock_coordinator, mock_config_entry, device_info)
+    light.async_write_ha_state = MagicMock()
+    light._state = True
+    light._brightness = 255
+    await light.async_turn_on(brightness=255, color_temp_kelvin=4000)
+
+    mock_coordinator.async_control.assert_awaited_once_with(
+        "AA:BB:CC:DD:EE:FF:00:11", "H6159", "colorTem", 4000
+    )
+
+async def test_light_uses_reported_color_temp_range(mock_config_entry, mock_coordinator):
+    """Test color temperatures outside the range of the model are not sent."""
+    device_info = {
+        "device": "AA:BB:CC:DD:EE:FF:00:11",
+        "model": "H6072",
+        "deviceName": "Test Light",
+        "supportCmds": ["turn", "colorTem"],
+        "properties": {"colorTem": {"range": {"min": 2700, "max": 6500}}},
+    }
+
+    light = GoveeLight(mock_coordinator, mock_config_entry, device_info)
+    light.async_write_ha_state = MagicMock()
+    light._state = True
+    assert light.min_color_temp_kelvin == 2700
+    assert light.max_color_temp_kelvin == 6500
+    assert light.color_mode == ColorMode.COLOR_TEMP
+
+    await light.async_turn_on(color_temp_kelvin=9000)
+    sent = [call.args[2] for call in mock_coordinator.async_control.call_args_list]
+    assert sent == ["turn"]
+
+async def test_light_turn_off(mock_config_entry, mock_coordinator):
     """Test light turn off."""
-    hass = MagicMock()
     device_info = {
         "device": "AA:BB:CC:DD:EE:FF:00:11",
         "model": "H6159",
@@ -64,31 +111,15 @@ async def test_light_turn_off(mock_config_entry, mock_rate_limiter):
         "retrievable": True,
         "supportCmds": ["turn", "brightness", "color"]
     }
-    
-    with patch("homeassistant.helpers.aiohttp_client.async_get_clientsession") as mock_session:
-        mock_response = MagicMock()
-        mock_response.status = 200
-        mock_response.raise_for_status = MagicMock()
-        mock_response.json = AsyncMock(return_value={"code": 200})
-        
-        mock_session.return_value.put = AsyncMock(return_value=mock_response)
-        
-        light = GoveeLight(hass, mock_config_entry, device_info)
-        await light.async_turn_off()
-        
-        assert not light.is_on
-
-async def test_light_update(mock_config_entry, mock_rate_limiter):
-    """Test light update."""
-    hass = MagicMock()
-    hass.data = {
-        "govee": {
-            "test_entry_id": {
-                "rate_limiter": mock_rate_limiter
-            }
-        }
-    }
-    
+
+    light = GoveeLight(mock_coordinator, mock_config_entry, device_info)
+    light.async_write_ha_state = MagicMock()
+    await light.async_turn_off()
+
+    assert not light.is_on
+
+async def test_light_update(mock_config_entry, mock_coordinator):
+    """Test light update from coordinator data."""
     device_info = {
         "device": "AA:BB:CC:DD:EE:FF:00:11",
         "model": "H6159",
@@ -97,67 +128,309 @@ async def test_light_update(mock_config_entry, mock_rate_limiter):
         "retrievable": True,
         "supportCmds": ["turn", "brightness", "color"]
     }
-    
-    with patch("homeassistant.helpers.aiohttp_client.async_get_clientsession") as mock_session:
-        mock_response = MagicMock()
-        mock_response.status = 200
-        mock_response.raise_for_status = MagicMock()
-        mock_response.json = AsyncMock(return_value={
-            "data": {
-                "properties": [
-                    {"name": "powerState", "value": "on"},
-                    {"name": "brightness", "value": 50},
-                    {"name": "color", "value": {"r": 255, "g": 0, "b": 0}}
-                ]
-            }
-        })
-        mock_response.headers = {
-            "Rate-Limit-Remaining": "100",
-            "Rate-Limit-Reset": "1629500000"
+    mock_coordinator.data = {
+        "AA:BB:CC:DD:EE:FF:00:11": {
+            "powerState": "on",
+            "brightness": 50,
+            "color": {"r": 255, "g": 0, "b": 0},
         }
-        
-        mock_session.return_value.get = AsyncMock(return_value=mock_response)
-        
-        light = GoveeLight(hass, mock_config_entry, device_info)
-        await light.async_update()
-        
-        assert light.is_on
-        assert light.brightness == 127  # 50% of 255
-        assert light.rgb_color == (255, 0, 0)
-
-async def test_rate_limit_handling(mock_config_entry, mock_rate_limiter):
-    """Test rate limit handling."""
+    }
+
+    light = GoveeLight(mock_coordinator, mock_config_entry, device_info)
+    light.async_write_ha_state = MagicMock()
+    light._handle_coordinator_update()
+
+    assert light.is_on
+    assert light.brightness == 127  # 50% of 255
+    assert light.rgb_color == (255, 0, 0)
+    assert light.available
+    light.async_write_ha_state.assert_called_once()
+
+async def test_light_skips_unchanged_writes(mock_config_entry, mock_coordinator):
+    """Test polls that change nothing do not write the state again."""
+    device_info = {
+        "device": "AA:BB:CC:DD:EE:FF:00:11",
+        "model": "H6159",
+        "deviceName": "Test Light",
+        "supportCmds": ["turn", "brightness", "colorTem"]
+    }
+    mock_coordinator.data = {
+        "AA:BB:CC:DD:EE:FF:00:11": {"powerState": "on", "brightness": 50, "colorTem": 3000}
+    }
+
+    light = GoveeLight(mock_coordinator, mock_config_entry, device_info)
+    light.async_write_ha_state = MagicMock()
+    for _ in range(3):
+        light._handle_coordinator_update()
+
+    light.async_write_ha_state.assert_called_once()
+    assert light.skipped_writes == 2
+    assert light.color_temp_kelvin == 3000
+
+    mock_coordinator.data["AA:BB:CC:DD:EE:FF:00:11"]["brightness"] = 80
+    light._handle_coordinator_update()
+    assert light.async_write_ha_state.call_count == 2
+
+    mock_coordinator.last_update_success = False
+    light._handle_coordinator_update()
+    assert light.async_write_ha_state.call_count == 3
+
+async def test_light_missing_from_coordinator(mock_config_entry, mock_coordinator):
+    """Test light becomes unavailable when its poll failed."""
+    device_info = {
+        "device": "AA:BB:CC:DD:EE:FF:00:11",
+        "model": "H6159",
+        "deviceName": "Test Light",
+        "supportCmds": ["turn"]
+    }
+    mock_coordinator.data = {}
+
+    light = GoveeLight(mock_coordinator, mock_config_entry, device_info)
+    light.async_write_ha_state = MagicMock()
+    light._handle_coordinator_update()
+
+    assert not light.available
+
+async def test_light_keeps_optimistic_state(mock_config_entry, mock_coordinator):
+    """Test coordinator data is ignored while a command is being trusted."""
+    device_info = {
+        "device": "AA:BB:CC:DD:EE:FF:00:11",
+        "model": "H6159",
+        "deviceName": "Test Light",
+        "supportCmds": ["turn"]
+    }
+    mock_coordinator.data = {"AA:BB:CC:DD:EE:FF:00:11": {"powerState": "off"}}
+    mock_coordinator.is_trusted.return_value = True
+
+    light = GoveeLight(mock_coordinator, mock_config_entry, device_info)
+    light.async_write_ha_state = MagicMock()
+    light._state = True
+    light._handle_coordinator_update()
+
+    assert light.is_on
+
+async def test_light_restores_last_state(mock_config_entry, mock_coordinator):
+    """Test the state from before a restart is shown until the first poll."""
+    device_info = {
+        "device": "AA:BB:CC:DD:EE:FF:00:11",
+        "model": "H6159",
+        "deviceName": "Test Light",
+        "supportCmds": ["turn", "brightness", "color"]
+    }
+    mock_coordinator.async_restore_state = MagicMock(
+        side_effect=lambda device_id, properties: mock_coordinator.data.setdefault(device_id, properties)
+    )
+
+    light = GoveeLight(mock_coordinator, mock_config_entry, device_info)
+    light.async_get_last_state = AsyncMock(
+        return_value=State("light.test_light", "on", {"brightness": 255, "rgb_color": (255, 0, 0)})
+    )
+    await light.async_added_to_hass()
+
+    assert light.available
+    assert light.is_on
+    assert light.brightness == 255
+    assert light.rgb_color == (255, 0, 0)
+    mock_coordinator.async_restore_state.assert_called_once_with(
+        "AA:BB:CC:DD:EE:FF:00:11",
+        {"powerState": "on", "brightness": 100, "color": {"r": 255, "g": 0, "b": 0}},
+    )
+
+    # A polled state wins over the restored one
+    light = GoveeLight(mock_coordinator, mock_config_entry, device_info)
+    light.async_get_last_state = AsyncMock(return_value=State("light.test_light", "unavailable"))
+    mock_coordinator.data = {"AA:BB:CC:DD:EE:FF:00:11": {"powerState": "off"}}
+    await light.async_added_to_hass()
+    assert not light.is_on
+    light.async_get_last_state.assert_not_awaited()
+
+async def test_light_transition(mock_config_entry, mock_coordinator):
+    """Test a transition is sent as the planned steps, the first right away."""
+    device_info = {
+        "device": "AA:BB:CC:DD:EE:FF:00:11",
+        "model": "H6159",
+        "deviceName": "Test Light",
+        "supportCmds": ["turn", "brightness", "color"]
+    }
+    mock_coordinator.transition_steps = MagicMock(return_value=4)
+    mock_coordinator.hass.async_create_background_task = MagicMock(
+        side_effect=lambda coro, name: asyncio.ensure_future(coro)
+    )
+
+    light = GoveeLight(mock_coordinator, mock_config_entry, device_info)
+    light.async_write_ha_state = MagicMock()
+    light._command_pipeline._debounce = 0
+    light._async_run_transition = MagicMock(side_effect=light._async_run_transition)
+    light._state = False
+    await light.async_turn_on(brightness=255, transition=0.04)
+
+    assert light.is_on
+    assert light.brightness == 255
+    mock_coordinator.transition_steps.assert_called_once_with("AA:BB:CC:DD:EE:FF:00:11", 0.04, 1)
+    await light._transition
+    sent = [call.args[2:] for call in mock_coordinator.async_control.call_args_list]
+    assert sent == [
+        ("turn", "on"),
+        ("brightness", 25),
+        ("brightness", 50),
+        ("brightness", 75),
+        ("brightness", 100),
+    ]
+    # The last step lands when the transition ends
+    steps, interval = light._async_run_transition.call_args.args
+    assert interval * len(steps) == pytest.approx(0.04)
+
+    # Fading out dims the light, then turns it off
+    mock_coordinator.async_control.reset_mock()
+    await light.async_turn_off(transition=0.04)
+    assert not light.is_on
+    await light._transition
+    sent = [call.args[2:] for call in mock_coordinator.async_control.call_args_list]
+    assert sent == [("brightness", 75), ("brightness", 50), ("brightness", 25), ("turn", "off")]
+    steps, interval = light._async_run_transition.call_args.args
+    assert interval * len(steps) == pytest.approx(0.04)
+    assert light.brightness == 255
+    # Polls while off report the dimmed device, the light keeps its brightness
+    mock_coordinator.data = {"AA:BB:CC:DD:EE:FF:00:11": {"powerState": "off", "brightness": 25}}
+    light._handle_coordinator_update()
+    assert light.brightness == 255
+
+    # Turning on without a brightness undoes the dimming of the fade
+    mock_coordinator.async_control.reset_mock()
+    await light.async_turn_on()
+    sent = [call.args[2:] for call in mock_coordinator.async_control.call_args_list]
+    assert sent == [("turn", "on"), ("brightness", 100)]
+    assert light.is_on
+    assert light.brightness == 255
+
+    # The next plain turn on only powers the light
+    await light.async_turn_off()
+    mock_coordinator.async_control.reset_mock()
+    await light.async_turn_on()
+    sent = [call.args[2:] for call in mock_coordinator.async_control.call_args_list]
+    assert sent == [("turn", "on")]
+
+async def test_new_command_cancels_transition(mock_config_entry, mock_coordinator):
+    """Test a command sent during a transition stops it."""
+    device_info = {
+        "device": "AA:BB:CC:DD:EE:FF:00:11",
+        "model": "H6159",
+        "deviceName": "Test Light",
+        "supportCmds": ["turn", "brightness"]
+    }
+    mock_coordinator.transition_steps = MagicMock(return_value=10)
+    mock_coordinator.hass.async_create_background_task = MagicMock(
+        side_effect=lambda coro, name: asyncio.ensure_future(coro)
+    )
+
+    light = GoveeLight(mock_coordinator, mock_config_entry, device_info)
+    light.async_write_ha_state = MagicMock()
+    light._state = True
+    light._brightness = 0
+    await light.async_turn_on(brightness=255, transition=600)
+    transition = light._transition
+
+    await light.async_turn_on(brightness=255)
+    await asyncio.sleep(0)
+    assert transition.cancelled()
+    # The target is sent again as the fade stopped short of it
+    assert mock_coordinator.async_control.call_args.args[2:] == ("brightness", 100)
+
+@pytest.fixture
+def setup_hass(mock_config_entry, mock_coordinator, mock_rate_limiter):
+    """Create a hass mock holding the entry data used by the light platform."""
     hass = MagicMock()
+    mock_coordinator.devices = {}
+    mock_coordinator.set_devices = MagicMock(
+        side_effect=lambda devices: setattr(
+            mock_coordinator, "devices", {device["device"]: device for device in devices}
+        )
+    )
+    mock_coordinator.async_refresh = AsyncMock()
+    mock_coordinator.rate_limiter = mock_rate_limiter
+    device_cache = MagicMock()
+    device_cache.async_load = AsyncMock(return_value=[])
+    device_cache.async_save = AsyncMock()
     hass.data = {
         "govee": {
             "test_entry_id": {
-                "rate_limiter": mock_rate_limiter
+                "rate_limiter": mock_rate_limiter,
+                "coordinator": mock_coordinator,
+                "device_cache": device_cache,
             }
         }
     }
-    
+    return hass
+
+async def test_setup_from_cache(setup_hass, mock_config_entry, mock_api_response):
+    """Test entities are created from the cache without a device list call."""
+    data = setup_hass.data["govee"]["test_entry_id"]
+    data["device_cache"].async_load.return_value = mock_api_response["data"]["devices"]
+    data["coordinator"].async_fetch_devices = AsyncMock()
+    async_add_entities = MagicMock()
+
+    await async_setup_entry(setup_hass, mock_config_entry, async_add_entities)
+
+    lights = async_add_entities.call_args[0][0]
+    assert [light.unique_id for light in lights] == ["AA:BB:CC:DD:EE:FF:00:11"]
+    data["coordinator"].async_fetch_devices.assert_not_called()
+    data["coordinator"].stagger_polls.assert_called_once()
+    mock_config_entry.async_create_background_task.assert_called_once()
+    mock_config_entry.async_create_background_task.call_args[0][1].close()
+
+async def test_setup_without_cache(setup_hass, mock_config_entry, mock_api_response):
+    """Test the device list is fetched and cached when no cache exists."""
+    data = setup_hass.data["govee"]["test_entry_id"]
+    devices = mock_api_response["data"]["devices"]
+    data["coordinator"].async_fetch_devices = AsyncMock(return_value=devices)
+    async_add_entities = MagicMock()
+
+    await async_setup_entry(setup_hass, mock_config_entry, async_add_entities)
+
+    data["device_cache"].async_save.assert_awaited_once_with(devices)
+    data["coordinator"].async_refresh.assert_awaited_once()
+    assert len(async_add_entities.call_args[0][0]) == 1
+
+async def test_setup_rate_limited_retries(setup_hass, mock_config_entry):
+    """Test a rate limited first setup is retried later."""
+    data = setup_hass.data["govee"]["test_entry_id"]
+    data["coordinator"].async_fetch_devices = AsyncMock(side_effect=GoveeRateLimitReached("Rate limit reached"))
+
+    with pytest.raises(PlatformNotReady):
+        await async_setup_entry(setup_hass, mock_config_entry, MagicMock())
+
+async def test_refresh_devices_adds_new(setup_hass, mock_config_entry, mock_api_response):
+    """Test the background refresh adds devices missing from the cache."""
+    data = setup_hass.data["govee"]["test_entry_id"]
+    coordinator = data["coordinator"]
+    cached = mock_api_response["data"]["devices"]
+    new_device = dict(cached[0], device="AA:BB:CC:DD:EE:FF:00:22", deviceName="New Light")
+    coordinator.set_devices(cached)
+    coordinator.async_fetch_devices = AsyncMock(return_value=cached + [new_device])
+    async_add_entities = MagicMock()
+
+    await _async_refresh_devices(
+        coordinator, mock_config_entry, data["device_cache"], async_add_entities
+    )
+
+    lights = async_add_entities.call_args[0][0]
+    assert [light.unique_id for light in lights] == ["AA:BB:CC:DD:EE:FF:00:22"]
+    assert set(coordinator.devices) == {"AA:BB:CC:DD:EE:FF:00:11", "AA:BB:CC:DD:EE:FF:00:22"}
+    data["device_cache"].async_save.assert_awaited_once()
+
+async def test_failed_command_keeps_light_available(mock_config_entry, mock_coordinator):
+    """Test a failed command leaves availability to the coordinator."""
     device_info = {
         "device": "AA:BB:CC:DD:EE:FF:00:11",
         "model": "H6159",
         "deviceName": "Test Light",
-        "controllable": True,
-        "retrievable": True,
-        "supportCmds": ["turn", "brightness", "color"]
+        "supportCmds": ["turn"]
     }
-    
-    # Test rate limit response
-    with patch("homeassistant.helpers.aiohttp_client.async_get_clientsession") as mock_session:
-        mock_response = MagicMock()
-        mock_response.status = 429
-        mock_response.headers = {
-            "Rate-Limit-Remaining": "0",
-            "Rate-Limit-Reset": "1629500000"
-        }
-        
-        mock_session.return_value.get = AsyncMock(return_value=mock_response)
-        
-        light = GoveeLight(hass, mock_config_entry, device_info)
-        await light.async_update()
-        
-        # Verify rate limiter was updated
-        mock_rate_limiter.update_api_limits.assert_called_once()
+    mock_coordinator.async_control.side_effect = aiohttp.ClientError("boom")
+
+    light = GoveeLight(mock_coordinator, mock_config_entry, device_info)
+    light.async_write_ha_state = MagicMock()
+    await light.async_turn_off()
+
+    assert light.available
+    mock_coordinator.async_trust_device.assert_not_called()
@@ -0,0 +1,40 @@
+"""Tests for the Govee API metrics."""
+from custom_components.govee.metrics import GoveeApiMetrics, LatencyHistogram
+
+
+def test_histogram_percentiles():
+    """Test percentiles report the bound of their bucket."""
+    histogram = LatencyHistogram()
+    for latency in [10] * 90 + [300] * 9 + [20000]:
+        histogram.add(latency)
+
+    assert histogram.percentile(50) == 25
+    assert histogram.percentile(95) == 500
+    assert histogram.percentile(99) == 500
+    # Beyond the last bucket the slowest latency seen is reported
+    assert histogram.percentile(100) == 20000
+    assert LatencyHistogram().percentile(50) is None
+
+def test_percentile_never_exceeds_slowest_request():
+    """Test a percentile is capped at the slowest latency seen."""
+    histogram = LatencyHistogram()
+    histogram.add(120)
+
+    assert histogram.percentile(99) == 120
+
+def test_endpoint_rates():
+    """Test status counters give the 429 and timeout rates per endpoint."""
+    metrics = GoveeApiMetrics()
+    for status in (200, 200, 429, "timeout"):
+        metrics.record("state", status, 40)
+    metrics.record("control", 200, 80)
+
+    stats = metrics.as_dict()
+    assert stats["state"]["requests"] == 4
+    assert stats["state"]["rate_429"] == 0.25
+    assert stats["state"]["timeout_rate"] == 0.25
+    assert stats["state"]["statuses"] == {"200": 2, "429": 1, "timeout": 1}
+    assert stats["control"]["p50_ms"] == 80
+
+    metrics.reset()
+    assert metrics.as_dict() == {}
@@ -0,0 +1,261 @@
+"""Tests for the Govee OpenAPI backend and its MQTT push events."""
+import asyncio
+import json
+import struct
+import pytest
+from unittest.mock import MagicMock
+
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from custom_components.govee.api import GoveeApiClient
+from custom_components.govee.coordinator import GoveeDataUpdateCoordinator
+from custom_components.govee.mqtt import GoveeMqttClient
+
+DEVICE_ID = "AA:BB:CC:DD:EE:FF:00:11"
+
+ROUTER_DEVICE = {
+    "sku": "H6159",
+    "device": DEVICE_ID,
+    "deviceName": "Mock Light 1",
+    "capabilities": [
+        {"type": "devices.capabilities.on_off", "instance": "powerSwitch"},
+        {"type": "devices.capabilities.range", "instance": "brightness"},
+        {"type": "devices.capabilities.color_setting", "instance": "colorRgb"},
+        {
+            "type": "devices.capabilities.color_setting",
+            "instance": "colorTemperatureK",
+            "parameters": {"range": {"min": 2000, "max": 9000}},
+        },
+    ],
+}
+
+
+@pytest.fixture
+async def router():
+    """Run a stub of the OpenAPI router endpoints."""
+    controls = []
+
+    async def devices(request):
+        return web.json_response({"code": 200, "data": [ROUTER_DEVICE]})
+
+    async def state(request):
+        body = await request.json()
+        assert body["payload"] == {"sku": "H6159", "device": DEVICE_ID}
+        return web.json_response(
+            {
+                "code": 200,
+                "payload": {
+                    "capabilities": [
+                        {"instance": "powerSwitch", "state": {"value": 1}},
+                        {"instance": "brightness", "state": {"value": 80}},
+                        {"instance": "colorRgb", "state": {"value": 0xFF8000}},
+                    ]
+                },
+            },
+            headers={"Rate-Limit-Remaining": "9000", "Rate-Limit-Reset": "1629500000"},
+        )
+
+    async def control(request):
+        controls.append((await request.json())["payload"]["capability"])
+        return web.json_response({"code": 200, "msg": "success"})
+
+    app = web.Application()
+    app.router.add_get("/user/devices", devices)
+    app.router.add_post("/device/state", state)
+    app.router.add_post("/device/control", control)
+    server = TestServer(app)
+    await server.start_server()
+    server.controls = controls
+    yield server
+    await server.close()
+
+@pytest.fixture
+async def client(router, mock_rate_limiter):
+    """Create an OpenAPI client talking to the stub router."""
+    session = aiohttp.ClientSession()
+    yield GoveeApiClient(
+        MagicMock(),
+        "mock-api-key",
+        mock_rate_limiter,
+        session=session,
+        openapi=True,
+        base_url=str(router.make_url("")).rstrip("/"),
+    )
+    await session.close()
+
+async def test_router_devices(client):
+    """Test router devices are converted to the legacy format."""
+    devices = await client.async_get_devices()
+
+    assert devices[0]["model"] == "H6159"
+    assert devices[0]["supportCmds"] == ["turn", "brightness", "color", "colorTem"]
+    assert devices[0]["capabilities"][3]["parameters"]["range"]["max"] == 9000
+
+async def test_router_state(client, mock_rate_limiter):
+    """Test router capability states are converted to properties."""
+    state = await client.async_get_state(DEVICE_ID, "H6159")
+
+    assert state == {
+        "powerState": "on",
+        "brightness": 80,
+        "color": {"r": 255, "g": 128, "b": 0},
+    }
+    assert mock_rate_limiter.update_api_limits.call_args[0][0] == 9000
+
+async def test_router_control(client, router):
+    """Test commands are sent as capabilities."""
+    await client.async_control(DEVICE_ID, "H6159", "turn", "off")
+    await client.async_control(DEVICE_ID, "H6159", "color", {"r": 0, "g": 0, "b": 255})
+
+    assert router.controls == [
+        {"type": "devices.capabilities.on_off", "instance": "powerSwitch", "value": 0},
+        {"type": "devices.capabilities.color_setting", "instance": "colorRgb", "value": 255},
+    ]
+
+
+class StandInBroker:
+    """Accept one MQTT client, check its subscription and publish to it."""
+
+    def __init__(self):
+        """Initialize the broker."""
+        self.subscribed = asyncio.Event()
+        self.topic = None
+        self.username = None
+        self.writer = None
+
+    async def handle(self, reader, writer):
+        """Serve a client connection."""
+        self.writer = writer
+        try:
+            while True:
+                packet_type = (await reader.readexactly(1))[0]
+                length = (await reader.readexactly(1))[0]
+                body = await reader.readexactly(length)
+                if packet_type == 0x10:
+                    client_id_length = struct.unpack("!H", body[10:12])[0]
+                    offset = 12 + client_id_length
+                    username_length = struct.unpack("!H", body[offset:offset + 2])[0]
+                    self.username = body[offset + 2:offset + 2 + username_length].decode()
+                    writer.write(b"\x20\x02\x00\x00")
+                elif packet_type == 0x82:
+                    topic_length = struct.unpack("!H", body[2:4])[0]
+                    self.topic = body[4:4 + topic_length].decode()
+                    writer.write(b"\x90\x03" + body[:2] + b"\x00")
+                    self.subscribed.set()
+                elif packet_type == 0xC0:
+                    writer.write(b"\xd0\x00")
+        except asyncio.IncompleteReadError:
+            writer.close()
+
+    def publish(self, message):
+        """Publish a message to the client."""
+        topic = self.topic.encode()
+        body = struct.pack("!H", len(topic)) + topic + json.dumps(message).encode()
+        length = bytes([len(body) % 128 | 0x80, len(body) // 128])
+        self.writer.write(b"\x30" + length + body)
+
+
+@pytest.fixture
+async def broker():
+    """Run a stand-in MQTT broker on a local port."""
+    broker = StandInBroker()
+    server = await asyncio.start_server(broker.handle, "127.0.0.1", 0)
+    broker.port = server.sockets[0].getsockname()[1]
+    yield broker
+    server.close()
+
+async def test_push_updates_light_state(broker, client, mock_rate_limiter):
+    """Test a pushed state change reaches the coordinator without a poll."""
+    mock_rate_limiter.polling_interval = 60
+    coordinator = GoveeDataUpdateCoordinator(MagicMock(), client)
+    coordinator.set_devices([{"device": DEVICE_ID, "model": "H6159", "deviceName": "Mock Light 1"}])
+    coordinator.async_update_listeners = MagicMock()
+    coordinator.data = await coordinator._async_update_data()
+    assert mock_rate_limiter.acquire.await_count == 1
+
+    coordinator.push = GoveeMqttClient(
+        "mock-api-key",
+        coordinator.async_handle_push,
+        host="127.0.0.1",
+        port=broker.port,
+        ssl_context=False,
+    )
+    coordinator.push.start()
+    await asyncio.wait_for(broker.subscribed.wait(), 1)
+    assert broker.topic == "GA/mock-api-key"
+    assert broker.username == "mock-api-key"
+
+    broker.publish(
+        {
+            "sku": "H6159",
+            "device": DEVICE_ID,
+            "capabilities": [{"instance": "powerSwitch", "state": {"value": 0}}],
+        }
+    )
+    for _ in range(100):
+        if coordinator.async_update_listeners.called:
+            break
+        await asyncio.sleep(0.01)
+
+    assert coordinator.data[DEVICE_ID]["powerState"] == "off"
+    assert coordinator.data[DEVICE_ID]["brightness"] == 80
+    assert coordinator.push.connected
+
+    # Polling is only a rare consistency check while pushes arrive
+    await coordinator._async_update_data()
+    assert mock_rate_limiter.acquire.await_count == 1
+    await coordinator.push.async_stop()
+
+async def test_connected_push_without_events_keeps_polling(client, mock_rate_limiter):
+    """Test devices without push events are polled although push is connected."""
+    mock_rate_limiter.polling_interval = 60
+    coordinator = GoveeDataUpdateCoordinator(MagicMock(), client)
+    coordinator.set_devices([{"device": DEVICE_ID, "model": "H6159", "deviceName": "Mock Light 1"}])
+    coordinator.push = MagicMock(connected=True)
+    for _ in range(3):
+        coordinator.data = await coordinator._async_update_data()
+    assert mock_rate_limiter.acquire.await_count == 3
+
+async def test_malformed_push_keeps_session(broker, client, mock_rate_limiter):
+    """Test a malformed push event is dropped without ending the session."""
+    mock_rate_limiter.polling_interval = 60
+    coordinator = GoveeDataUpdateCoordinator(MagicMock(), client)
+    coordinator.set_devices([{"device": DEVICE_ID, "model": "H6159", "deviceName": "Mock Light 1"}])
+    coordinator.async_update_listeners = MagicMock()
+    coordinator.data = await coordinator._async_update_data()
+
+    coordinator.push = GoveeMqttClient(
+        "mock-api-key",
+        coordinator.async_handle_push,
+        host="127.0.0.1",
+        port=broker.port,
+        ssl_context=False,
+    )
+    coordinator.push.start()
+    await asyncio.wait_for(broker.subscribed.wait(), 1)
+
+    broker.publish(
+        {
+            "sku": "H6159",
+            "device": DEVICE_ID,
+            "capabilities": [{"instance": "colorRgb", "state": {"value": "red"}}],
+        }
+    )
+    broker.publish(
+        {
+            "sku": "H6159",
+            "device": DEVICE_ID,
+            "capabilities": [{"instance": "powerSwitch", "state": {"value": 0}}],
+        }
+    )
+    for _ in range(100):
+        if coordinator.async_update_listeners.called:
+            break
+        await asyncio.sleep(0.01)
+
+    assert coordinator.data[DEVICE_ID]["powerState"] == "off"
+    assert coordinator.push.connected
+    await coordinator.push.async_stop()
+    assert not coordinator.push.connected
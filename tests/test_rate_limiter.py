@@ -0,0 +1,334 @@
+"""Tests for the Govee rate limiter."""
+import asyncio
+from datetime import datetime, timedelta
+import time
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from homeassistant.util import dt as dt_util
+
+from custom_components.govee import rate_limiter as rate_limiter_module
+from custom_components.govee.rate_limiter import (
+    BUCKET_CAPACITY,
+    MAX_DEVICE_POLLING_INTERVAL,
+    MIN_POLLING_INTERVAL,
+    RATE_LIMIT_BUFFER,
+    SAFE_LIMIT,
+    SECONDS_PER_DAY,
+    TOKEN_RESERVE,
+    GoveeRateLimiter,
+    RequestPriority,
+    async_get_rate_limiter,
+    async_release_rate_limiter,
+    daily_ceiling,
+)
+
+@pytest.fixture
+def clock():
+    """Patch the monotonic clock used by the token bucket."""
+    with patch.object(rate_limiter_module, "time") as mock_time:
+        mock_time.time.side_effect = time.time
+        mock_time.monotonic.return_value = 1000.0
+        yield mock_time.monotonic
+
+async def test_acquire_within_burst(clock):
+    """Test requests inside the bucket capacity do not wait."""
+    limiter = GoveeRateLimiter(MagicMock())
+
+    for _ in range(BUCKET_CAPACITY):
+        await asyncio.wait_for(limiter.acquire(priority=RequestPriority.CONTROL), 0.1)
+
+    assert limiter.usage_stats["queued_requests"] == 0
+
+async def test_acquire_waits_for_refill(clock):
+    """Test an empty bucket delays the request until a token is earned."""
+    limiter = GoveeRateLimiter(MagicMock())
+    limiter._tokens = 0
+
+    task = asyncio.ensure_future(limiter.acquire(priority=RequestPriority.CONTROL))
+    await asyncio.sleep(0)
+    assert not task.done()
+    assert limiter._wakeup_handle is not None
+
+    # One token takes SECONDS_PER_DAY / SAFE_LIMIT seconds to refill
+    clock.return_value += SECONDS_PER_DAY / SAFE_LIMIT + 0.01
+    limiter._process_waiters()
+    await asyncio.wait_for(task, 0.1)
+
+async def test_acquire_serves_control_first(clock):
+    """Test a control request overtakes queued polls."""
+    limiter = GoveeRateLimiter(MagicMock())
+    limiter._tokens = 0
+    order = []
+
+    async def request(name, priority):
+        await limiter.acquire(priority=priority)
+        order.append(name)
+
+    poll = asyncio.ensure_future(request("poll", RequestPriority.POLL))
+    await asyncio.sleep(0)
+    control = asyncio.ensure_future(request("control", RequestPriority.CONTROL))
+    await asyncio.sleep(0)
+
+    limiter._tokens = 2 + TOKEN_RESERVE[RequestPriority.POLL]
+    limiter._process_waiters()
+    await asyncio.gather(poll, control)
+
+    assert order == ["control", "poll"]
+
+async def test_api_headers_limit_tokens(clock):
+    """Test the API remaining calls clamp tokens and slow the refill."""
+    limiter = GoveeRateLimiter(MagicMock())
+    reset_time = datetime.now() + timedelta(hours=1)
+
+    limiter.update_api_limits(RATE_LIMIT_BUFFER + 10, reset_time)
+
+    assert limiter._tokens == 10
+    assert limiter.refill_rate == pytest.approx(10 / 3600, rel=0.01)
+
+async def test_increment_call_count_resets_daily():
+    """Test the daily counter resets on a new day."""
+    limiter = GoveeRateLimiter(MagicMock())
+    limiter._total_calls = 50
+    limiter._last_reset = limiter._last_reset - timedelta(days=1)
+
+    limiter.increment_call_count()
+
+    assert limiter.usage_stats["total_calls_today"] == 1
+
+@pytest.fixture
+def mock_store():
+    """Patch the Store used to persist the rate limiter."""
+    with patch.object(rate_limiter_module, "Store") as store_class:
+        store = store_class.return_value
+        store.async_load = AsyncMock(return_value=None)
+        store.async_save = AsyncMock()
+        store.async_delay_save = MagicMock()
+        yield store
+
+async def test_restore_counters_from_today(mock_store):
+    """Test today's call count survives a restart."""
+    mock_store.async_load.return_value = {
+        "total_calls": 4200,
+        "last_reset": dt_util.now().isoformat(),
+        "api_remaining_calls": None,
+        "api_reset_time": None,
+        "tokens": 5,
+        "saved_at": time.time(),
+    }
+    limiter = GoveeRateLimiter(MagicMock(), "key")
+
+    await limiter.async_load()
+
+    assert limiter.usage_stats["total_calls_today"] == 4200
+    assert limiter._tokens == pytest.approx(5, abs=0.1)
+
+async def test_ignore_counters_from_previous_day(mock_store):
+    """Test counters saved on an earlier day are not restored."""
+    mock_store.async_load.return_value = {
+        "total_calls": 4200,
+        "last_reset": (dt_util.now() - timedelta(days=1)).isoformat(),
+        "api_remaining_calls": None,
+        "api_reset_time": None,
+        "tokens": 5,
+        "saved_at": time.time(),
+    }
+    limiter = GoveeRateLimiter(MagicMock(), "key")
+
+    await limiter.async_load()
+
+    assert limiter.usage_stats["total_calls_today"] == 0
+
+async def test_saves_are_batched(mock_store):
+    """Test many calls schedule a single delayed write."""
+    limiter = GoveeRateLimiter(MagicMock(), "key")
+
+    for _ in range(50):
+        limiter.increment_call_count()
+
+    mock_store.async_delay_save.assert_called_once()
+    data_func = mock_store.async_delay_save.call_args[0][0]
+    assert data_func()["total_calls"] == 50
+
+    # Once written, the next call schedules a new write
+    limiter.increment_call_count()
+    assert mock_store.async_delay_save.call_count == 2
+
+async def test_entries_of_one_key_share_a_limiter(mock_store):
+    """Test entries using the same API key draw from one limiter."""
+    hass = MagicMock()
+    hass.data = {}
+
+    first, second = await asyncio.gather(
+        async_get_rate_limiter(hass, "same-key"), async_get_rate_limiter(hass, "same-key")
+    )
+    other = await async_get_rate_limiter(hass, "other-key")
+
+    assert first is second
+    assert other is not first
+    # Concurrent setups restore the counters once
+    assert mock_store.async_load.await_count == 2
+
+    await async_release_rate_limiter(hass, "same-key")
+    mock_store.async_save.assert_not_called()
+    assert await async_get_rate_limiter(hass, "same-key") is first
+
+    await async_release_rate_limiter(hass, "same-key")
+    await async_release_rate_limiter(hass, "same-key")
+    mock_store.async_save.assert_awaited_once()
+    assert await async_get_rate_limiter(hass, "same-key") is not first
+
+async def test_shared_devices_are_scheduled_once(clock):
+    """Test devices of entries sharing a limiter are counted once."""
+    limiter = GoveeRateLimiter(MagicMock())
+    first_entry, second_entry = object(), object()
+
+    limiter.update_devices(["light1", "light2"], first_entry)
+    limiter.update_devices(["light2", "light3"], second_entry)
+    assert limiter.usage_stats["device_count"] == 3
+
+    limiter.record_poll("light2", False)
+    assert not limiter.is_poll_due("light2")
+
+    limiter.update_devices([], first_entry)
+    assert limiter.usage_stats["device_count"] == 2
+    assert not limiter.is_poll_due("light2")
+
+async def test_first_polls_are_staggered(clock):
+    """Test restored devices are first polled spread over one interval."""
+    limiter = GoveeRateLimiter(MagicMock())
+    devices = [f"light{index}" for index in range(4)]
+    limiter.update_devices(devices)
+    limiter.record_poll("light0", False)
+
+    limiter.stagger_polls(devices)
+    interval = limiter.device_polling_interval("light1")
+    assert limiter.is_poll_due("light1")
+    assert not limiter.is_poll_due("light2")
+    assert not limiter.is_poll_due("light3")
+
+    clock.return_value += interval / 3 + 1
+    assert limiter.is_poll_due("light2")
+    assert not limiter.is_poll_due("light3")
+
+    clock.return_value += interval / 3 + 1
+    assert limiter.is_poll_due("light3")
+    # Devices polled already keep their schedule
+    assert not limiter.is_poll_due("light0")
+
+async def test_daily_ceilings_follow_reserves():
+    """Test lower priority classes stop earlier in the day."""
+    assert daily_ceiling(RequestPriority.CONTROL) > SAFE_LIMIT
+    assert (
+        daily_ceiling(RequestPriority.VERIFY)
+        > daily_ceiling(RequestPriority.POLL)
+        > daily_ceiling(RequestPriority.DISCOVERY)
+    )
+    assert daily_ceiling(RequestPriority.POLL) == int(SAFE_LIMIT * 0.8)
+
+async def test_polling_budget_exhausted_control_still_served(clock):
+    """Test polls wait for the next day while commands keep working."""
+    limiter = GoveeRateLimiter(MagicMock())
+    limiter._total_calls = daily_ceiling(RequestPriority.POLL)
+
+    poll = asyncio.ensure_future(limiter.acquire(priority=RequestPriority.POLL))
+    await asyncio.sleep(0)
+    assert not poll.done()
+
+    await asyncio.wait_for(limiter.acquire(priority=RequestPriority.CONTROL), 0.1)
+    assert not poll.done()
+    assert limiter.usage_stats["requests_by_priority"]["control"] == 1
+    poll.cancel()
+
+async def test_polls_leave_tokens_for_control(clock):
+    """Test background polls never drain the last tokens of the bucket."""
+    limiter = GoveeRateLimiter(MagicMock())
+    limiter._tokens = TOKEN_RESERVE[RequestPriority.POLL] + 1
+
+    await asyncio.wait_for(limiter.acquire(priority=RequestPriority.POLL), 0.1)
+    poll = asyncio.ensure_future(limiter.acquire(priority=RequestPriority.POLL))
+    await asyncio.sleep(0)
+    assert not poll.done()
+
+    for _ in range(TOKEN_RESERVE[RequestPriority.POLL]):
+        await asyncio.wait_for(limiter.acquire(priority=RequestPriority.CONTROL), 0.1)
+    poll.cancel()
+
+async def test_volatile_devices_get_more_polls(clock):
+    """Test devices whose state changes often are polled more often."""
+    limiter = GoveeRateLimiter(MagicMock())
+    limiter.update_devices(["strip", "closet"])
+
+    for _ in range(20):
+        clock.return_value += 300
+        limiter.record_poll("strip", True)
+        limiter.record_poll("closet", False)
+
+    assert limiter.device_polling_interval("strip") < limiter.device_polling_interval("closet")
+
+async def test_device_intervals_fit_polling_budget(clock):
+    """Test the per-device intervals stay within bounds and the poll budget."""
+    limiter = GoveeRateLimiter(MagicMock())
+    device_ids = [f"device_{index}" for index in range(200)]
+    limiter.update_devices(device_ids)
+    for index, device_id in enumerate(device_ids):
+        limiter.record_poll(device_id, index % 10 == 0)
+
+    intervals = [limiter.device_polling_interval(device_id) for device_id in device_ids]
+    polls_per_day = sum(SECONDS_PER_DAY / interval for interval in intervals)
+
+    assert min(intervals) >= MIN_POLLING_INTERVAL
+    assert max(intervals) <= MAX_DEVICE_POLLING_INTERVAL
+    assert polls_per_day <= daily_ceiling(RequestPriority.POLL) * 1.01
+
+async def test_large_fleet_intervals_fit_polling_budget(clock):
+    """Test fleets too large for hourly polls stretch past the hourly bound."""
+    limiter = GoveeRateLimiter(MagicMock())
+    device_ids = [f"device_{index}" for index in range(500)]
+    limiter.update_devices(device_ids)
+    # Light use early in the day must not raise the budget over the ceiling
+    limiter._total_calls = 1
+
+    intervals = [limiter.device_polling_interval(device_id) for device_id in device_ids]
+    polls_per_day = sum(SECONDS_PER_DAY / interval for interval in intervals)
+
+    assert max(intervals) > MAX_DEVICE_POLLING_INTERVAL
+    assert polls_per_day <= daily_ceiling(RequestPriority.POLL) * 1.0001
+
+async def test_unpolled_devices_are_due(clock):
+    """Test new devices are polled right away and then wait their interval."""
+    limiter = GoveeRateLimiter(MagicMock())
+    limiter.update_devices(["light"])
+
+    assert limiter.is_poll_due("light")
+    assert limiter.next_poll_delay() == MIN_POLLING_INTERVAL
+
+    limiter.record_poll("light", False)
+    assert not limiter.is_poll_due("light")
+    clock.return_value += limiter.device_polling_interval("light") + 0.01
+    assert limiter.is_poll_due("light")
+
+async def test_device_control_window_queues_commands():
+    """Test commands over the per-device limit wait for the window."""
+    limiter = GoveeRateLimiter(MagicMock(), control_limit=2, control_window=0.1)
+
+    start = time.monotonic()
+    await limiter.acquire_device("light")
+    await limiter.acquire_device("light")
+    await limiter.acquire_device("other")
+    assert time.monotonic() - start < 0.05
+
+    await asyncio.wait_for(limiter.acquire_device("light"), 1)
+    assert time.monotonic() - start >= 0.1
+
+async def test_device_throttle_lowers_limit():
+    """Test a throttled device is blocked and gets a lower learned limit."""
+    limiter = GoveeRateLimiter(MagicMock(), control_limit=5, control_window=0.1)
+    for _ in range(3):
+        await limiter.acquire_device("light")
+
+    limiter.device_throttled("light", None)
+
+    window = limiter._control_windows["light"]
+    assert window.limit == 2
+    assert window.delay(time.monotonic(), 0.1) > 0
@@ -0,0 +1,142 @@
+"""Tests for the Govee sensor platform."""
+import pytest
+from unittest.mock import MagicMock, patch
+
+from custom_components.govee import rate_limiter as rate_limiter_module, sensor as sensor_module
+from custom_components.govee.rate_limiter import GoveeRateLimiter
+from custom_components.govee.sensor import (
+    SENSOR_UPDATE_INTERVAL,
+    GoveeApiCallsSensor,
+    GoveeApiLatencySensor,
+    GoveeApiRateLimitSensor,
+    GoveePollingIntervalSensor,
+    _migrate_unique_id,
+)
+
+async def test_usage_snapshot_is_cached():
+    """Test the usage snapshot is only rebuilt after counters change."""
+    limiter = GoveeRateLimiter(MagicMock())
+
+    first = limiter.usage_stats
+    assert limiter.usage_stats is first
+
+    limiter.increment_call_count()
+    second = limiter.usage_stats
+    assert second is not first
+    assert second["total_calls_today"] == 1
+    with pytest.raises(TypeError):
+        second["total_calls_today"] = 5
+
+async def test_usage_updates_are_batched():
+    """Test a burst of calls pushes one snapshot."""
+    limiter = GoveeRateLimiter(MagicMock())
+
+    with patch.object(rate_limiter_module, "async_dispatcher_send") as dispatcher_send:
+        for _ in range(10):
+            limiter.increment_call_count()
+        limiter._publish_usage()
+        limiter._publish_usage()
+
+    assert limiter._publish_handle is None
+    assert dispatcher_send.call_count == 2
+    assert dispatcher_send.call_args[0][2]["total_calls_today"] == 10
+
+async def test_sensors_write_only_on_change():
+    """Test sensors skip state writes for an unchanged snapshot."""
+    limiter = GoveeRateLimiter(MagicMock())
+    sensors = [
+        GoveeApiRateLimitSensor(limiter),
+        GoveeApiCallsSensor(limiter),
+        GoveePollingIntervalSensor(limiter),
+    ]
+    for sensor in sensors:
+        sensor.async_write_ha_state = MagicMock()
+        assert not sensor.should_poll
+
+    for sensor in sensors:
+        sensor._handle_usage_update(limiter.usage_stats)
+        sensor.async_write_ha_state.assert_not_called()
+
+    limiter.increment_call_count()
+    for sensor in sensors:
+        sensor._handle_usage_update(limiter.usage_stats)
+
+    sensors[0].async_write_ha_state.assert_called_once()
+    sensors[1].async_write_ha_state.assert_called_once()
+    assert sensors[1].native_value == 1
+    # The polling interval did not change
+    sensors[2].async_write_ha_state.assert_not_called()
+
+async def test_latency_sensor_follows_its_endpoint():
+    """Test a latency sensor shows the percentiles of its endpoint only."""
+    limiter = GoveeRateLimiter(MagicMock())
+    sensor = GoveeApiLatencySensor(limiter, "control")
+    sensor.async_write_ha_state = MagicMock()
+    assert sensor.native_value is None
+
+    limiter.record_request("state", 200, 30)
+    sensor._handle_usage_update(limiter.usage_stats)
+    sensor.async_write_ha_state.assert_not_called()
+
+    limiter.record_request("control", 429, 180)
+    sensor._handle_usage_update(limiter.usage_stats)
+    sensor.async_write_ha_state.assert_called_once()
+    assert sensor.native_value == 180
+    assert sensor.extra_state_attributes["rate_429"] == 1
+    # Counters change with every request and stay out of the recorder
+    assert {"requests", "statuses"} <= sensor._unrecorded_attributes
+    assert "p95_ms" not in sensor._unrecorded_attributes
+
+async def test_extra_key_sensors_are_told_apart():
+    """Test sensors of an extra API key carry its id, the first key's do not."""
+    limiter = GoveeRateLimiter(MagicMock())
+
+    assert GoveeApiCallsSensor(limiter).unique_id == "govee_api_calls"
+    sensor = GoveeApiCallsSensor(limiter, "0123456789abcdef")
+    assert sensor.unique_id == "govee_api_calls_0123456789abcdef"
+    assert sensor.name == "Govee API Calls (key 012345)"
+
+async def test_entries_sharing_a_key_get_their_own_sensors():
+    """Test the sensors of two entries using one API key have distinct ids."""
+    limiter = GoveeRateLimiter(MagicMock())
+
+    first = GoveeApiCallsSensor(limiter, entry_id="entry_a")
+    second = GoveeApiCallsSensor(limiter, entry_id="entry_b")
+    assert first.unique_id == "entry_a_govee_api_calls"
+    assert second.unique_id == "entry_b_govee_api_calls"
+    assert (
+        GoveeApiLatencySensor(limiter, "state", "0123456789abcdef", "entry_a").unique_id
+        == "entry_a_govee_api_latency_state_0123456789abcdef"
+    )
+
+    # Sensors registered before the entry id was added keep their history
+    legacy = MagicMock(domain="sensor", unique_id="govee_api_calls")
+    assert _migrate_unique_id("entry_a", legacy) == {"new_unique_id": "entry_a_govee_api_calls"}
+    assert _migrate_unique_id("entry_a", MagicMock(domain="sensor", unique_id=first.unique_id)) is None
+    assert _migrate_unique_id("entry_a", MagicMock(domain="light", unique_id="AA:BB")) is None
+
+async def test_sensor_writes_are_throttled():
+    """Test a busy limiter writes a sensor at most once per interval."""
+    limiter = GoveeRateLimiter(MagicMock())
+    sensor = GoveeApiCallsSensor(limiter)
+    sensor.hass = MagicMock()
+    sensor.async_write_ha_state = MagicMock()
+
+    with patch.object(sensor_module, "async_call_later") as call_later:
+        limiter.increment_call_count()
+        sensor._handle_usage_update(limiter.usage_stats)
+        sensor.async_write_ha_state.assert_called_once()
+
+        for _ in range(5):
+            limiter.increment_call_count()
+            sensor._handle_usage_update(limiter.usage_stats)
+        sensor.async_write_ha_state.assert_called_once()
+        call_later.assert_called_once()
+        assert 0 < call_later.call_args[0][1] <= SENSOR_UPDATE_INTERVAL
+
+        # The delayed write shows the latest snapshot
+        call_later.call_args[0][2](None)
+    assert sensor.async_write_ha_state.call_count == 2
+    assert sensor.native_value == 6
+    assert "endpoints" in sensor._unrecorded_attributes
+    limiter._publish_handle.cancel()
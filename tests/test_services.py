@@ -0,0 +1,53 @@
+"""Tests for the Govee services."""
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from homeassistant.exceptions import ServiceValidationError
+
+from custom_components.govee.services import SET_MANY_SCHEMA, async_setup_services
+
+@pytest.fixture
+def set_many(mock_coordinator):
+    """Register the services and return the set_many handler."""
+    hass = MagicMock()
+    mock_coordinator.devices = {"AA:BB:CC:DD:EE:FF:00:11": {}, "AA:BB:CC:DD:EE:FF:00:22": {}}
+    mock_coordinator.async_set_many = AsyncMock(
+        side_effect=lambda batch: {device_id: None for device_id in batch}
+    )
+    hass.data = {"govee": {"test_entry_id": {"coordinator": mock_coordinator}}}
+    async_setup_services(hass)
+    return hass.services.async_register.call_args[0][2]
+
+async def test_set_many_merges_and_reports(set_many, mock_coordinator):
+    """Test commands per light are merged and results reported per target."""
+    entity = MagicMock(platform="govee", config_entry_id="test_entry_id", unique_id="AA:BB:CC:DD:EE:FF:00:11")
+    call = MagicMock()
+    call.data = SET_MANY_SCHEMA(
+        {
+            "commands": [
+                {"entity_id": "light.one", "turn": "on", "colorTem": 3000},
+                {"device": "AA:BB:CC:DD:EE:FF:00:22", "turn": "off"},
+                {"entity_id": "light.one", "color": [255, 0, 0], "brightness": 40},
+            ]
+        }
+    )
+
+    with patch("custom_components.govee.services.er.async_get") as registry:
+        registry.return_value.async_get.return_value = entity
+        response = await set_many(call)
+
+    mock_coordinator.async_set_many.assert_awaited_once_with(
+        {
+            "AA:BB:CC:DD:EE:FF:00:11": {"turn": "on", "color": {"r": 255, "g": 0, "b": 0}, "brightness": 40},
+            "AA:BB:CC:DD:EE:FF:00:22": {"turn": "off"},
+        }
+    )
+    assert response == {"results": {"light.one": "ok", "AA:BB:CC:DD:EE:FF:00:22": "ok"}}
+
+async def test_set_many_unknown_device(set_many):
+    """Test an unknown device is rejected before anything is sent."""
+    call = MagicMock()
+    call.data = SET_MANY_SCHEMA({"commands": [{"device": "unknown", "turn": "on"}]})
+
+    with patch("custom_components.govee.services.er.async_get"), pytest.raises(ServiceValidationError):
+        await set_many(call)
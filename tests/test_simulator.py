@@ -0,0 +1,38 @@
+"""Regression tests for the polling policy over simulated days.
+
+The fleet runs cover one calendar day from midnight to midnight, with a
+restart at noon that comes up from the device cache like Home Assistant.
+"""
+import pytest
+
+from benchmarks.simulator import async_simulate
+from custom_components.govee.rate_limiter import SAFE_LIMIT
+
+
+@pytest.mark.parametrize(
+    ("devices", "daily_calls", "peak_hourly_calls", "longest_gap"),
+    [(1, 4862, 238, 1), (50, 6244, 269, 1), (500, 6372, 324, 10)],
+)
+async def test_day_stays_under_safe_limit(devices, daily_calls, peak_hourly_calls, longest_gap):
+    """Test a calendar day with a restart for representative fleets."""
+    result = await async_simulate(devices, hours=24, restarts=(12,), start_hour=0)
+
+    assert result["calls_by_day"] == {"2024-01-01": daily_calls}
+    assert daily_calls < SAFE_LIMIT
+    assert result["throttled"] == 0
+    # The budget lasts the whole day instead of running out before midnight
+    assert result["last_call_by_day"]["2024-01-01"] >= "23:45"
+    assert result["longest_gap_minutes"] == longest_gap
+    # Staggered first polls keep a restart from bursting
+    assert result["peak_calls_per_hour"] == peak_hourly_calls
+
+async def test_restarts_keep_the_daily_budget():
+    """Test restarts every few hours do not hand out the budget again."""
+    steady = await async_simulate(50, hours=48)
+    restarted = await async_simulate(50, hours=48, restarts=(6, 12, 18, 24, 30, 36, 42))
+
+    full_day = "2024-01-02"
+    assert steady["calls_by_day"][full_day] < SAFE_LIMIT
+    assert restarted["calls_by_day"][full_day] < SAFE_LIMIT
+    assert restarted["last_call_by_day"][full_day] >= "23:45"
+    assert restarted["total_calls"] < steady["total_calls"] * 1.05
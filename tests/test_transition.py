@@ -0,0 +1,33 @@
+"""Tests for the Govee transition planner."""
+from custom_components.govee.transition import plan_transition
+
+def test_plan_interpolates_to_target():
+    """Test a fade is split into evenly spaced steps ending at the target."""
+    plan = plan_transition({"brightness": 0}, {"turn": "on", "brightness": 100}, 4)
+
+    assert plan == [
+        {"turn": "on", "brightness": 25},
+        {"brightness": 50},
+        {"brightness": 75},
+        {"brightness": 100},
+    ]
+
+def test_plan_interpolates_colors():
+    """Test colors fade per channel and values without a start jump first."""
+    plan = plan_transition(
+        {"color": {"r": 255, "g": 0, "b": 0}},
+        {"color": {"r": 0, "g": 0, "b": 255}, "colorTem": 3000},
+        2,
+    )
+
+    assert plan == [
+        {"color": {"r": 128, "g": 0, "b": 128}, "colorTem": 3000},
+        {"color": {"r": 0, "g": 0, "b": 255}},
+    ]
+
+def test_plan_skips_steps_that_change_nothing():
+    """Test rounding never produces repeated steps."""
+    plan = plan_transition({"brightness": 50}, {"brightness": 52}, 10)
+
+    assert [step["brightness"] for step in plan] == [51, 52]
+    assert plan_transition({"brightness": 50}, {"brightness": 50}, 5) == []
@@ -0,0 +1,81 @@
+"""Tests for the Govee websocket API."""
+import threading
+from unittest.mock import MagicMock
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+
+from custom_components.govee.device_cache import api_key_hash
+from custom_components.govee.rate_limiter import (
+    DATA_RATE_LIMITERS,
+    GoveeRateLimiter,
+    async_get_rate_limiter,
+    async_release_rate_limiter,
+)
+from custom_components.govee.websocket_api import websocket_subscribe_usage
+
+async def test_subscribe_usage_streams_changes(tmp_path):
+    """Test the subscription sends the full stats, then only what changed."""
+    hass = HomeAssistant(str(tmp_path))
+    limiter = GoveeRateLimiter(hass, "abc123")
+    hass.data[DATA_RATE_LIMITERS] = {"abc123": MagicMock(limiter=limiter)}
+    connection = MagicMock()
+    connection.subscriptions = {}
+    threads = []
+    connection.send_message.side_effect = lambda message: threads.append(threading.get_ident())
+
+    websocket_subscribe_usage(hass, connection, {"id": 5, "type": "govee/usage/subscribe"})
+
+    connection.send_result.assert_called_once_with(5)
+    first = connection.send_message.call_args[0][0]
+    assert first["id"] == 5
+    assert first["event"]["key_id"] == "abc123"
+    assert first["event"]["stats"] == dict(limiter.usage_stats)
+
+    limiter.increment_call_count()
+    async_dispatcher_send(hass, limiter.signal_usage_updated, limiter.usage_stats)
+    await hass.async_block_till_done()
+    changes = connection.send_message.call_args[0][0]["event"]["stats"]
+    assert changes["total_calls_today"] == 1
+    assert "daily_limit" not in changes
+    # Events are sent from the event loop, not from an executor thread
+    assert threads == [threading.get_ident()] * 2
+
+    # A snapshot without changes sends nothing
+    async_dispatcher_send(hass, limiter.signal_usage_updated, limiter.usage_stats)
+    await hass.async_block_till_done()
+    assert connection.send_message.call_count == 2
+
+    connection.subscriptions[5]()
+    limiter.increment_call_count()
+    async_dispatcher_send(hass, limiter.signal_usage_updated, limiter.usage_stats)
+    await hass.async_block_till_done()
+    assert connection.send_message.call_count == 2
+    limiter._publish_handle.cancel()
+    await hass.async_stop(force=True)
+
+async def test_subscription_follows_keys_set_up_later(tmp_path):
+    """Test keys set up after subscribing, as during startup, are streamed."""
+    hass = HomeAssistant(str(tmp_path))
+    connection = MagicMock()
+    connection.subscriptions = {}
+
+    websocket_subscribe_usage(hass, connection, {"id": 7, "type": "govee/usage/subscribe"})
+    connection.send_result.assert_called_once_with(7)
+    connection.send_message.assert_not_called()
+
+    limiter = await async_get_rate_limiter(hass, "mock-api-key")
+    await hass.async_block_till_done()
+    event = connection.send_message.call_args[0][0]["event"]
+    assert event["key_id"] == api_key_hash("mock-api-key")
+    assert event["stats"] == dict(limiter.usage_stats)
+
+    # A second entry using the key does not add it again
+    await async_get_rate_limiter(hass, "mock-api-key")
+    await hass.async_block_till_done()
+    assert connection.send_message.call_count == 1
+
+    connection.subscriptions[7]()
+    await async_release_rate_limiter(hass, "mock-api-key")
+    await async_release_rate_limiter(hass, "mock-api-key")
+    await hass.async_stop(force=True)